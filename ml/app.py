@@ -1,4 +1,4 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Query
+from fastapi import FastAPI, HTTPException, UploadFile, File, Query, Header
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
@@ -6,6 +6,8 @@ import uvicorn
 import numpy as np
 import time
 import os
+import hmac
+import threading
 from dotenv import load_dotenv
 from PIL import Image
 import io
@@ -14,6 +16,11 @@ import io
 from faiss_from_qdrant import FaissFromQdrantDatabase
 from qwen_embeddings import QwenEmbedder
 from fish_species import FishSpecies
+from executors import ExecutorSaturatedError, executor_from_env
+from batching import MicroBatcher
+from caching import QueryResultCache, ImageEmbeddingCache, image_digest, perceptual_hash
+from embedding_cache import embedding_cache_from_env
+from index_tuning import index_config_from_env
 
 # Import picture verification components
 from pic_verification.embedder import Embedder
@@ -39,6 +46,27 @@ qwen_embedder: Optional[QwenEmbedder] = None
 image_embedder: Optional[Embedder] = None
 initialization_mode: str = "none"  # "none", "low_resources", "high_resources", "low_res_pic", "random_pic"
 
+# Databases and models are initialized on the executor threads; concurrent requests must not create them twice
+initialization_lock = threading.Lock()
+
+# Bounded pools so blocking FAISS/Qdrant and model calls never run on the event loop.
+# Sizes are configurable via SEARCH_POOL_SIZE/SEARCH_QUEUE_DEPTH and INFERENCE_POOL_SIZE/INFERENCE_QUEUE_DEPTH
+search_executor = executor_from_env("search", "SEARCH", default_workers=4, default_queue_depth=32)
+inference_executor = executor_from_env("inference", "INFERENCE", default_workers=2, default_queue_depth=16)
+
+# Coalesce concurrent queries/uploads into one model forward pass (created with the embedders)
+text_query_batcher: Optional[MicroBatcher] = None
+image_batcher: Optional[MicroBatcher] = None
+
+# Semantic /search results keyed by (normalized description, top_k, mode, index version)
+result_cache = QueryResultCache(max_bytes=int(os.getenv("RESULT_CACHE_MAX_BYTES", 16 * 1024 * 1024)))
+
+# Embeddings (and final results) of uploaded images keyed by bytes digest (and perceptual hash, if enabled)
+image_cache = ImageEmbeddingCache(
+    max_entries=int(os.getenv("IMAGE_CACHE_MAX_ENTRIES", 2048)),
+    phash_max_distance=int(os.getenv("IMAGE_CACHE_PHASH_DISTANCE", -1))
+)
+
 
 class FishSearchRequest(BaseModel):
     description: str = Field(..., description="Text description of the fish to search for")
@@ -46,6 +74,12 @@ class FishSearchRequest(BaseModel):
     mode: str = Field(default="auto", description="Search mode: 'low_resources', 'high_resources', or 'auto'")
 
 
+class BatchSearchRequest(BaseModel):
+    embeddings: List[List[float]] = Field(..., min_length=1, max_length=1024, description="Query vectors (1024-d for text, 512-d for image)")
+    top_k: int = Field(default=5, ge=1, le=50, description="Number of top results to return per query")
+    index: str = Field(default="text", description="Index to search: 'text' or 'image'")
+
+
 class FishResult(BaseModel):
     id: int
     name: str
@@ -65,6 +99,13 @@ class FishSearchResponse(BaseModel):
     total_time: float
 
 
+class BatchSearchResponse(BaseModel):
+    success: bool
+    results: List[List[FishResult]]
+    timing: Dict[str, float]
+    total_time: float
+
+
 class InitializationRequest(BaseModel):
     mode: str = Field(..., description="Initialization mode: 'low_resources' or 'high_resources'")
 
@@ -81,6 +122,10 @@ class StatusResponse(BaseModel):
     message: str
 
 
+class RebuildRequest(BaseModel):
+    index: str = Field(default="text", description="Index to rebuild: 'text' or 'image'")
+
+
 class ImageSearchResponse(BaseModel):
     success: bool
     results: List[FishResult]
@@ -94,12 +139,17 @@ def initialize_database():
     global vector_db
     
     try:
-        if vector_db is None:
+        with initialization_lock:
+            if vector_db is not None:
+                return True
             print("🗄️ Initializing FAISS database for text embeddings...")
             vector_db = FaissFromQdrantDatabase(
                 collection_name="fish_embeddings_20250627_102709",
-                faiss_index_path="qdrant_faiss_index.faiss"
+                faiss_index_path="qdrant_faiss_index.faiss",
+                **index_config_from_env("TEXT_INDEX")
             )
+            if os.getenv("INDEX_LOAD_REPORT") == "1":
+                vector_db.compare_load_modes()
             print("✅ Text database initialized successfully")
         return True
     except Exception as e:
@@ -112,12 +162,15 @@ def initialize_image_database():
     global image_vector_db
     
     try:
-        if image_vector_db is None:
+        with initialization_lock:
+            if image_vector_db is not None:
+                return True
             print("🖼️ Initializing FAISS database for image embeddings...")
             image_vector_db = FaissFromQdrantDatabase(
                 collection_name="fish_image_embeddings",
                 faiss_index_path="fish_image_embeddings_faiss_index.faiss",  # Separate index for images
-                embedding_dimension=512  # ResNet18 produces 512D embeddings
+                embedding_dimension=512,  # ResNet18 produces 512D embeddings
+                **index_config_from_env("IMAGE_INDEX")
             )
             print("✅ Image database initialized successfully")
         return True
@@ -128,12 +181,22 @@ def initialize_image_database():
 
 def initialize_qwen_embedder():
     """Initialize the Qwen text embedder"""
-    global qwen_embedder
+    global qwen_embedder, text_query_batcher
     
     try:
-        if qwen_embedder is None:
+        with initialization_lock:
+            if qwen_embedder is not None:
+                return True
             print("🤖 Initializing Qwen text embedding model...")
-            qwen_embedder = QwenEmbedder()
+            # Optional persistent embedding cache, enabled by EMBEDDING_CACHE_PATH
+            qwen_embedder = QwenEmbedder(cache=embedding_cache_from_env())
+            text_query_batcher = MicroBatcher(
+                "qwen_text",
+                qwen_embedder.encode_fish_queries,
+                inference_executor,
+                max_batch_size=int(os.getenv("TEXT_BATCH_MAX_SIZE", 16)),
+                max_wait_ms=float(os.getenv("TEXT_BATCH_MAX_WAIT_MS", 5))
+            )
             print("✅ Qwen embedder initialized successfully")
         return True
     except Exception as e:
@@ -143,12 +206,21 @@ def initialize_qwen_embedder():
 
 def initialize_image_embedder():
     """Initialize the image embedder for fish image processing"""
-    global image_embedder
+    global image_embedder, image_batcher
     
     try:
-        if image_embedder is None:
+        with initialization_lock:
+            if image_embedder is not None:
+                return True
             print("🖼️ Initializing ResNet18 image embedding model...")
             image_embedder = Embedder()
+            image_batcher = MicroBatcher(
+                "resnet18_image",
+                embed_image_batch,
+                inference_executor,
+                max_batch_size=int(os.getenv("IMAGE_BATCH_MAX_SIZE", 8)),
+                max_wait_ms=float(os.getenv("IMAGE_BATCH_MAX_WAIT_MS", 10))
+            )
             print("✅ Image embedder initialized successfully")
         return True
     except Exception as e:
@@ -156,6 +228,36 @@ def initialize_image_embedder():
         return False
 
 
+def normalize_query(description: str) -> str:
+    """Normalize a text query for result caching (case and whitespace insensitive)"""
+    return " ".join(description.casefold().split())
+
+
+def preprocess_image_bytes(image_data: bytes):
+    """Decode uploaded image bytes into a preprocessed ResNet18 input tensor and its perceptual hash (blocking)"""
+    pil_image = Image.open(io.BytesIO(image_data)).convert('RGB')
+    return image_embedder.preprocess(pil_image), perceptual_hash(pil_image)
+
+
+def embed_image_batch(image_tensors: list) -> List[List[float]]:
+    """Run one ResNet18 forward pass over a batch of preprocessed images (blocking)"""
+    embeddings = image_embedder.get_embeddings(image_tensors)
+    return embeddings.cpu().numpy().tolist()
+
+
+def count_qdrant_points() -> int:
+    """Total number of points in the loaded Qdrant collections (blocking, run it on search_executor)"""
+    fish_count = 0
+    for database in (vector_db, image_vector_db):
+        if database is None:
+            continue
+        try:
+            fish_count += database.get_stats().get("qdrant_points", 0)
+        except Exception:
+            pass
+    return fish_count
+
+
 @app.post("/initialize", response_model=StatusResponse)
 async def initialize_system(request: InitializationRequest):
     """
@@ -186,7 +288,7 @@ async def initialize_system(request: InitializationRequest):
         
         if mode in ["low_resources", "low_res_pic"]:
             # Initialize text database
-            db_success = initialize_database()
+            db_success = await search_executor.run(initialize_database)
             if not db_success:
                 raise HTTPException(
                     status_code=500,
@@ -195,7 +297,7 @@ async def initialize_system(request: InitializationRequest):
         
         elif mode == "random_pic":
             # Only initialize image database
-            image_db_success = initialize_image_database()
+            image_db_success = await search_executor.run(initialize_image_database)
             if not image_db_success:
                 raise HTTPException(
                     status_code=500,
@@ -203,15 +305,15 @@ async def initialize_system(request: InitializationRequest):
                 )
         
         elif mode == "high_resources":
-            # Initialize both databases
-            db_success = initialize_database()
+            # Initialize both databases (index loading or building blocks, so it runs off the event loop)
+            db_success = await search_executor.run(initialize_database)
             if not db_success:
                 raise HTTPException(
                     status_code=500,
                     detail="Failed to initialize text database"
                 )
             
-            image_db_success = initialize_image_database()
+            image_db_success = await search_executor.run(initialize_image_database)
             if not image_db_success:
                 raise HTTPException(
                     status_code=500,
@@ -220,14 +322,14 @@ async def initialize_system(request: InitializationRequest):
         
         # Initialize embedders based on mode
         if mode == "high_resources":
-            qwen_success = initialize_qwen_embedder()
+            qwen_success = await inference_executor.run(initialize_qwen_embedder)
             if not qwen_success:
                 raise HTTPException(
                     status_code=500,
                     detail="Failed to initialize Qwen embeddings model"
                 )
             
-            image_success = initialize_image_embedder()
+            image_success = await inference_executor.run(initialize_image_embedder)
             if not image_success:
                 raise HTTPException(
                     status_code=500,
@@ -236,7 +338,7 @@ async def initialize_system(request: InitializationRequest):
         
         elif mode == "low_res_pic":
             # Only initialize image embedder, skip Qwen for low resources
-            image_success = initialize_image_embedder()
+            image_success = await inference_executor.run(initialize_image_embedder)
             if not image_success:
                 raise HTTPException(
                     status_code=500,
@@ -247,13 +349,7 @@ async def initialize_system(request: InitializationRequest):
         init_time = time.time() - start_time
         
         # Get database stats
-        fish_count = 0
-        if vector_db:
-            stats = vector_db.get_stats()
-            fish_count += stats.get("qdrant_points", 0)
-        if image_vector_db:
-            image_stats = image_vector_db.get_stats()
-            fish_count += image_stats.get("qdrant_points", 0)
+        fish_count = await search_executor.run(count_qdrant_points)
         
         return StatusResponse(
             status="success",
@@ -267,6 +363,8 @@ async def initialize_system(request: InitializationRequest):
             message=f"System initialized in {mode} mode in {init_time:.2f} seconds"
         )
         
+    except ExecutorSaturatedError as e:
+        raise HTTPException(status_code=503, detail=f"Server busy: {str(e)}", headers={"Retry-After": "1"})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Initialization failed: {str(e)}")
 
@@ -291,7 +389,11 @@ async def search_fish(request: FishSearchRequest):
     # Check if system is initialized
     if vector_db is None:
         # Try to auto-initialize in low resources mode
-        if not initialize_database():
+        try:
+            initialized = await search_executor.run(initialize_database)
+        except ExecutorSaturatedError as e:
+            raise HTTPException(status_code=503, detail=f"Server busy: {str(e)}", headers={"Retry-After": "1"})
+        if not initialized:
             raise HTTPException(
                 status_code=503,
                 detail="System not initialized. Please call /initialize endpoint first."
@@ -326,12 +428,35 @@ async def search_fish(request: FishSearchRequest):
             )
     
     try:
+        # Only semantic results are deterministic, random-vector modes are never cached
+        cache_key = None
+        index_version = vector_db.index_version
+        if mode_used == "high_resources" and qwen_embedder is not None:
+            cache_lookup_start = time.time()
+            cache_key = (normalize_query(request.description), request.top_k, mode_used)
+            cached_results = result_cache.get(cache_key, index_version)
+            timing["result_cache_lookup"] = time.time() - cache_lookup_start
+            
+            if cached_results is not None:
+                total_time = time.time() - start_time
+                timing["result_cache_hit"] = 1.0
+                timing["total_request"] = total_time
+                return FishSearchResponse(
+                    success=True,
+                    results=cached_results,
+                    query=request.description,
+                    mode_used=mode_used,
+                    timing=timing,
+                    total_time=total_time
+                )
+            timing["result_cache_hit"] = 0.0
+        
         # Generate query vector based on mode
         embed_start = time.time()
         
         if mode_used == "high_resources" and qwen_embedder is not None:
             # Use Qwen embeddings for semantic search
-            query_vector = qwen_embedder.encode_fish_query(request.description)
+            query_vector = await text_query_batcher.submit(request.description)
             timing["text_embedding"] = time.time() - embed_start
         else:
             # Use random vector for low resources mode
@@ -340,7 +465,7 @@ async def search_fish(request: FishSearchRequest):
         
         # Perform the search
         search_start = time.time()
-        results, search_timing = vector_db.search_with_timing(query_vector, top_k=request.top_k)
+        results, search_timing = await search_executor.run(vector_db.search_with_timing, query_vector, top_k=request.top_k)
         
         # Filter out non-numeric timing values to avoid validation errors
         filtered_timing = {k: v for k, v in search_timing.items() if isinstance(v, (int, float))}
@@ -361,6 +486,10 @@ async def search_fish(request: FishSearchRequest):
             )
             fish_results.append(fish_result)
         
+        if cache_key is not None and "error" not in search_timing:
+            size_bytes = sum(len(fish_result.model_dump_json()) for fish_result in fish_results)
+            result_cache.put(cache_key, index_version, fish_results, size_bytes)
+        
         total_time = time.time() - start_time
         timing["total_request"] = total_time
         
@@ -373,6 +502,8 @@ async def search_fish(request: FishSearchRequest):
             total_time=total_time
         )
         
+    except ExecutorSaturatedError as e:
+        raise HTTPException(status_code=503, detail=f"Server busy: {str(e)}", headers={"Retry-After": "1"})
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -380,6 +511,58 @@ async def search_fish(request: FishSearchRequest):
         )
 
 
+@app.post("/search/batch", response_model=BatchSearchResponse)
+async def search_fish_batch(request: BatchSearchRequest):
+    """
+    Search for fish with many precomputed query vectors at once.
+    
+    All vectors are searched with a single FAISS call and the payloads of all hits
+    are resolved in one lookup, for bulk jobs such as evaluations or reprocessing catches.
+    Results are returned in query order.
+    """
+    start_time = time.time()
+    database = get_index_database(request.index)
+    
+    # Check every row before building the matrix, ragged input cannot be converted
+    if any(len(embedding) != database.embedding_dimension for embedding in request.embeddings):
+        raise HTTPException(
+            status_code=400,
+            detail=f"All embeddings must have {database.embedding_dimension} dimensions for the {request.index} index"
+        )
+    queries = np.asarray(request.embeddings, dtype=np.float32)
+    
+    try:
+        results, timing = await search_executor.run(database.search_batch, queries, top_k=request.top_k)
+        
+        fish_results = [
+            [
+                FishResult(
+                    id=fish.id,
+                    name=fish.name,
+                    similarity_score=float(score),
+                    genus=fish.genus if fish.genus else None,
+                    species=fish.species if fish.species else None,
+                    fbname=fish.fbname if fish.fbname else None,
+                    description=fish.full_description[:200] + "..." if len(fish.full_description) > 200 else fish.full_description
+                )
+                for fish, score in query_results
+            ]
+            for query_results in results
+        ]
+        
+        total_time = time.time() - start_time
+        timing["total_request"] = total_time
+        return BatchSearchResponse(success=True, results=fish_results, timing=timing, total_time=total_time)
+        
+    except ExecutorSaturatedError as e:
+        raise HTTPException(status_code=503, detail=f"Server busy: {str(e)}", headers={"Retry-After": "1"})
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Batch search failed: {str(e)}"
+        )
+
+
 @app.post("/search_image", response_model=ImageSearchResponse)
 async def search_fish_by_image(image: UploadFile = File(...)):
     """
@@ -445,22 +628,42 @@ async def search_fish_by_image(image: UploadFile = File(...)):
     try:
         # Read and process the uploaded image
         image_processing_start = time.time()
+        # Read once so results of a search that overlaps an index swap are not cached under the new version
+        index_version = search_db.index_version
         
         if use_real_embeddings:
             # Read image data
             image_data = await image.read()
+            digest = image_digest(image_data)
             
-            # Convert to PIL Image
-            pil_image = Image.open(io.BytesIO(image_data)).convert('RGB')
+            # Byte-identical re-upload: reuse the final results or at least the embedding
+            cached_results = image_cache.get_results(digest, index_version)
+            if cached_results is not None:
+                total_time = time.time() - start_time
+                timing["image_cache_hit"] = 1.0
+                timing["total_request"] = total_time
+                return ImageSearchResponse(
+                    success=True,
+                    results=cached_results,
+                    mode_used=f"{initialization_mode}_image_search",
+                    timing=timing,
+                    total_time=total_time
+                )
             
-            # Generate image embedding
-            image_embedding = image_embedder.get_embedding(pil_image)
+            cached_embedding = image_cache.get_by_digest(digest)
+            if cached_embedding is None:
+                # Decode and preprocess off the event loop; a visually identical upload skips the model
+                image_tensor, phash = await inference_executor.run(preprocess_image_bytes, image_data)
+                cached_embedding = image_cache.get_by_phash(digest, phash)
+                
+                if cached_embedding is None:
+                    # Embed as part of a shared batch
+                    embedding_vector = await image_batcher.submit(image_tensor)
+                    image_cache.put(digest, phash, embedding_vector)
             
-            # Convert to numpy array and then to list for search
-            if hasattr(image_embedding, 'cpu'):
-                embedding_vector = image_embedding.cpu().numpy().tolist()
-            else:
-                embedding_vector = image_embedding.tolist()
+            if cached_embedding is not None:
+                embedding_vector = cached_embedding.tolist()
+            timing["image_cache_hit"] = 1.0 if cached_embedding is not None else 0.0
             
             # ResNet18 produces 512D embeddings for image database
             if len(embedding_vector) != 512:
@@ -480,7 +683,7 @@ async def search_fish_by_image(image: UploadFile = File(...)):
         
         # Perform the search in image vector database
         search_start = time.time()
-        results, search_timing = search_db.search_with_timing(embedding_vector, top_k=10)
+        results, search_timing = await search_executor.run(search_db.search_with_timing, embedding_vector, top_k=10)
         
         # Filter out non-numeric timing values to avoid validation errors
         filtered_timing = {k: v for k, v in search_timing.items() if isinstance(v, (int, float))}
@@ -501,6 +704,9 @@ async def search_fish_by_image(image: UploadFile = File(...)):
             )
             fish_results.append(fish_result)
         
+        if use_real_embeddings and "error" not in search_timing:
+            image_cache.put_results(digest, index_version, fish_results)
+        
         total_time = time.time() - start_time
         timing["total_request"] = total_time
         
@@ -512,6 +718,8 @@ async def search_fish_by_image(image: UploadFile = File(...)):
             total_time=total_time
         )
         
+    except ExecutorSaturatedError as e:
+        raise HTTPException(status_code=503, detail=f"Server busy: {str(e)}", headers={"Retry-After": "1"})
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -530,20 +738,11 @@ async def get_status():
     image_loaded = image_embedder is not None
     initialized = initialization_mode != "none"
     
-    fish_count = 0
-    if text_db_loaded:
-        try:
-            stats = vector_db.get_stats()
-            fish_count += stats.get("qdrant_points", 0)
-        except:
-            pass
-    
-    if image_db_loaded:
-        try:
-            image_stats = image_vector_db.get_stats()
-            fish_count += image_stats.get("qdrant_points", 0)
-        except:
-            pass
+    # get_stats asks Qdrant for the point counts, so it runs on the search pool
+    try:
+        fish_count = await search_executor.run(count_qdrant_points)
+    except ExecutorSaturatedError:
+        fish_count = 0
     
     status_msg = f"System status: {'initialized' if initialized else 'not initialized'}"
     if initialized:
@@ -593,6 +792,75 @@ async def health():
     }
 
 
+@app.get("/metrics")
+async def metrics():
+    """Runtime statistics of the request executors, batchers and caches"""
+    return {
+        'executors': {
+            'search': search_executor.get_stats(),
+            'inference': inference_executor.get_stats()
+        },
+        'batchers': {
+            'text': text_query_batcher.get_stats() if text_query_batcher else None,
+            'image': image_batcher.get_stats() if image_batcher else None
+        },
+        'caches': {
+            'search_results': result_cache.get_stats(),
+            'text_embeddings': qwen_embedder.cache.get_stats() if qwen_embedder and qwen_embedder.cache else None,
+            'image_embeddings': image_cache.get_stats()
+        },
+        'indexes': {
+            'text': vector_db.get_index_info() if vector_db else None,
+            'image': image_vector_db.get_index_info() if image_vector_db else None
+        }
+    }
+
+
+def get_index_database(index: str) -> FaissFromQdrantDatabase:
+    """Resolve 'text' / 'image' to the loaded FAISS database"""
+    databases = {"text": vector_db, "image": image_vector_db}
+    if index not in databases:
+        raise HTTPException(status_code=400, detail="Index must be 'text' or 'image'")
+    if databases[index] is None:
+        raise HTTPException(status_code=503, detail=f"The {index} database is not initialized")
+    return databases[index]
+
+
+def check_admin_token(token: Optional[str]):
+    """Require the X-Admin-Token header; admin endpoints are disabled unless ADMIN_TOKEN is set"""
+    admin_token = os.getenv("ADMIN_TOKEN")
+    if not admin_token:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (ADMIN_TOKEN is not set)")
+    if not token or not hmac.compare_digest(token.encode(), admin_token.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@app.post("/admin/rebuild", status_code=202)
+async def start_index_rebuild(request: RebuildRequest, x_admin_token: Optional[str] = Header(default=None)):
+    """
+    Rebuild a FAISS index from Qdrant in the background.
+    
+    Searches keep using the current index until the new one is complete and swapped in.
+    """
+    check_admin_token(x_admin_token)
+    database = get_index_database(request.index)
+    
+    if not database.start_background_rebuild():
+        raise HTTPException(status_code=409, detail=f"A rebuild of the {request.index} index is already running")
+    print(f"🔨 Started background rebuild of the {request.index} index")
+    return {'index': request.index, 'started': True, 'progress': database.get_build_progress()}
+
+
+@app.get("/admin/rebuild")
+async def get_index_rebuild_progress(x_admin_token: Optional[str] = Header(default=None)):
+    """Progress of the current or last rebuild of each FAISS index"""
+    check_admin_token(x_admin_token)
+    return {
+        'text': vector_db.get_build_progress() if vector_db else None,
+        'image': image_vector_db.get_build_progress() if image_vector_db else None
+    }
+
+
 @app.get("/")
 async def root():
     """Root endpoint with API information"""
@@ -602,10 +870,13 @@ async def root():
         'endpoints': {
             'initialize': '/initialize (POST) - Initialize system with specified mode',
             'search': '/search (POST) - Search for fish by text description',
+            'search_batch': '/search/batch (POST) - Search with many query vectors in one FAISS call',
             'search_image': '/search_image (POST) - Search for fish by uploaded image',
             'status': '/status (GET) - Get system status',
             'predict': '/predict (POST) - Fish image prediction (mock)',
             'health': '/health (GET) - Health check',
+            'metrics': '/metrics (GET) - Executor, batching and cache statistics',
+            'admin_rebuild': '/admin/rebuild (POST, GET) - Start a background index rebuild / report its progress',
             'docs': '/docs (GET) - API documentation'
         },
         'modes': {
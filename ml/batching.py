@@ -0,0 +1,169 @@
+"""
+Dynamic micro-batching of concurrent inference requests
+"""
+
+import asyncio
+import statistics
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from executors import BoundedExecutor, ExecutorSaturatedError
+
+
+class MicroBatcher:
+    """Coalesces concurrent single-item requests into batched model calls.
+
+    Requests are collected until either ``max_batch_size`` items are waiting or
+    the oldest one has waited ``max_wait_ms``; the batch is then passed to
+    ``batch_fn`` in one call on the given executor and each caller receives its
+    own element of the result. Admission control happens once, when an item is
+    submitted (``max_pending``); a collected batch is run with
+    ``BoundedExecutor.run_admitted`` and is not rejected if other work has
+    filled the executor's queue in the meantime.
+    """
+
+    def __init__(self, name: str, batch_fn: Callable[[List[Any]], List[Any]], executor: BoundedExecutor,
+                 max_batch_size: int = 16, max_wait_ms: float = 5.0, max_pending: int = 256,
+                 metrics_window: int = 1000):
+        """
+        Initialize the batcher
+
+        Args:
+            name: Name used in statistics
+            batch_fn: Blocking callable mapping a list of inputs to a list of outputs of the same length
+            executor: Executor that runs batch_fn
+            max_batch_size: Maximum number of items per batch
+            max_wait_ms: Maximum time the first item of a batch waits for more items
+            max_pending: Maximum number of queued items before new requests are rejected
+            metrics_window: Number of recent batches kept for latency statistics
+        """
+        if max_batch_size < 1:
+            raise ValueError(f"{name}: max_batch_size must be at least 1")
+
+        self.name = name
+        self.batch_fn = batch_fn
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.max_pending = max_pending
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # (batch_size, queue_wait_seconds, compute_seconds) of recent batches
+        self._recent: Deque[Tuple[int, float, float]] = deque(maxlen=metrics_window)
+        self._batches_total = 0
+        self._items_total = 0
+        self._failed_batches = 0
+        self._rejected = 0
+
+    async def submit(self, item: Any) -> Any:
+        """
+        Queue one item and wait for its result
+
+        Args:
+            item: Single input for batch_fn
+
+        Returns:
+            The output corresponding to the item
+
+        Raises:
+            ExecutorSaturatedError: If too many items are already waiting
+        """
+        queue = self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        try:
+            queue.put_nowait((item, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            self._rejected += 1
+            raise ExecutorSaturatedError(f"{self.name} batcher queue is full ({self.max_pending} pending)")
+        return await future
+
+    def _ensure_worker(self) -> asyncio.Queue:
+        """Start the collecting task on the running event loop if needed"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_pending)
+            self._worker = loop.create_task(self._run())
+        return self._queue
+
+    async def _run(self):
+        """Collect items into batches and dispatch them one batch at a time"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._dispatch(batch)
+
+    async def _dispatch(self, batch: List[Tuple[Any, asyncio.Future, float]]):
+        """Run one batch and fan results back to the waiting requests"""
+        items = [item for item, _, _ in batch]
+        futures = [future for _, future, _ in batch]
+
+        dispatch_start = time.perf_counter()
+        queue_wait = dispatch_start - min(enqueued for _, _, enqueued in batch)
+
+        try:
+            outputs = await self.executor.run_admitted(self.batch_fn, items)
+            if len(outputs) != len(items):
+                raise RuntimeError(f"{self.name}: batch function returned {len(outputs)} results for {len(items)} inputs")
+        except Exception as e:
+            self._failed_batches += 1
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        compute_time = time.perf_counter() - dispatch_start
+        self._batches_total += 1
+        self._items_total += len(items)
+        self._recent.append((len(items), queue_wait, compute_time))
+
+        for future, output in zip(futures, outputs):
+            # Callers may have gone away (client disconnect) while the batch was running
+            if not future.done():
+                future.set_result(output)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get batch size and latency statistics"""
+        recent = list(self._recent)
+        sizes = [size for size, _, _ in recent]
+        waits_ms = [wait * 1000 for _, wait, _ in recent]
+        compute_ms = [compute * 1000 for _, _, compute in recent]
+
+        def percentile(values: List[float], pct: float) -> float:
+            if not values:
+                return 0.0
+            ordered = sorted(values)
+            return ordered[min(len(ordered) - 1, int(pct * len(ordered)))]
+
+        return {
+            "name": self.name,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "batches_total": self._batches_total,
+            "items_total": self._items_total,
+            "failed_batches": self._failed_batches,
+            "rejected": self._rejected,
+            "recent_batches": len(recent),
+            "avg_batch_size": statistics.mean(sizes) if sizes else 0.0,
+            "max_batch_size_seen": max(sizes) if sizes else 0,
+            "queue_wait_ms_p50": percentile(waits_ms, 0.50),
+            "queue_wait_ms_p95": percentile(waits_ms, 0.95),
+            "batch_latency_ms_p50": percentile(compute_ms, 0.50),
+            "batch_latency_ms_p95": percentile(compute_ms, 0.95)
+        }
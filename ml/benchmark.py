@@ -14,6 +14,7 @@ from typing import List, Dict, Any, Tuple
 from dotenv import load_dotenv
 from faiss_from_qdrant import FaissFromQdrantDatabase
 from qwen_embeddings import QwenEmbedder
+from embedding_cache import EmbeddingCache
 
 # Load environment variables
 load_dotenv()
@@ -23,13 +24,24 @@ class FishSearchBenchmark:
     """Benchmark class for testing fish search performance"""
     
     def __init__(self, collection_name: str = "fish_embeddings_20250627_102709", 
-                 faiss_index_path: str = "qdrant_faiss_index.faiss"):
-        """Initialize benchmark with database and embedder"""
+                 faiss_index_path: str = "qdrant_faiss_index.faiss",
+                 embedding_cache_path: str = None):
+        """
+        Initialize benchmark with database and embedder
+        
+        Args:
+            collection_name: Qdrant collection to search
+            faiss_index_path: Path of the FAISS index file
+            embedding_cache_path: Optional persistent embedding cache; defaults to $EMBEDDING_CACHE_PATH.
+                With a cache, repeated iterations of a query skip the model and embedding times show cache lookups.
+        """
         self.vector_db = FaissFromQdrantDatabase(
             collection_name=collection_name,
             faiss_index_path=faiss_index_path
         )
-        self.embedder = QwenEmbedder()
+        embedding_cache_path = embedding_cache_path or os.getenv("EMBEDDING_CACHE_PATH")
+        self.embedding_cache = EmbeddingCache(embedding_cache_path) if embedding_cache_path else None
+        self.embedder = QwenEmbedder(cache=self.embedding_cache)
         
         # 20 predefined test queries
         self.test_queries = [
@@ -77,6 +89,8 @@ class FishSearchBenchmark:
         print("🚀 Starting Fish Search Benchmark")
         print(f"📊 Testing {len(self.test_queries)} queries with top_k={top_k}")
         print(f"🔄 Running {iterations} iterations per query for timing accuracy")
+        if self.embedding_cache is not None:
+            print(f"💾 Using embedding cache: {self.embedding_cache.path} (embedding times include cache hits)")
         print("=" * 60)
         
         # Verify database status
@@ -0,0 +1,438 @@
+"""
+In-memory caches used by the search pipeline
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from fish_species import FishSpecies
+
+
+class PayloadCache:
+    """Bounded LRU cache of FishSpecies payloads keyed by Qdrant point ID.
+
+    Entries expire ``ttl_seconds`` after they were stored; when the cache is
+    full the least recently used entry is evicted.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 3600.0):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries: Maximum number of cached payloads (0 disables caching)
+            ttl_seconds: Lifetime of an entry in seconds (0 or less means no expiry)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self._entries: "OrderedDict[Hashable, Tuple[FishSpecies, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get_many(self, keys: Iterable[Hashable]) -> Tuple[Dict[Hashable, FishSpecies], List[Hashable]]:
+        """
+        Look up several payloads at once
+
+        Args:
+            keys: Qdrant point IDs
+
+        Returns:
+            Tuple of (found payloads by ID, IDs that are missing or expired)
+        """
+        found = {}
+        missing = []
+        now = time.monotonic()
+
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and self.ttl_seconds > 0 and now - entry[1] > self.ttl_seconds:
+                    del self._entries[key]
+                    self._expirations += 1
+                    entry = None
+
+                if entry is None:
+                    self._misses += 1
+                    missing.append(key)
+                else:
+                    self._hits += 1
+                    self._entries.move_to_end(key)
+                    found[key] = entry[0]
+
+        return found, missing
+
+    def put_many(self, items: Dict[Hashable, FishSpecies]) -> None:
+        """
+        Store several payloads, evicting least recently used entries when full
+
+        Args:
+            items: Payloads by Qdrant point ID
+        """
+        if self.max_entries <= 0:
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            for key, value in items.items():
+                self._entries[key] = (value, now)
+                self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self) -> None:
+        """Drop all cached payloads"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache size and hit/miss counters"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "eviction_policy": "lru",
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations
+            }
+
+
+class QueryResultCache:
+    """LRU cache of search results bounded by their approximate size in bytes.
+
+    Every entry belongs to an index version; as soon as a lookup or insert
+    arrives with a different version (the index was rebuilt), all entries are
+    dropped.
+    """
+
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024):
+        """
+        Initialize the cache
+
+        Args:
+            max_bytes: Maximum total size of cached results (0 disables caching)
+        """
+        self.max_bytes = max_bytes
+
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._index_version = None
+        self._current_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def _check_version(self, index_version: Any) -> None:
+        """Drop all entries if the index version changed (caller holds the lock)"""
+        if index_version != self._index_version:
+            if self._entries:
+                self._invalidations += 1
+            self._entries.clear()
+            self._current_bytes = 0
+            self._index_version = index_version
+
+    def get(self, key: Hashable, index_version: Any) -> Any:
+        """
+        Look up cached results
+
+        Args:
+            key: Cache key
+            index_version: Version of the index the caller is searching
+
+        Returns:
+            Cached value or None
+        """
+        with self._lock:
+            self._check_version(index_version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: Hashable, index_version: Any, value: Any, size_bytes: int) -> None:
+        """
+        Store results, evicting least recently used entries to stay within max_bytes
+
+        Args:
+            key: Cache key
+            index_version: Version of the index the results come from
+            value: Results to cache
+            size_bytes: Approximate size of the value
+        """
+        if size_bytes > self.max_bytes:
+            return
+
+        with self._lock:
+            self._check_version(index_version)
+            if key in self._entries:
+                self._current_bytes -= self._entries.pop(key)[1]
+
+            self._entries[key] = (value, size_bytes)
+            self._current_bytes += size_bytes
+
+            while self._current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._current_bytes -= evicted_size
+                self._evictions += 1
+
+    def invalidate(self) -> None:
+        """Drop all cached results"""
+        with self._lock:
+            self._entries.clear()
+            self._current_bytes = 0
+            self._invalidations += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache size and hit/miss counters"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._current_bytes,
+                "max_bytes": self.max_bytes,
+                "index_version": self._index_version,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations
+            }
+
+
+def image_digest(image_data: bytes) -> str:
+    """SHA-256 digest of raw uploaded image bytes"""
+    return hashlib.sha256(image_data).hexdigest()
+
+
+def perceptual_hash(image: Image.Image, hash_size: int = 8) -> int:
+    """
+    Difference hash (dHash) of an image
+
+    Visually identical images (re-encoded, resized or re-compressed uploads of
+    the same photo) get equal or nearly equal hashes.
+
+    Args:
+        image: PIL Image
+        hash_size: Hash side length; the hash has hash_size * hash_size bits
+
+    Returns:
+        int: Perceptual hash
+    """
+    small = image.convert('L').resize((hash_size + 1, hash_size), Image.BILINEAR)
+    pixels = np.asarray(small, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int(sum(1 << i for i, bit in enumerate(bits) if bit))
+
+
+class ImageEmbeddingCache:
+    """Bounded LRU cache of image embeddings keyed by raw-bytes digest and perceptual hash.
+
+    A byte-identical upload is found by digest without decoding the image.
+    Optionally, a visually identical one (e.g. re-compressed) is found by a
+    perceptual hash within ``phash_max_distance`` bits; this is off by default
+    because the 64-bit dHash also matches unrelated low-detail photos (flat
+    images all hash to 0). Each entry can also keep the final search results
+    for one index version.
+
+    Perceptual hashes are indexed by bands: the 64-bit hash is split into
+    ``phash_max_distance + 1`` bit ranges, and two hashes within that distance
+    are equal in at least one of them, so a lookup only compares the entries
+    that share a band instead of scanning the whole cache.
+    """
+
+    PHASH_BITS = 64
+
+    def __init__(self, max_entries: int = 2048, phash_max_distance: int = -1):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries: Maximum number of cached images (0 disables caching)
+            phash_max_distance: Maximum Hamming distance for a perceptual hash match (negative, the default, disables it)
+        """
+        self.max_entries = max_entries
+        self.phash_max_distance = phash_max_distance
+
+        # digest -> {"embedding", "phash", "results", "results_version"}
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._digest_hits = 0
+        self._digest_misses = 0
+        self._phash_hits = 0
+        self._result_hits = 0
+        self._evictions = 0
+
+        # (shift, mask) of each band and band value -> digests of the entries having it
+        self._phash_bands = self._make_phash_bands(phash_max_distance)
+        self._band_tables: List[Dict[int, set]] = [{} for _ in self._phash_bands]
+
+    @classmethod
+    def _make_phash_bands(cls, phash_max_distance: int) -> List[Tuple[int, int]]:
+        """Split the hash into phash_max_distance + 1 contiguous bit ranges (none if matching is off or any hash matches)"""
+        if phash_max_distance < 0 or phash_max_distance >= cls.PHASH_BITS:
+            return []
+        count = phash_max_distance + 1
+        bands = []
+        shift = 0
+        for band in range(count):
+            width = cls.PHASH_BITS // count + (1 if band < cls.PHASH_BITS % count else 0)
+            bands.append((shift, (1 << width) - 1))
+            shift += width
+        return bands
+
+    def _index_phash(self, digest: str, phash: int) -> None:
+        for (shift, mask), table in zip(self._phash_bands, self._band_tables):
+            table.setdefault((phash >> shift) & mask, set()).add(digest)
+
+    def _unindex_phash(self, digest: str, phash: int) -> None:
+        for (shift, mask), table in zip(self._phash_bands, self._band_tables):
+            value = (phash >> shift) & mask
+            digests = table.get(value)
+            if digests is not None:
+                digests.discard(digest)
+                if not digests:
+                    del table[value]
+
+    def _phash_candidates(self, phash: int) -> Iterable[str]:
+        """Digests of entries that can be within phash_max_distance of phash"""
+        if not self._phash_bands:
+            return list(self._entries)
+        candidates = set()
+        for (shift, mask), table in zip(self._phash_bands, self._band_tables):
+            candidates.update(table.get((phash >> shift) & mask, ()))
+        return candidates
+
+    def get_by_digest(self, digest: str) -> Optional[np.ndarray]:
+        """
+        Look up an embedding by raw-bytes digest
+
+        Args:
+            digest: image_digest of the upload
+
+        Returns:
+            Cached embedding or None
+        """
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                self._digest_misses += 1
+                return None
+            self._digest_hits += 1
+            self._entries.move_to_end(digest)
+            return entry["embedding"]
+
+    def get_by_phash(self, digest: str, phash: int) -> Optional[np.ndarray]:
+        """
+        Look up an embedding by perceptual hash and remember it under the new digest
+
+        Args:
+            digest: image_digest of the upload
+            phash: perceptual_hash of the decoded upload
+
+        Returns:
+            Cached embedding or None
+        """
+        if self.phash_max_distance < 0:
+            return None
+
+        with self._lock:
+            best_key, best_distance = None, None
+            for key in self._phash_candidates(phash):
+                distance = bin(self._entries[key]["phash"] ^ phash).count("1")
+                if distance <= self.phash_max_distance and (best_distance is None or distance < best_distance):
+                    best_key, best_distance = key, distance
+                    if distance == 0:
+                        break
+
+            if best_key is None:
+                return None
+
+            self._phash_hits += 1
+            embedding = self._entries[best_key]["embedding"]
+            self._entries.move_to_end(best_key)
+            self._put_locked(digest, phash, embedding)
+            return embedding
+
+    def put(self, digest: str, phash: int, embedding: Any) -> None:
+        """
+        Store the embedding of an upload
+
+        Args:
+            digest: image_digest of the upload
+            phash: perceptual_hash of the decoded upload
+            embedding: Image embedding vector
+        """
+        with self._lock:
+            self._put_locked(digest, phash, np.asarray(embedding, dtype=np.float32))
+
+    def _put_locked(self, digest: str, phash: int, embedding: np.ndarray) -> None:
+        if self.max_entries <= 0:
+            return
+        previous = self._entries.get(digest)
+        if previous is not None:
+            self._unindex_phash(digest, previous["phash"])
+        self._entries[digest] = {"embedding": embedding, "phash": phash, "results": None, "results_version": None}
+        self._entries.move_to_end(digest)
+        self._index_phash(digest, phash)
+        while len(self._entries) > self.max_entries:
+            evicted_digest, evicted = self._entries.popitem(last=False)
+            self._unindex_phash(evicted_digest, evicted["phash"])
+            self._evictions += 1
+
+    def get_results(self, digest: str, index_version: Any) -> Any:
+        """Get the search results cached for an upload, if they belong to the given index version"""
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None or entry["results"] is None or entry["results_version"] != index_version:
+                return None
+            self._result_hits += 1
+            return entry["results"]
+
+    def put_results(self, digest: str, index_version: Any, results: Any) -> None:
+        """Attach final search results for an index version to a cached upload"""
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                entry["results"] = results
+                entry["results_version"] = index_version
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache size and hit-rate counters"""
+        with self._lock:
+            # Every embedding lookup starts with the digest; a digest miss is
+            # either a perceptual hash hit or an overall miss
+            lookups = self._digest_hits + self._digest_misses
+            hits = self._digest_hits + self._phash_hits
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "phash_max_distance": self.phash_max_distance,
+                "digest_hits": self._digest_hits,
+                "digest_misses": self._digest_misses,
+                "digest_hit_rate": self._digest_hits / lookups if lookups else 0.0,
+                "phash_hits": self._phash_hits,
+                "result_hits": self._result_hits,
+                "misses": lookups - hits,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "evictions": self._evictions
+            }
@@ -12,6 +12,16 @@ import platform
 from sentence_transformers import SentenceTransformer
 from tqdm import tqdm
 import time
+from embedding_dataset import write_embedding_dataset
+
+# Text cleaning patterns, compiled once
+NAN_PATTERN = re.compile(r'(nan)')
+DISALLOWED_CHARS_PATTERN = re.compile(r'[^\w\s.,;:\/!?()-]')
+REFERENCE_PATTERN = re.compile(r" (\(Ref. [0-9, ]*\))")
+
+# Stop words are a lexical attribute, so cleaning only needs the tokenizer of the spaCy model
+SPACY_MODEL = "en_core_web_sm"
+SPACY_UNUSED_COMPONENTS = ["tok2vec", "tagger", "parser", "senter", "attribute_ruler", "lemmatizer", "ner"]
 
 class FishBaseAPI:
     def __init__(self):
@@ -48,8 +58,13 @@ class FishBaseAPI:
             return None
 
 class DataProcessor:
-    def __init__(self, skip_embedder: bool = False):
+    def __init__(self, skip_embedder: bool = False, text_processes: int = None, text_batch_size: int = 1000):
         self.fishbase_api = FishBaseAPI()
+        # spaCy is loaded once, on first use; texts are cleaned in batches by text_processes workers
+        self.nlp = None
+        self.text_processes = text_processes or max(1, min(4, os.cpu_count() or 1))
+        self.text_batch_size = text_batch_size
+        self.stage_times = {}
         # self.translator = pipeline(
         #     'translation_en_to_ru',
         #     model = "Helsinki-NLP/opus-mt-en-ru"
@@ -227,8 +242,12 @@ class DataProcessor:
         
         return data
 
-    def process_raw_data(self, translation: bool = False, addition_to_db: bool = False, download_images: bool = False, max_images: int = None):
+    def process_raw_data(self, translation: bool = False, addition_to_db: bool = False, download_images: bool = False, max_images: int = None,
+                         export_csv: bool = False):
+        self.stage_times = {}
+        stage_start = time.perf_counter()
         raw_data = self.fishbase_api.get_raw_data()
+        stage_start = self._end_stage("download", stage_start)
         print("Loading raw data...")
         # raw_data = pd.read_csv('./datasets/preprocessed_fishbase.csv')
         print(f"Loaded {len(raw_data)} records from raw data")
@@ -263,11 +282,11 @@ class DataProcessor:
             axis=1
         )
         
+        stage_start = self._end_stage("descriptions", stage_start)
+        
         print("3. Cleaning text descriptions...")
-        tqdm.pandas(desc="Cleaning text")
-        data['cleaned_discription'] = data['FullDescription_en'].progress_apply(
-            lambda row: self.clean_text(row)
-        )
+        data['cleaned_discription'] = self.clean_texts(data['FullDescription_en'].tolist())
+        stage_start = self._end_stage("cleaning", stage_start)
 
         if self.embedder is not None:
             print("4. Generating embeddings...")
@@ -284,10 +303,12 @@ class DataProcessor:
         else:
             print("4. Skipping embeddings generation...")
             full_data = data.copy()
+        stage_start = self._end_stage("embeddings", stage_start)
 
         # Download images if requested
         if download_images:
             full_data = self.download_fish_images(full_data, max_images=max_images)
+            stage_start = self._end_stage("images", stage_start)
 
         if translation:
             self.add_translation(data)
@@ -295,29 +316,78 @@ class DataProcessor:
         full_data.to_csv(self.fishbase_api.datasets_dir / "preprocessed_fishbase.csv")
         print(f"Preprocessed dataset saved to: {self.fishbase_api.datasets_dir / 'preprocessed_fishbase.csv'}")
         
-        if addition_to_db:
-            data_db = data['Species', 'FullDescription_en'].combine_first(embeddings_en_df)
-            data_db.to_csv(self.fishbase_api.datasets_dir / "fishbase_embeddings.csv", index=False)
-            print(f"Dataset for database saved to: {self.fishbase_api.datasets_dir / 'fishbase_embeddings.csv'}")
+        if addition_to_db and self.embedder is None:
+            print("No embeddings were generated, skipping the dataset for database")
+        elif addition_to_db:
+            # float32 vectors + Parquet metadata (see embedding_dataset.py); the 1026-column CSV only on request
+            dataset_path = self.fishbase_api.datasets_dir / "fishbase_embeddings"
+            dataset = write_embedding_dataset(str(dataset_path), embeddings_en, data[['Species', 'FullDescription_en']])
+            print(f"Dataset for database saved to: {dataset_path}")
+            if export_csv:
+                dataset.to_csv(str(self.fishbase_api.datasets_dir / "fishbase_embeddings.csv"))
 
             #TODO вызвать метод записи в бд из vector_database.py
             
             
+        self._end_stage("save", stage_start)
+        self.print_stage_times()
         return full_data
 
     def add_translation(self, data:pd.DataFrame):
         ...
 
+    def _end_stage(self, stage: str, stage_start: float) -> float:
+        """Record the duration of a processing stage and return the start time of the next one"""
+        now = time.perf_counter()
+        self.stage_times[stage] = now - stage_start
+        return now
+
+    def print_stage_times(self):
+        """Print the duration of each stage of the last process_raw_data run"""
+        total = sum(self.stage_times.values())
+        print("Processing time per stage:")
+        for stage, seconds in self.stage_times.items():
+            print(f"  {stage:<13} {seconds:8.2f}s ({seconds / total * 100 if total > 0 else 0:5.1f}%)")
+        print(f"  {'total':<13} {total:8.2f}s")
+
+    def get_nlp(self):
+        """Load the spaCy model once, without the pipeline components text cleaning does not use"""
+        if self.nlp is None:
+            self.nlp = spacy.load(SPACY_MODEL, exclude=SPACY_UNUSED_COMPONENTS)
+        return self.nlp
+
+    @staticmethod
+    def _strip_text(text) -> str:
+        """Remove 'nan' placeholders, unsupported characters and FishBase references"""
+        if not isinstance(text, str):
+            return ''
+        text = NAN_PATTERN.sub('', text)
+        text = DISALLOWED_CHARS_PATTERN.sub('', text)
+        return REFERENCE_PATTERN.sub('', text)
+
+    def clean_texts(self, texts: list) -> list:
+        """
+        Clean many texts, streaming them through spaCy in batches
+
+        Args:
+            texts: Texts to clean (non-strings become '')
+
+        Returns:
+            List of cleaned texts without stop words, in input order
+        """
+        nlp = self.get_nlp()
+        stripped = [self._strip_text(text) for text in texts]
+        docs = nlp.pipe(stripped, batch_size=self.text_batch_size, n_process=self.text_processes)
+        return [
+            ' '.join([token.text for token in doc if not token.is_stop])
+            for doc in tqdm(docs, total=len(stripped), desc="Cleaning text")
+        ]
+
     def clean_text(self, text:str):
-        if text is None or text is np.nan:
+        text = self._strip_text(text)
+        if not text:
             return ''
-        nlp = spacy.load("en_core_web_sm")
-        
-        text = re.sub(r'(nan)', '', text)
-        text = re.sub(r'[^\w\s.,;:\/!?()-]', '', text)
-        text = re.sub(r" (\(Ref. [0-9, ]*\))", '', text)
-            
-        doc = nlp(text)
+        doc = self.get_nlp()(text)
         filtered_text = ' '.join([token.text for token in doc if not token.is_stop])
                 
         return filtered_text
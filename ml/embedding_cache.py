@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Persistent content-addressed cache of text embeddings.
+
+Embeddings are stored in SQLite keyed by sha256(model name + text), so the
+same text is never encoded twice by the same model, across restarts and
+across processes (API server, benchmark and batch scripts).
+
+Usage:
+    # Pre-populate the cache from a query log (one query per line, or JSON lines with a "description" field)
+    python embedding_cache.py warmup queries.log --cache embedding_cache.sqlite
+
+    # Show cache statistics
+    python embedding_cache.py stats --cache embedding_cache.sqlite
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+class EmbeddingCache:
+    """SQLite-backed cache of float32 embedding vectors with size-bounded LRU eviction"""
+
+    def __init__(self, path: str = "embedding_cache.sqlite", max_bytes: int = 256 * 1024 * 1024):
+        """
+        Initialize the cache
+
+        Args:
+            path: SQLite database file
+            max_bytes: Maximum total size of stored vectors; least recently used entries are evicted beyond it
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                dim INTEGER NOT NULL,
+                vector BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings(last_access)")
+        self._conn.commit()
+
+        # Running total of stored bytes, kept up to date by triggers so that writes never sum the table
+        # and every process sharing the file sees the same value. It is initialized once from the
+        # existing rows, in the same transaction that creates the triggers.
+        self._conn.execute("BEGIN IMMEDIATE")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS cache_size (id INTEGER PRIMARY KEY CHECK (id = 0), bytes INTEGER NOT NULL)")
+        self._conn.execute("INSERT OR IGNORE INTO cache_size (id, bytes) SELECT 0, COALESCE(SUM(size), 0) FROM embeddings")
+        self._conn.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS embeddings_size_insert AFTER INSERT ON embeddings
+            BEGIN UPDATE cache_size SET bytes = bytes + NEW.size WHERE id = 0; END
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS embeddings_size_update AFTER UPDATE OF size ON embeddings
+            BEGIN UPDATE cache_size SET bytes = bytes + NEW.size - OLD.size WHERE id = 0; END
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS embeddings_size_delete AFTER DELETE ON embeddings
+            BEGIN UPDATE cache_size SET bytes = bytes - OLD.size WHERE id = 0; END
+            """
+        )
+        self._conn.commit()
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @staticmethod
+    def make_key(model_name: str, text: str) -> str:
+        """Content address of a (model, text) pair"""
+        return hashlib.sha256(f"{model_name}\0{text}".encode('utf-8')).hexdigest()
+
+    def get_many(self, model_name: str, texts: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Look up embeddings for several texts
+
+        Args:
+            model_name: Name of the embedding model
+            texts: Texts to look up
+
+        Returns:
+            Dict mapping each cached text to its float32 vector
+        """
+        if not texts:
+            return {}
+
+        keys = {self.make_key(model_name, text): text for text in texts}
+        found = {}
+
+        with self._lock:
+            key_list = list(keys)
+            # Stay well below SQLite's bound-parameter limit
+            for i in range(0, len(key_list), 500):
+                chunk = key_list[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                for key, blob in rows:
+                    found[keys[key]] = np.frombuffer(blob, dtype=np.float32)
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                    [(now, self.make_key(model_name, text)) for text in found]
+                )
+                self._conn.commit()
+
+            self._hits += len(found)
+            self._misses += len(keys) - len(found)
+
+        return found
+
+    def get(self, model_name: str, text: str) -> Optional[np.ndarray]:
+        """Look up the embedding of a single text"""
+        return self.get_many(model_name, [text]).get(text)
+
+    def put_many(self, model_name: str, embeddings: Dict[str, Any]) -> None:
+        """
+        Store embeddings and evict least recently used entries beyond max_bytes
+
+        Args:
+            model_name: Name of the embedding model
+            embeddings: Dict mapping text to embedding vector
+        """
+        if not embeddings:
+            return
+
+        now = time.time()
+        rows = []
+        for text, vector in embeddings.items():
+            array = np.asarray(vector, dtype=np.float32)
+            blob = array.tobytes()
+            rows.append((self.make_key(model_name, text), model_name, int(array.shape[-1]), blob, len(blob), now))
+
+        with self._lock:
+            # An upsert rather than INSERT OR REPLACE: REPLACE deletes the old row without firing the delete trigger
+            self._conn.executemany(
+                """
+                INSERT INTO embeddings (key, model, dim, vector, size, last_access) VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET model = excluded.model, dim = excluded.dim, vector = excluded.vector,
+                    size = excluded.size, last_access = excluded.last_access
+                """,
+                rows
+            )
+            self._evict_locked()
+            self._conn.commit()
+
+    def put(self, model_name: str, text: str, vector: Any) -> None:
+        """Store the embedding of a single text"""
+        self.put_many(model_name, {text: vector})
+
+    def _evict_locked(self) -> None:
+        """Delete least recently used entries until the cache fits max_bytes (caller holds the lock)"""
+        total = self._total_bytes_locked()
+        if total <= self.max_bytes:
+            return
+
+        # Free a little more than needed so eviction does not run on every insert
+        to_free = total - int(self.max_bytes * 0.9)
+        freed = 0
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM embeddings ORDER BY last_access ASC"):
+            victims.append((key,))
+            freed += size
+            if freed >= to_free:
+                break
+
+        self._conn.executemany("DELETE FROM embeddings WHERE key = ?", victims)
+        self._evictions += len(victims)
+
+    def _total_bytes_locked(self) -> int:
+        """Total size of stored vectors from the trigger-maintained counter (caller holds the lock)"""
+        return self._conn.execute("SELECT bytes FROM cache_size WHERE id = 0").fetchone()[0]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache size and hit/miss counters"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            total = self._total_bytes_locked()
+            lookups = self._hits + self._misses
+            return {
+                "path": self.path,
+                "entries": entries,
+                "bytes": total,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions
+            }
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+
+def embedding_cache_from_env() -> Optional[EmbeddingCache]:
+    """
+    Create an EmbeddingCache from EMBEDDING_CACHE_PATH / EMBEDDING_CACHE_MAX_MB
+
+    Returns:
+        EmbeddingCache, or None if EMBEDDING_CACHE_PATH is not set
+    """
+    path = os.getenv("EMBEDDING_CACHE_PATH")
+    if not path:
+        return None
+    max_mb = float(os.getenv("EMBEDDING_CACHE_MAX_MB", 256))
+    return EmbeddingCache(path, max_bytes=int(max_mb * 1024 * 1024))
+
+
+def read_query_log(log_path: str) -> List[str]:
+    """Read unique queries from a plain-text or JSON-lines query log, keeping first-seen order"""
+    queries = []
+    with open(log_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith('{'):
+                try:
+                    record = json.loads(line)
+                    line = str(record.get("description") or record.get("query") or "").strip()
+                except json.JSONDecodeError:
+                    pass
+            if line:
+                queries.append(line)
+    return list(dict.fromkeys(queries))
+
+
+def warmup(log_path: str, cache: EmbeddingCache, batch_size: int = 32) -> Dict[str, Any]:
+    """
+    Pre-populate the cache with embeddings of all queries in a log
+
+    Args:
+        log_path: Query log file
+        cache: Cache to fill
+        batch_size: Number of queries encoded per model call
+
+    Returns:
+        Dict with warm-up statistics
+    """
+    from qwen_embeddings import QwenEmbedder
+
+    queries = read_query_log(log_path)
+    print(f"📋 {len(queries)} unique queries in {log_path}")
+
+    embedder = QwenEmbedder(cache=cache)
+    already_cached = len(cache.get_many(embedder.model_name, queries))
+    print(f"💾 {already_cached} already cached, encoding {len(queries) - already_cached}")
+
+    start = time.time()
+    for i in range(0, len(queries), batch_size):
+        # encode_texts only runs the model for texts missing from the cache and stores the new vectors
+        embedder.encode_texts(queries[i:i + batch_size], batch_size=batch_size)
+    elapsed = time.time() - start
+
+    return {
+        "queries": len(queries),
+        "already_cached": already_cached,
+        "encoded": len(queries) - already_cached,
+        "time_seconds": elapsed
+    }
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Persistent text embedding cache')
+    parser.add_argument('command', choices=['warmup', 'stats'], help='Action to perform')
+    parser.add_argument('query_log', nargs='?', help='Query log file (required for warmup)')
+    parser.add_argument('--cache', type=str, default=os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache.sqlite"),
+                        help='SQLite cache file (default: $EMBEDDING_CACHE_PATH or embedding_cache.sqlite)')
+    parser.add_argument('--max-mb', type=float, default=float(os.getenv("EMBEDDING_CACHE_MAX_MB", 256)),
+                        help='Maximum cache size in megabytes (default: 256)')
+    parser.add_argument('--batch-size', type=int, default=32,
+                        help='Number of queries encoded per batch during warmup (default: 32)')
+
+    args = parser.parse_args()
+
+    cache = EmbeddingCache(args.cache, max_bytes=int(args.max_mb * 1024 * 1024))
+
+    if args.command == 'warmup':
+        if not args.query_log:
+            parser.error("warmup requires a query log file")
+        result = warmup(args.query_log, cache, batch_size=args.batch_size)
+        print(f"✅ Encoded {result['encoded']} queries in {result['time_seconds']:.2f} seconds")
+
+    print(json.dumps(cache.get_stats(), indent=2))
+    cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Binary embedding dataset: a float32 vector block plus Parquet metadata
+
+Replaces the 1026-column CSV (0, 1, ..., 1023, FullDescription_en, Species),
+which stores every vector component as decimal text. A dataset is a directory:
+
+    vectors.npy       (n, d) float32 vectors, memory-mapped when read
+    metadata.parquet  Species, FullDescription_en (and any other columns), one row per vector
+
+Readers memory-map both files, so opening a dataset copies nothing and only
+the rows that are used are paged in. CSV is kept as an export format only.
+
+Usage:
+    # Show the size and columns of a dataset
+    python embedding_dataset.py info datasets/fishbase_embeddings
+
+    # Export to the 1026-column CSV
+    python embedding_dataset.py export-csv datasets/fishbase_embeddings datasets/fishbase_embeddings.csv
+
+    # Convert an existing CSV
+    python embedding_dataset.py from-csv datasets/fishbase_embeddings.csv datasets/fishbase_embeddings
+"""
+
+import os
+import shutil
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+VECTORS_FILE = "vectors.npy"
+METADATA_FILE = "metadata.parquet"
+
+
+def is_embedding_dataset(path: str) -> bool:
+    """Check whether a path is a binary embedding dataset directory"""
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, VECTORS_FILE))
+
+
+class EmbeddingDatasetWriter:
+    """Streams vectors and metadata into a new dataset, replacing the old one on finalize"""
+
+    def __init__(self, path: str, dimension: int):
+        """
+        Initialize the writer
+
+        Args:
+            path: Dataset directory
+            dimension: Vector dimension
+        """
+        self.path = path
+        self.dimension = dimension
+        self.tmp_path = path + ".tmp"
+        self.count = 0
+
+        if os.path.exists(self.tmp_path):
+            shutil.rmtree(self.tmp_path)
+        os.makedirs(self.tmp_path)
+
+        # Vectors are written raw and given their .npy header on finalize, once the row count is known
+        self._raw_path = os.path.join(self.tmp_path, "vectors.f32")
+        self._vectors = open(self._raw_path, 'wb')
+        self._metadata: Optional[pq.ParquetWriter] = None
+
+    def append(self, vectors: np.ndarray, metadata: pd.DataFrame) -> None:
+        """
+        Append rows
+
+        Args:
+            vectors: (n, dimension) vectors
+            metadata: n rows of metadata (the same columns for every call)
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[1] != self.dimension or len(vectors) != len(metadata):
+            raise ValueError(f"Expected ({len(metadata)}, {self.dimension}) vectors, got {vectors.shape}")
+
+        table = pa.Table.from_pandas(metadata.reset_index(drop=True), preserve_index=False)
+        if self._metadata is None:
+            self._metadata = pq.ParquetWriter(os.path.join(self.tmp_path, METADATA_FILE), table.schema)
+        self._metadata.write_table(table)
+        self._vectors.write(vectors.tobytes())
+        self.count += len(vectors)
+
+    def finalize(self) -> "EmbeddingDataset":
+        """
+        Write the .npy header and atomically replace the previous dataset
+
+        Returns:
+            The written EmbeddingDataset
+        """
+        self._vectors.close()
+        if self._metadata is None:
+            raise ValueError("Cannot write an empty embedding dataset")
+        self._metadata.close()
+
+        header = {"descr": np.lib.format.dtype_to_descr(np.dtype(np.float32)), "fortran_order": False,
+                  "shape": (self.count, self.dimension)}
+        with open(os.path.join(self.tmp_path, VECTORS_FILE), 'wb') as out, open(self._raw_path, 'rb') as raw:
+            np.lib.format.write_array_header_1_0(out, header)
+            shutil.copyfileobj(raw, out, 16 * 1024 * 1024)
+        os.remove(self._raw_path)
+
+        if os.path.exists(self.path):
+            shutil.rmtree(self.path)
+        os.rename(self.tmp_path, self.path)
+        return EmbeddingDataset(self.path)
+
+    def abort(self) -> None:
+        """Discard the partially written dataset"""
+        self._vectors.close()
+        if self._metadata is not None:
+            self._metadata.close()
+        shutil.rmtree(self.tmp_path, ignore_errors=True)
+
+
+def write_embedding_dataset(path: str, vectors: np.ndarray, metadata: pd.DataFrame) -> "EmbeddingDataset":
+    """
+    Write vectors and their metadata as a binary dataset
+
+    Args:
+        path: Dataset directory (replaced atomically if it exists)
+        vectors: (n, d) vectors
+        metadata: n rows of metadata, e.g. Species and FullDescription_en
+
+    Returns:
+        The written EmbeddingDataset
+    """
+    vectors = np.asarray(vectors)
+    writer = EmbeddingDatasetWriter(path, vectors.shape[1])
+    try:
+        writer.append(vectors, metadata)
+    except Exception:
+        writer.abort()
+        raise
+    return writer.finalize()
+
+
+class EmbeddingDataset:
+    """Memory-mapped, read-only binary embedding dataset"""
+
+    def __init__(self, path: str):
+        """
+        Open a dataset
+
+        Args:
+            path: Dataset directory
+        """
+        self.path = path
+        self.vectors_path = os.path.join(path, VECTORS_FILE)
+        self.metadata_path = os.path.join(path, METADATA_FILE)
+
+        self.vectors = np.load(self.vectors_path, mmap_mode='r')
+        self.table = pq.read_table(self.metadata_path, memory_map=True)
+        if self.vectors.ndim != 2 or self.vectors.dtype != np.float32:
+            raise ValueError(f"{self.vectors_path} holds {self.vectors.dtype} {self.vectors.shape}, expected (n, d) float32")
+        if len(self.vectors) != self.table.num_rows:
+            raise ValueError(f"{len(self.vectors)} vectors but {self.table.num_rows} metadata rows in {path}")
+        self._metadata: Optional[pd.DataFrame] = None
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    @property
+    def dimension(self) -> int:
+        return self.vectors.shape[1]
+
+    @property
+    def metadata(self) -> pd.DataFrame:
+        """Metadata as a DataFrame (converted from Arrow on first access)"""
+        if self._metadata is None:
+            self._metadata = self.table.to_pandas()
+        return self._metadata
+
+    def chunks(self, chunk_size: int = 1000, skip_rows: int = 0) -> Iterator[Tuple[np.ndarray, List[str], List[str], int]]:
+        """
+        Iterate over the rows in chunks, like load_fish_embeddings.read_embedding_csv
+
+        Rows with non-finite vector values or an empty Species / FullDescription_en
+        are skipped with a warning.
+
+        Args:
+            chunk_size: Rows per chunk
+            skip_rows: Number of rows to skip
+
+        Yields:
+            Tuple of (vectors (n, d) float32, fish names, full descriptions, rows read so far) per chunk
+        """
+        for start in range(skip_rows, len(self), chunk_size):
+            end = min(start + chunk_size, len(self))
+            vectors = np.asarray(self.vectors[start:end])
+            fish_names = [(name or '').strip() for name in self.table.column('Species').slice(start, end - start).to_pylist()]
+            descriptions = [(text or '').strip() for text in
+                            self.table.column('FullDescription_en').slice(start, end - start).to_pylist()]
+
+            valid = np.isfinite(vectors).all(axis=1) & np.array([bool(name and text) for name, text in zip(fish_names, descriptions)])
+            if not valid.all():
+                print(f"Warning: Skipping {int((~valid).sum())} rows with missing embedding values, fish_name or full_description")
+
+            yield (np.ascontiguousarray(vectors[valid]),
+                   [name for name, keep in zip(fish_names, valid) if keep],
+                   [text for text, keep in zip(descriptions, valid) if keep],
+                   end)
+
+    def to_csv(self, csv_path: str, chunk_size: int = 10000) -> None:
+        """
+        Export as the 1026-column CSV (0, 1, ..., d-1, FullDescription_en, Species)
+
+        Args:
+            csv_path: Output CSV file
+            chunk_size: Rows written at a time
+        """
+        columns = [str(i) for i in range(self.dimension)] + ['FullDescription_en', 'Species']
+        for start in range(0, len(self), chunk_size):
+            end = min(start + chunk_size, len(self))
+            chunk = pd.DataFrame(np.asarray(self.vectors[start:end]), columns=columns[:self.dimension])
+            chunk['FullDescription_en'] = self.table.column('FullDescription_en').slice(start, end - start).to_pylist()
+            chunk['Species'] = self.table.column('Species').slice(start, end - start).to_pylist()
+            chunk.to_csv(csv_path, mode='w' if start == 0 else 'a', header=start == 0, index=False)
+        print(f"Exported {len(self)} rows to {csv_path}")
+
+
+def convert_csv(csv_path: str, path: str, chunk_size: int = 10000) -> EmbeddingDataset:
+    """
+    Convert a 1026-column embedding CSV into a binary dataset, streaming in chunks
+
+    Args:
+        csv_path: Input CSV file
+        path: Output dataset directory
+        chunk_size: Rows converted at a time
+
+    Returns:
+        The written EmbeddingDataset
+    """
+    from load_fish_embeddings import read_embedding_csv
+
+    writer = None
+    try:
+        for vectors, fish_names, descriptions, _ in read_embedding_csv(csv_path, chunk_size=chunk_size):
+            if writer is None:
+                writer = EmbeddingDatasetWriter(path, vectors.shape[1])
+            writer.append(vectors, pd.DataFrame({'Species': fish_names, 'FullDescription_en': descriptions}))
+    except Exception:
+        if writer is not None:
+            writer.abort()
+        raise
+    if writer is None:
+        raise ValueError(f"No rows to convert in {csv_path}")
+
+    dataset = writer.finalize()
+    print(f"Converted {len(dataset)} rows from {csv_path} to {path}")
+    return dataset
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Inspect, export and convert binary embedding datasets')
+    parser.add_argument('command', choices=['info', 'export-csv', 'from-csv'], help='Action to perform')
+    parser.add_argument('source', help='Dataset directory (info, export-csv) or CSV file (from-csv)')
+    parser.add_argument('target', nargs='?', help='Output CSV file (export-csv) or dataset directory (from-csv)')
+    parser.add_argument('--chunk-size', type=int, default=10000, help='Rows processed at a time (default: 10000)')
+
+    args = parser.parse_args()
+
+    if args.command == 'info':
+        dataset = EmbeddingDataset(args.source)
+        print(f"Dataset: {dataset.path}")
+        print(f"Rows: {len(dataset)}, dimension: {dataset.dimension}")
+        print(f"Metadata columns: {', '.join(dataset.table.column_names)}")
+        print(f"Size: {(os.path.getsize(dataset.vectors_path) + os.path.getsize(dataset.metadata_path)) / 1024 / 1024:.1f} MB")
+    elif not args.target:
+        parser.error(f"{args.command} requires a target")
+    elif args.command == 'export-csv':
+        EmbeddingDataset(args.source).to_csv(args.target, chunk_size=args.chunk_size)
+    else:
+        convert_csv(args.source, args.target, chunk_size=args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
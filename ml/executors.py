@@ -0,0 +1,152 @@
+"""
+Bounded thread pools for running blocking search and model work from async API handlers
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+
+class ExecutorSaturatedError(RuntimeError):
+    """Raised when a bounded executor already holds as many tasks as it is allowed to queue"""
+
+
+class BoundedExecutor:
+    """Thread pool with a hard limit on running + queued tasks.
+
+    Work submitted from the event loop runs on a dedicated pool, so a slow model
+    call never blocks other requests. Once ``max_workers + queue_depth`` tasks
+    are in flight, new submissions are rejected immediately instead of growing
+    an unbounded backlog. Work that was already admitted elsewhere (a batch of
+    requests accepted by a MicroBatcher) is submitted with ``run_admitted`` and
+    skips that check, so it cannot be rejected halfway through a request.
+    """
+
+    def __init__(self, name: str, max_workers: int, queue_depth: int):
+        """
+        Initialize the executor
+
+        Args:
+            name: Name used for worker threads and in statistics
+            max_workers: Number of worker threads
+            queue_depth: Number of tasks allowed to wait for a free worker
+        """
+        if max_workers < 1:
+            raise ValueError(f"{name}: max_workers must be at least 1")
+        if queue_depth < 0:
+            raise ValueError(f"{name}: queue_depth must not be negative")
+
+        self.name = name
+        self.max_workers = max_workers
+        self.queue_depth = queue_depth
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._slots = threading.BoundedSemaphore(max_workers + queue_depth)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._submitted = 0
+        self._completed = 0
+        self._rejected = 0
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run a blocking callable on the pool and await its result
+
+        Args:
+            func: Blocking callable to execute
+            *args, **kwargs: Arguments passed to the callable
+
+        Returns:
+            Whatever the callable returns
+
+        Raises:
+            ExecutorSaturatedError: If the pool and its queue are full
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise ExecutorSaturatedError(
+                f"{self.name} executor is saturated ({self.max_workers} workers, {self.queue_depth} queued)"
+            )
+        return await self._submit(self._release, func, *args, **kwargs)
+
+    async def run_admitted(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run a blocking callable for work that has already passed admission control
+
+        The task does not take a queue slot and is never rejected; it waits for a
+        free worker like any other task. Callers must bound this work themselves
+        (a MicroBatcher dispatches one batch at a time).
+
+        Args:
+            func: Blocking callable to execute
+            *args, **kwargs: Arguments passed to the callable
+
+        Returns:
+            Whatever the callable returns
+        """
+        return await self._submit(self._finish, func, *args, **kwargs)
+
+    async def _submit(self, on_done: Callable[[Any], None], func: Callable[..., Any], *args, **kwargs) -> Any:
+        with self._lock:
+            self._in_flight += 1
+            self._submitted += 1
+
+        try:
+            future = self._executor.submit(func, *args, **kwargs)
+        except Exception:
+            on_done(None)
+            raise
+
+        # Release the slot when the task actually finishes, not when the awaiting
+        # request goes away, so cancelled requests still count until their thread is free
+        future.add_done_callback(on_done)
+        return await asyncio.wrap_future(future)
+
+    def _finish(self, _future) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self._completed += 1
+
+    def _release(self, future) -> None:
+        self._finish(future)
+        self._slots.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get executor statistics"""
+        with self._lock:
+            return {
+                "name": self.name,
+                "max_workers": self.max_workers,
+                "queue_depth": self.queue_depth,
+                "in_flight": self._in_flight,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "rejected": self._rejected
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting work and shut down the worker threads"""
+        self._executor.shutdown(wait=wait)
+
+
+def executor_from_env(name: str, env_prefix: str, default_workers: int, default_queue_depth: int) -> BoundedExecutor:
+    """
+    Create a BoundedExecutor sized from environment variables
+
+    Reads ``<env_prefix>_POOL_SIZE`` and ``<env_prefix>_QUEUE_DEPTH``.
+
+    Args:
+        name: Executor name
+        env_prefix: Prefix of the environment variables
+        default_workers: Pool size when the variable is not set
+        default_queue_depth: Queue depth when the variable is not set
+
+    Returns:
+        Configured BoundedExecutor
+    """
+    max_workers = int(os.getenv(f"{env_prefix}_POOL_SIZE", default_workers))
+    queue_depth = int(os.getenv(f"{env_prefix}_QUEUE_DEPTH", default_queue_depth))
+    return BoundedExecutor(name, max_workers=max_workers, queue_depth=queue_depth)
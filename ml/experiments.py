@@ -1,17 +1,22 @@
+import os
 import time
 import statistics
 import pandas as pd
 import faiss
 import numpy as np
 from sentence_transformers import SentenceTransformer
+from embedding_dataset import EmbeddingDataset, convert_csv
 
 ###XXX THE FOLLOWING CAN BE RAN ONLY WITH DOWNLOADED DATASET ON YOUR LOCAL MACHINE 
 
-df = pd.read_csv('../datasets/db_fishbase.csv', usecols=lambda column: column != 'FullDescription_en' and column != 'Species')
+# Binary dataset (memory-mapped float32 vectors + Parquet metadata), converted once from the CSV if needed
+if not os.path.isdir('../datasets/db_fishbase'):
+    convert_csv('../datasets/db_fishbase.csv', '../datasets/db_fishbase')
+dataset = EmbeddingDataset('../datasets/db_fishbase')
 
-target = pd.read_csv('../datasets/db_fishbase.csv', usecols=lambda column: column == 'FullDescription_en' or column == 'Species')
+target = dataset.metadata
 
-embeddings = df.values.astype('float32')
+embeddings = dataset.vectors
 
 d = embeddings.shape[1]
 top_k = 5
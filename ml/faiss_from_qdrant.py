@@ -1,43 +1,256 @@
 from typing import List, Dict, Any, Optional, Tuple
 from qdrant_client import QdrantClient
-from qdrant_client.models import VectorParams, Distance, PointStruct, Filter, FieldCondition, MatchValue
+from qdrant_client.models import VectorParams, Distance, PointStruct, Filter, FieldCondition, MatchValue, Range
 import faiss
 import numpy as np
-import pickle
 import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
 from fish_species import FishSpecies
+from payload_store import PayloadStore, PayloadStoreWriter, VectorFile, VectorFileWriter, IdMap, unique_tmp_path
+from caching import PayloadCache
+from snapshot import Snapshot
+from index_manifest import (point_hashes, content_hash, save_hashes, load_hashes, save_manifest, load_manifest,
+                            manifest_differences)
+from index_tuning import (scale_factory_string, create_index, set_ef_construction, autotune, apply_search_params,
+                          search_parameters_excluding, excluding_positions, measure, recall_at_k, save_params,
+                          load_params)
+
+try:
+    import fcntl
+except ImportError:  # Windows: no locking between worker processes
+    fcntl = None
+
+
+def _resident_memory_bytes() -> Optional[int]:
+    """Resident set size of this process (Linux only, None elsewhere)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class _Prefetcher:
+    """
+    Iterate over an iterator in a background thread, keeping up to depth items ready
+
+    Used to fetch and decode the next Qdrant scroll pages while the current one
+    is being added to the index. Exceptions of the producer are re-raised in
+    the consumer; wait_seconds is the time the consumer spent waiting for items.
+    """
+
+    _DONE = object()
+
+    def __init__(self, iterator, depth: int):
+        self.wait_seconds = 0.0
+        self._items = queue.Queue(maxsize=max(1, depth))
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._produce, args=(iterator,), name="qdrant-scroll-prefetch", daemon=True)
+        self._thread.start()
+
+    def _put(self, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                self._items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce(self, iterator):
+        try:
+            for item in iterator:
+                if not self._put(item):
+                    return
+            self._put(self._DONE)
+        except Exception as e:
+            self._put(e)
+
+    def __iter__(self):
+        try:
+            while True:
+                wait_start = time.perf_counter()
+                item = self._items.get()
+                self.wait_seconds += time.perf_counter() - wait_start
+                if item is self._DONE:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            self._stop.set()
+
+
+class IndexState:
+    """
+    A FAISS index together with the files keyed by its positions
+
+    A state is never modified while it is served: rebuilds, additions and
+    syncs prepare a new state and replace the current one with a single
+    assignment. Searches read the current state once and use it throughout,
+    so they always see a consistent index, id mapping, payload store and
+    re-ranking vectors.
+    """
+
+    def __init__(self, faiss_index: Optional[faiss.Index], id_map: IdMap, payload_store: PayloadStore,
+                 raw_vectors: VectorFile, point_hashes: Optional[np.ndarray] = None, index_mmapped: bool = False):
+        self.faiss_index = faiss_index
+        self.id_map = id_map
+        self.payload_store = payload_store
+        self.raw_vectors = raw_vectors
+        self.point_hashes = point_hashes if point_hashes is not None else np.empty(0, dtype=np.uint64)
+        self.index_mmapped = index_mmapped
+        self._deletion_selector = None
+        self._search_params_excluding = None
+
+    def refresh_deletion_filter(self):
+        """Rebuild the search parameters that exclude tombstoned positions (None when there are none)"""
+        tombstones = self.id_map.tombstones
+        if self.faiss_index is None or not len(tombstones):
+            self._deletion_selector = None
+            self._search_params_excluding = None
+            return
+        # The selectors must stay referenced for as long as the search parameters are used
+        self._deletion_selector = (faiss.IDSelectorBatch(tombstones),)
+        self._deletion_selector += (faiss.IDSelectorNot(self._deletion_selector[0]),)
+        self._search_params_excluding = search_parameters_excluding(self.faiss_index, self._deletion_selector[1])
+
+    def index_search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Search the FAISS index, skipping tombstoned positions"""
+        if self._search_params_excluding is None:
+            return self.faiss_index.search(queries, k)
+        return self.faiss_index.search(queries, k, params=self._search_params_excluding)
+
+
+class _StateAttribute:
+    """Attribute of FaissFromQdrantDatabase that reads and writes the same attribute of its current IndexState"""
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, objtype=None):
+        return self if obj is None else getattr(obj._state, self.name)
+
+    def __set__(self, obj, value):
+        setattr(obj._state, self.name, value)
 
 
 class FaissFromQdrantDatabase:
     """Vector database that uses Qdrant as primary storage and builds FAISS index from Qdrant data"""
     
-    def __init__(self, collection_name: str = "fish_embeddings", faiss_index_path: str = "qdrant_faiss_index.faiss", embedding_dimension: int = 1024):
+    faiss_index = _StateAttribute()
+    index_mmapped = _StateAttribute()
+    id_map = _StateAttribute()
+    payload_store = _StateAttribute()
+    raw_vectors = _StateAttribute()
+    point_hashes = _StateAttribute()
+    
+    def __init__(self, collection_name: str = "fish_embeddings", faiss_index_path: str = "qdrant_faiss_index.faiss", embedding_dimension: int = 1024,
+                 payload_cache_size: int = 10000, payload_cache_ttl: float = 3600.0,
+                 index_factory: str = "IVF256,Flat", search_params: Optional[Dict[str, int]] = None, target_recall: float = 0.95,
+                 hnsw_ef_construction: int = 200, rerank_factor: Optional[int] = None, mmap_index: bool = True,
+                 train_sample_size: int = 20000, add_batch_size: int = 10000, recall_k: int = 5, recall_queries: int = 100,
+                 sync_mode: str = "incremental", max_drift: float = 0.2, manifest_sample_size: int = 32,
+                 scroll_prefetch: int = 2, snapshot_path: Optional[str] = None):
         # Get Qdrant credentials from environment variables
         qdrant_url = os.getenv("QDRANT_URL")
         qdrant_api_key = os.getenv("QDRANT_API_KEY")
         
-        if not qdrant_url or not qdrant_api_key:
-            raise ValueError("QDRANT_URL and QDRANT_API_KEY environment variables must be set")
+        # A local snapshot (see snapshot.py) lets the index be built without Qdrant; without
+        # credentials the database then runs offline from the snapshot and the saved index
+        self.snapshot = Snapshot(snapshot_path) if snapshot_path else None
         
-        # Initialize Qdrant client
-        self.qdrant_client = QdrantClient(
-            url=qdrant_url,
-            api_key=qdrant_api_key,
-        )
+        if not qdrant_url or not qdrant_api_key:
+            if self.snapshot is None:
+                raise ValueError("QDRANT_URL and QDRANT_API_KEY environment variables must be set")
+            print(f"No Qdrant credentials, serving offline from snapshot {snapshot_path}")
+            self.qdrant_client = None
+        else:
+            # Initialize Qdrant client
+            self.qdrant_client = QdrantClient(
+                url=qdrant_url,
+                api_key=qdrant_api_key,
+            )
         self.collection_name = collection_name
         self.faiss_index_path = faiss_index_path
-        self.metadata_path = faiss_index_path.replace('.faiss', '_metadata.pkl')
+        self.metadata_path = faiss_index_path.replace('.faiss', '_metadata.pkl')  # legacy pickled mappings
+        self.ids_path = faiss_index_path.replace('.faiss', '_ids.npy')
+        self.payload_store_path = faiss_index_path.replace('.faiss', '_payloads')
+        self.params_path = faiss_index_path.replace('.faiss', '_params.json')
+        self.vectors_path = faiss_index_path.replace('.faiss', '_vectors.f32')
+        self.manifest_path = faiss_index_path.replace('.faiss', '_manifest.json')
+        self.hashes_path = faiss_index_path.replace('.faiss', '_hashes.npy')
+        self.lock_path = faiss_index_path + ".lock"
         
-        # FAISS index for fast similarity search
-        self.faiss_index = None
+        # FAISS index for fast similarity search with its id mapping (memory-mapped int64 array),
+        # local memory-mapped payloads keyed by FAISS position (so searches need no Qdrant round trip)
+        # and re-ranking vectors. A saved index is memory-mapped by default, so several worker
+        # processes share its pages through the OS page cache.
+        self._state = IndexState(None, IdMap(self.ids_path), PayloadStore(self.payload_store_path),
+                                 VectorFile(self.vectors_path, embedding_dimension))
         self.embedding_dimension = embedding_dimension
+        self.mmap_index = mmap_index
+        self.load_stats: Dict[str, Any] = {}
+        
+        # Index type as a FAISS factory string ("IVF256,Flat", "IVF1024,PQ64", "HNSW32", "Flat", ...).
+        # Trainable indexes are trained once on a reservoir sample, then all vectors are added.
+        # HNSW<M> indexes need no training; hnsw_ef_construction sets their graph build depth.
+        self.index_factory = index_factory
+        self.hnsw_ef_construction = hnsw_ef_construction
+        self.train_sample_size = train_sample_size
+        self.add_batch_size = add_batch_size
+        
+        # Builds fetch and decode up to scroll_prefetch scroll pages ahead of the page being indexed
+        self.scroll_prefetch = scroll_prefetch
+        
+        # Compressed indexes (PQ/SQ) fetch top_k * rerank_factor candidates and re-rank them
+        # exactly with full vectors from a memory-mapped file. None enables it (x4) for PQ/SQ only.
+        if rerank_factor is None:
+            rerank_factor = 4 if any(code in index_factory for code in ("PQ", "SQ")) else 0
+        self.rerank_factor = rerank_factor
+        
+        # Query-time parameters (nprobe/efSearch). Without explicit values they are auto-tuned after
+        # each build to the cheapest setting reaching target_recall@recall_k against exact search.
+        self.search_params = search_params
+        self.target_recall = target_recall
+        self.recall_k = recall_k
+        self.recall_queries = recall_queries
+        self.build_stats: Dict[str, Any] = {}
+        
+        # Incremented on every (re)build so callers can invalidate derived caches
+        self.index_version = 0
+        
+        # Rebuilds, additions and syncs are serialized; searches never wait for them. A rebuild can
+        # run in a background thread (start_background_rebuild) and reports its progress.
+        self._write_lock = threading.RLock()
+        
+        # Worker processes sharing the index files serialize loading, builds, syncs and saves with an
+        # exclusive flock on <index>.lock. The (inode, mtime, size) of the index file as last loaded or
+        # saved by this process tells whether another worker has replaced the files since.
+        self._file_lock = None
+        self._file_lock_depth = 0
+        self._files_signature: Optional[Tuple[int, int, int]] = None
+        self._rebuild_thread: Optional[threading.Thread] = None
+        self._rebuild_start_lock = threading.Lock()
+        self.build_progress: Dict[str, Any] = {"status": "idle"}
+        
+        # Incremental sync ("incremental") applies Qdrant changes to the saved index on load; "full"
+        # rebuilds on any count mismatch. Deleted or updated points are tombstoned in the id map and
+        # excluded from searches; a full rebuild happens once changes exceed max_drift of the index.
+        self.sync_mode = sync_mode
+        self.max_drift = max_drift
+        self.sync_state: Dict[str, Any] = {"high_water_mark": None, "appended_since_build": 0, "last_sync": None}
         
-        # Mapping between FAISS indices and Qdrant point IDs
-        self.faiss_id_to_qdrant_id: Dict[int, int] = {}
-        self.qdrant_id_to_faiss_id: Dict[int, int] = {}
+        # Manifest of what the index was built from (collection, dimension, build parameters and a
+        # content hash of all ids + vectors), verified at startup together with a sample of points
+        self.manifest: Dict[str, Any] = {}
+        self.manifest_sample_size = manifest_sample_size
         
-        # Cache for frequently accessed metadata
-        self.metadata_cache: Dict[int, FishSpecies] = {}
+        # Bounded LRU/TTL cache of resolved payloads in front of the store and Qdrant
+        self.payload_cache = PayloadCache(max_entries=payload_cache_size, ttl_seconds=payload_cache_ttl)
         
         # Initialize components
         self._initialize_qdrant_collection()
@@ -45,6 +258,8 @@ class FaissFromQdrantDatabase:
         
     def _initialize_qdrant_collection(self):
         """Initialize the Qdrant collection for persistent storage"""
+        if self.qdrant_client is None:
+            return
         try:
             collections = self.qdrant_client.get_collections()
             collection_names = [col.name for col in collections.collections]
@@ -60,33 +275,287 @@ class FaissFromQdrantDatabase:
         except Exception as e:
             print(f"Error initializing Qdrant collection: {e}")
     
+    @contextmanager
+    def _index_files_lock(self):
+        """
+        Hold the write lock of this process and the exclusive file lock shared with other workers
+        
+        Re-entrant within the process. When the outermost holder finds that another
+        worker has replaced the saved index since this process last loaded or saved
+        it, the saved index is reloaded first, so changes are applied on top of the
+        other worker's result instead of overwriting it.
+        """
+        with self._write_lock:
+            if self._file_lock_depth == 0 and fcntl is not None:
+                lock_file = open(self.lock_path, 'a+')
+                try:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                except Exception:
+                    lock_file.close()
+                    raise
+                self._file_lock = lock_file
+            self._file_lock_depth += 1
+            try:
+                if (self._file_lock_depth == 1 and self._files_signature is not None
+                        and self._saved_files_signature() != self._files_signature):
+                    self._reload_saved_index()
+                yield
+            finally:
+                self._file_lock_depth -= 1
+                if self._file_lock_depth == 0 and self._file_lock is not None:
+                    fcntl.flock(self._file_lock.fileno(), fcntl.LOCK_UN)
+                    self._file_lock.close()
+                    self._file_lock = None
+    
+    def _saved_files_signature(self) -> Optional[Tuple[int, int, int]]:
+        """(inode, mtime, size) of the saved index file, None if there is none"""
+        try:
+            stat = os.stat(self.faiss_index_path)
+        except OSError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    
+    def _reload_saved_index(self) -> bool:
+        """
+        Replace the current state with the index files saved by another worker
+        
+        Returns:
+            bool: True if the saved files were consistent and swapped in
+        """
+        print(f"FAISS index files were replaced by another worker, reloading {self.faiss_index_path}")
+        try:
+            faiss_index, mmapped = self._read_index(self.mmap_index)
+            id_map = IdMap(self.ids_path)
+            payload_store = PayloadStore(self.payload_store_path)
+            raw_vectors = VectorFile(self.vectors_path, self.embedding_dimension)
+            if not id_map.load() or len(id_map) != faiss_index.ntotal:
+                raise ValueError("id mapping does not match the index")
+            if not payload_store.load() or len(payload_store) != faiss_index.ntotal:
+                raise ValueError("payload store does not match the index")
+            if self.rerank_factor and (not raw_vectors.load() or len(raw_vectors) != faiss_index.ntotal):
+                raise ValueError("re-ranking vectors do not match the index")
+            
+            params = load_params(self.params_path) or {}
+            apply_search_params(faiss_index, self.search_params or params.get("search_params", {}))
+            state = IndexState(faiss_index, id_map, payload_store, raw_vectors, load_hashes(self.hashes_path), mmapped)
+            state.refresh_deletion_filter()
+        except Exception as e:
+            print(f"Error reloading FAISS index saved by another worker, keeping the current one: {e}")
+            return False
+        
+        self._state = state
+        self.build_stats = params.get("build_stats", {})
+        self.sync_state.update(params.get("sync_state", {}))
+        self.manifest = load_manifest(self.manifest_path) or {}
+        self._files_signature = self._saved_files_signature()
+        self.payload_cache.clear()
+        self.index_version += 1
+        return True
+    
     def _load_or_build_faiss_index(self):
-        """Load existing FAISS index or build it from Qdrant data"""
+        """
+        Load existing FAISS index or build it from Qdrant data
+        
+        Runs under the index file lock, so when several workers start at once only
+        the first one builds or syncs; the others then load its saved result.
+        """
+        with self._index_files_lock():
+            self._load_or_build_faiss_index_locked()
+    
+    def _load_or_build_faiss_index_locked(self):
+        """Load existing FAISS index or build it from Qdrant data (caller holds the index file lock)"""
         try:
             # Try to load existing FAISS index
-            if os.path.exists(self.faiss_index_path) and os.path.exists(self.metadata_path):
+            if os.path.exists(self.faiss_index_path) and (self.id_map.exists() or os.path.exists(self.metadata_path)):
                 print(f"Loading existing FAISS index from: {self.faiss_index_path}")
-                self.faiss_index = faiss.read_index(self.faiss_index_path)
+                self._files_signature = self._saved_files_signature()
+                self.faiss_index, self.index_mmapped = self._read_index(self.mmap_index)
                 
-                with open(self.metadata_path, 'rb') as f:
-                    mappings = pickle.load(f)
-                    self.faiss_id_to_qdrant_id = mappings['faiss_id_to_qdrant_id']
-                    self.qdrant_id_to_faiss_id = mappings['qdrant_id_to_faiss_id']
+                if not self.id_map.exists():
+                    self._convert_legacy_mappings()
+                self.id_map.load()
                 
                 print(f"Loaded FAISS index with {self.faiss_index.ntotal} vectors")
                 
-                # Verify index is still valid by checking Qdrant
-                if not self._verify_faiss_index():
+                # Search parameters chosen at build time are persisted next to the index
+                params = load_params(self.params_path)
+                if params is not None and params.get("index_factory") == self.index_factory:
+                    apply_search_params(self.faiss_index, self.search_params or params.get("search_params", {}))
+                    self.build_stats = params.get("build_stats", {})
+                    self.sync_state.update(params.get("sync_state", {}))
+                self._state.refresh_deletion_filter()
+                
+                # Verify the local files are consistent, then bring the index up to date with Qdrant
+                if params is None or params.get("index_factory") != self.index_factory:
+                    print(f"FAISS index was not built as {self.index_factory}, rebuilding...")
+                    self._build_on_startup()
+                elif len(self.id_map) != self.faiss_index.ntotal:
+                    print("FAISS id mapping is out of sync, rebuilding...")
+                    self._build_on_startup()
+                elif not self.payload_store.load() or len(self.payload_store) != self.faiss_index.ntotal:
+                    print("Local payload store is missing or out of sync, rebuilding...")
+                    self._build_on_startup()
+                elif self.rerank_factor and (not self.raw_vectors.load() or len(self.raw_vectors) != self.faiss_index.ntotal):
+                    print("Re-ranking vectors are missing or out of sync, rebuilding...")
+                    self._build_on_startup()
+                elif self._manifest_differs():
+                    print("FAISS index manifest does not match its source, rebuilding...")
+                    self._build_on_startup()
+                elif self.qdrant_client is None:
+                    print("Offline: using the saved FAISS index without checking Qdrant")
+                elif self.sync_mode == "incremental":
+                    if self.sync_with_qdrant()["status"] == "rebuild_required":
+                        print("FAISS index drifted too far from Qdrant, rebuilding from Qdrant...")
+                        self._build_faiss_from_qdrant()
+                elif not self._verify_faiss_index():
                     print("FAISS index is outdated, rebuilding from Qdrant...")
                     self._build_faiss_from_qdrant()
             else:
-                print("No existing FAISS index found, building from Qdrant data...")
-                self._build_faiss_from_qdrant()
+                print("No existing FAISS index found, building it...")
+                self._build_on_startup()
                 
         except Exception as e:
             print(f"Error loading FAISS index: {e}")
-            print("Building new FAISS index from Qdrant data...")
-            self._build_faiss_from_qdrant()
+            print("Building new FAISS index...")
+            self._build_on_startup()
+    
+    def _build_on_startup(self) -> bool:
+        """
+        Build the index at startup, from the local snapshot when there is a usable one
+        
+        A snapshot build needs no Qdrant round trips; with a Qdrant client the
+        result is then brought up to date by the incremental sync (or rebuilt
+        from Qdrant if the snapshot is too old).
+        
+        Returns:
+            bool: True if a new index was swapped in
+        """
+        snapshot = self._usable_snapshot()
+        if snapshot is None:
+            return self._build_faiss_from_qdrant()
+        if not self._build_faiss_from_qdrant(snapshot):
+            return self.qdrant_client is not None and self._build_faiss_from_qdrant()
+        if self.qdrant_client is None:
+            return True
+        if self.sync_mode == "incremental":
+            if self.sync_with_qdrant()["status"] == "rebuild_required":
+                print("Snapshot drifted too far from Qdrant, rebuilding from Qdrant...")
+                return self._build_faiss_from_qdrant()
+        elif not self._verify_faiss_index():
+            print("Snapshot is outdated, rebuilding from Qdrant...")
+            return self._build_faiss_from_qdrant()
+        return True
+    
+    def _usable_snapshot(self) -> Optional[Snapshot]:
+        """Load the configured snapshot if it exists and was exported from this collection with this dimension"""
+        if self.snapshot is None or not self.snapshot.exists() or not self.snapshot.load():
+            return None
+        if self.snapshot.meta.get("collection") != self.collection_name or self.snapshot.dimension != self.embedding_dimension:
+            print(f"Snapshot {self.snapshot.path} is for {self.snapshot.meta.get('collection')} "
+                  f"({self.snapshot.dimension}d), not {self.collection_name} ({self.embedding_dimension}d), ignoring it")
+            return None
+        return self.snapshot
+    
+    def _convert_legacy_mappings(self):
+        """Convert pickled id mapping dicts from older builds into the int64 .npy mapping"""
+        import pickle
+        
+        print(f"Converting legacy id mappings {self.metadata_path} to {self.ids_path}")
+        with open(self.metadata_path, 'rb') as f:
+            mappings = pickle.load(f)
+        faiss_id_to_qdrant_id = mappings['faiss_id_to_qdrant_id']
+        
+        ids = np.full(len(faiss_id_to_qdrant_id), -1, dtype=np.int64)
+        for faiss_id, qdrant_id in faiss_id_to_qdrant_id.items():
+            ids[faiss_id] = qdrant_id
+        self.id_map.save(ids)
+        os.remove(self.metadata_path)
+    
+    def _manifest_differs(self) -> bool:
+        """
+        Check the saved manifest against the configuration, the local files and Qdrant
+        
+        Compares collection, dimension and build parameters, recomputes the
+        content hash from the per-point hashes of the live positions, checks
+        the vector size of the collection and re-hashes a random sample of
+        points fetched from Qdrant. Point count differences are left to the
+        incremental sync / count check. Without a Qdrant client the index is
+        only compared with the snapshot, which wins if it is newer. Errors
+        while contacting Qdrant leave the index unverified, not rebuilt.
+        
+        Returns:
+            bool: True if the index has to be rebuilt
+        """
+        self.manifest = load_manifest(self.manifest_path) or {}
+        self.point_hashes = load_hashes(self.hashes_path)
+        live_ids = np.asarray(self.id_map.ids)
+        
+        differences = manifest_differences(self.manifest or None, {
+            "collection": self.collection_name,
+            "dimension": self.embedding_dimension,
+            "index_factory": self.index_factory,
+            "hnsw_ef_construction": self.hnsw_ef_construction if self.manifest.get("hnsw_ef_construction") is not None else None
+        })
+        if not differences and len(self.point_hashes) != self.faiss_index.ntotal:
+            differences.append(f"{len(self.point_hashes)} point hashes for {self.faiss_index.ntotal} vectors")
+        if not differences:
+            local_hash = content_hash(self.point_hashes[live_ids >= 0])
+            if local_hash != self.manifest.get("content_hash"):
+                differences.append(f"content_hash: {self.manifest.get('content_hash')!r} != {local_hash!r} (local files)")
+        
+        if not differences and self.qdrant_client is None:
+            # Offline the snapshot is the source of truth: rebuild only from a newer, different one
+            snapshot = self._usable_snapshot()
+            if (snapshot is not None and snapshot.meta.get("content_hash") != self.manifest.get("content_hash")
+                    and snapshot.meta.get("created_at", 0) > (self.manifest.get("updated_at") or 0)):
+                differences.append(f"snapshot {snapshot.path} is newer than the index")
+        elif not differences:
+            try:
+                vectors_config = self.qdrant_client.get_collection(self.collection_name).config.params.vectors
+                qdrant_dimension = getattr(vectors_config, "size", None)
+                if qdrant_dimension is not None and qdrant_dimension != self.embedding_dimension:
+                    differences.append(f"Qdrant vector size {qdrant_dimension} != {self.embedding_dimension}")
+                else:
+                    differences.extend(self._sample_differences(live_ids))
+            except Exception as e:
+                # Qdrant being unreachable is not a mismatch: keep the index, it is checked again on sync
+                print(f"Could not verify FAISS index manifest against Qdrant, keeping the index: {e}")
+        
+        for difference in differences:
+            print(f"Manifest mismatch: {difference}")
+        return bool(differences)
+    
+    def _sample_differences(self, live_ids: np.ndarray) -> List[str]:
+        """Re-hash a random sample of live points fetched from Qdrant and report mismatches"""
+        live_positions = np.flatnonzero(live_ids >= 0)
+        if not self.manifest_sample_size or not len(live_positions):
+            return []
+        rng = np.random.default_rng()
+        positions = rng.choice(live_positions, size=min(self.manifest_sample_size, len(live_positions)), replace=False)
+        expected = dict(zip(live_ids[positions].tolist(), self.point_hashes[positions].tolist()))
+        
+        points = self.qdrant_client.retrieve(
+            collection_name=self.collection_name,
+            ids=list(expected),
+            with_payload=True,
+            with_vectors=True
+        )
+        # Deleted points and points updated after the last sync are handled by the incremental sync
+        high_water_mark = self.sync_state.get("high_water_mark")
+        points = [point for point in points if point.vector and not self._updated_since(point.payload, high_water_mark)]
+        if not points:
+            return []
+        
+        hashes = point_hashes(np.array([point.id for point in points], dtype=np.int64),
+                              np.array([point.vector for point in points], dtype=np.float32))
+        mismatched = sum(int(h) != expected[point.id] for point, h in zip(points, hashes))
+        return [f"{mismatched} of {len(points)} sampled vectors differ from Qdrant"] if mismatched else []
+    
+    @staticmethod
+    def _updated_since(payload: Optional[Dict[str, Any]], high_water_mark: Optional[float]) -> bool:
+        """Check whether a payload was written after the high-water mark (any timestamp counts if there is none)"""
+        updated_at = (payload or {}).get("updated_at")
+        return isinstance(updated_at, (int, float)) and (high_water_mark is None or updated_at > high_water_mark)
     
     def _verify_faiss_index(self) -> bool:
         """Verify that the FAISS index matches current Qdrant data"""
@@ -95,8 +564,8 @@ class FaissFromQdrantDatabase:
             qdrant_info = self.qdrant_client.get_collection(self.collection_name)
             qdrant_count = qdrant_info.points_count
             
-            # Compare with FAISS count
-            faiss_count = self.faiss_index.ntotal if self.faiss_index else 0
+            # Compare with the FAISS vectors that are not tombstoned
+            faiss_count = self.id_map.live_count() if self.faiss_index else 0
             
             print(f"Qdrant points: {qdrant_count}, FAISS vectors: {faiss_count}")
             
@@ -107,101 +576,579 @@ class FaissFromQdrantDatabase:
             print(f"Error verifying FAISS index: {e}")
             return False
     
-    def _build_faiss_from_qdrant(self):
-        """Build FAISS index from all vectors in Qdrant using batch processing"""
-        try:
-            print("Building FAISS index from Qdrant data...")
+    def _scroll_qdrant(self, with_payload: bool, batch_size: int = 1000, with_vectors: bool = True,
+                       scroll_filter: Optional[Filter] = None):
+        """
+        Iterate over all points of the collection page by page
+        
+        Args:
+            with_payload: Whether to fetch payloads along with vectors
+            batch_size: Initial scroll page size (halved on timeouts, not below 100)
+            with_vectors: Whether to fetch vectors (without them every point is yielded)
+            scroll_filter: Only return points matching this filter
             
-            # Create new FAISS index
+        Yields:
+            List of points (with vectors, if requested)
+        """
+        offset = None
+        
+        while True:
+            try:
+                points, next_offset = self.qdrant_client.scroll(
+                    collection_name=self.collection_name,
+                    limit=batch_size,
+                    offset=offset,
+                    with_payload=with_payload,
+                    with_vectors=with_vectors,
+                    scroll_filter=scroll_filter
+                )
+            except Exception as batch_error:
+                print(f"Error processing batch: {batch_error}")
+                if "timeout" in str(batch_error).lower() and batch_size > 100:
+                    print("Timeout encountered, trying smaller batch size...")
+                    batch_size = max(100, batch_size // 2)
+                    continue
+                raise batch_error
             
-            # self.faiss_index = faiss.IndexFlatIP(self.embedding_dimension)
-            self.quantizer = faiss.IndexFlatIP(self.embedding_dimension)
-            self.faiss_index = faiss.IndexIVFFlat(self.quantizer, self.embedding_dimension, 256, faiss.METRIC_INNER_PRODUCT)
+            if not points:
+                break
             
+            yield [point for point in points if point.vector] if with_vectors else points
             
-            self.faiss_id_to_qdrant_id = {}
-            self.qdrant_id_to_faiss_id = {}
+            # Move to next batch
+            if next_offset is None:
+                break
+            offset = next_offset
+    
+    def _scroll_pages(self, with_payload: bool) -> _Prefetcher:
+        """
+        Scroll all points with vectors, fetching and decoding pages ahead of the consumer
+        
+        Each page is decoded in one conversion into an int64 id array and a
+        float32 vector matrix in the prefetch thread, so the round trip for the
+        next page overlaps with indexing the current one.
+        
+        Args:
+            with_payload: Whether to fetch payloads
             
-            # Process in batches to avoid timeouts
-            batch_size = 1000
-            offset = None
-            total_processed = 0
-            faiss_id_counter = 0
+        Returns:
+            _Prefetcher yielding (ids (n,), vectors (n, d), payloads or None) per page
+        """
+        def decode(points):
+            ids = np.fromiter((point.id for point in points), dtype=np.int64, count=len(points))
+            vectors = np.array([point.vector for point in points], dtype=np.float32).reshape(len(points), self.embedding_dimension)
+            return ids, vectors, [point.payload for point in points] if with_payload else None
+        
+        pages = (decode(points) for points in self._scroll_qdrant(with_payload=with_payload) if points)
+        return _Prefetcher(pages, self.scroll_prefetch)
+    
+    def _source_pages(self, snapshot: Optional[Snapshot], with_payload: bool) -> _Prefetcher:
+        """Pages of the build source: the snapshot (payloads are copied separately) or a Qdrant scroll"""
+        if snapshot is not None:
+            return _Prefetcher(snapshot.pages(self.add_batch_size), self.scroll_prefetch)
+        return self._scroll_pages(with_payload=with_payload)
+    
+    def _sample_training_vectors(self, snapshot: Optional[Snapshot] = None) -> Tuple[np.ndarray, np.ndarray, int]:
+        """
+        Reservoir-sample training vectors uniformly across the whole collection
+        
+        Args:
+            snapshot: Sample the snapshot instead of scrolling Qdrant
             
-            print(f"Processing in batches of {batch_size}...")
+        Returns:
+            Tuple[np.ndarray, np.ndarray, int]: (sample matrix, source position of each sampled
+            vector, total number of vectors seen)
+        """
+        rng = np.random.default_rng(0)
+        size = self.train_sample_size
+        sample = np.empty((size, self.embedding_dimension), dtype=np.float32)
+        sample_positions = np.empty(size, dtype=np.int64)
+        seen = 0
+        
+        for _, vectors, _ in self._source_pages(snapshot, with_payload=False):
+            # Algorithm R, one page at a time: the first size vectors fill the sample, then the
+            # i-th vector (0-based) replaces a random slot with probability size / (i + 1)
+            fill = max(0, min(len(vectors), size - seen))
+            sample[seen:seen + fill] = vectors[:fill]
+            sample_positions[seen:seen + fill] = np.arange(seen, seen + fill)
+            if fill < len(vectors):
+                positions = np.arange(seen + fill, seen + len(vectors))
+                slots = rng.integers(0, positions + 1)
+                accepted = slots < size
+                # Later vectors win when several pick the same slot, as in the sequential algorithm
+                sample[slots[accepted]] = vectors[fill:][accepted]
+                sample_positions[slots[accepted]] = positions[accepted]
+            seen += len(vectors)
+            self._set_build_progress("sampling", processed=seen)
+        
+        count = min(seen, size)
+        return sample[:count], sample_positions[:count], seen
+    
+    def _build_faiss_from_qdrant(self, snapshot: Optional[Snapshot] = None) -> bool:
+        """
+        Build FAISS index from all vectors in Qdrant (or a local snapshot) in two passes
+        
+        Pass 1 reservoir-samples training vectors across all scroll pages and
+        trains the index described by index_factory once (if it needs training).
+        Pass 2 streams every vector into the index in large batches, writes
+        payloads to the local store and tracks exact top-k neighbours of a few
+        sample queries. These are then used to auto-tune nprobe/efSearch and to
+        report recall@k against an exact IndexFlatIP baseline.
+        
+        The new index, id mapping, payloads and vectors form a fresh IndexState.
+        The current state keeps serving searches during the build, is replaced
+        in a single assignment when the new one is complete, and stays in place
+        if the build fails.
+        
+        Args:
+            snapshot: Loaded snapshot to build from without contacting Qdrant (without
+                a Qdrant client the configured snapshot is always used)
             
-            while True:
-                try:
-                    # Get batch of points from Qdrant
-                    scroll_result = self.qdrant_client.scroll(
-                        collection_name=self.collection_name,
-                        limit=batch_size,
-                        offset=offset,
-                        with_payload=False,  # We only need vectors for FAISS
-                        with_vectors=True
-                    )
-                    
-                    points, next_offset = scroll_result
-                    
-                    if not points:
-                        break
-                    
-                    # Process this batch
-                    vectors_to_add = []
-                    qdrant_ids = []
-                    
-                    for point in points:
-                        if point.vector:
-                            # Normalize vector for cosine similarity
-                            vector = np.array(point.vector, dtype=np.float32).reshape(1, -1)
-                            # faiss.normalize_L2(vector)
-                            
-                            vectors_to_add.append(vector[0])
-                            qdrant_ids.append(point.id)
+        Returns:
+            bool: True if a new index was swapped in
+        """
+        import time
+        
+        if snapshot is None and self.qdrant_client is None:
+            snapshot = self._usable_snapshot()
+            if snapshot is None:
+                print("No Qdrant client and no usable snapshot to build the FAISS index from")
+                if self.faiss_index is None:
+                    self._state = self._empty_state()
+                return False
+        source = f"snapshot {snapshot.path}" if snapshot is not None else "Qdrant"
+        
+        with self._index_files_lock():
+            build_start = time.time()
+            self.build_progress = {"status": "running", "stage": "sampling", "processed": 0, "total": None,
+                                   "started_at": build_start}
+            payload_writer = None
+            vector_writer = None
+            
+            try:
+                print(f"Building FAISS index from {source}...")
+                
+                # Pass 1: training sample
+                train_start = time.time()
+                train_vectors, train_positions, total_vectors = self._sample_training_vectors(snapshot)
+                
+                if total_vectors == 0:
+                    print(f"No vectors found in {source} to build FAISS index")
+                    self._state = self._empty_state()
+                    self.index_version += 1
+                    self._set_build_progress("completed", total=0, finished_at=time.time())
+                    return True
+                
+                index_factory = scale_factory_string(self.index_factory, len(train_vectors))
+                if index_factory != self.index_factory:
+                    print(f"Only {len(train_vectors)} training vectors, using {index_factory} instead of {self.index_factory}")
+                
+                self._set_build_progress("training", total=total_vectors)
+                faiss_index = create_index(index_factory, self.embedding_dimension)
+                is_hnsw = set_ef_construction(faiss_index, self.hnsw_ef_construction)
+                train_count = len(train_vectors)
+                if not faiss_index.is_trained:
+                    faiss_index.train(train_vectors)
+                train_time = time.time() - train_start
+                print(f"Prepared {index_factory} on {train_count} of {total_vectors} vectors in {train_time:.2f}s")
+                
+                # Recall check queries, with an exact top-k kept up to date during pass 2. The queries are
+                # sampled database vectors, so each one's own position is left out of the exact and the
+                # approximate results; otherwise every query would find itself and inflate recall@k.
+                rng = np.random.default_rng(1)
+                query_rows = rng.choice(len(train_vectors), size=min(self.recall_queries, len(train_vectors)), replace=False)
+                recall_queries = train_vectors[query_rows]
+                query_positions = train_positions[query_rows]
+                del train_vectors, train_positions
+                k = self.recall_k
+                exact_scores = np.full((len(recall_queries), k), -np.inf, dtype=np.float32)
+                exact_ids = np.full((len(recall_queries), k), -1, dtype=np.int64)
+                
+                # Pass 2: stream-add all vectors in large batches
+                self._set_build_progress("adding", processed=0)
+                add_start = time.time()
+                position_ids = []
+                position_hashes = []
+                
+                # Payloads (and full vectors for re-ranking) are written in FAISS position order alongside the index
+                payload_writer = PayloadStoreWriter(self.payload_store_path)
+                vector_writer = VectorFileWriter(self.vectors_path, self.embedding_dimension) if self.rerank_factor else None
+                
+                # Pages are copied into one preallocated batch buffer that is added to the index when full
+                batch_vectors = np.empty((self.add_batch_size, self.embedding_dimension), dtype=np.float32)
+                batch_ids = np.empty(self.add_batch_size, dtype=np.int64)
+                payloads = []
+                filled = 0
+                total_processed = 0
+                high_water_mark = None
+                
+                def flush():
+                    nonlocal total_processed, filled
+                    vectors_matrix = batch_vectors[:filled]
+                    faiss_index.add(vectors_matrix)
+                    if payloads:
+                        payload_writer.append(payloads)
+                    if vector_writer is not None:
+                        vector_writer.append(vectors_matrix)
                     
-                    if vectors_to_add:
-                        # Add batch to FAISS
-                        vectors_matrix = np.array(vectors_to_add, dtype=np.float32)
-                        self.faiss_index.train(vectors_matrix)
-                        self.faiss_index.add(vectors_matrix)
-                        self.faiss_index.nprobe = 3    
-                        
-                        # Build mappings for this batch
-                        for i, qdrant_id in enumerate(qdrant_ids):
-                            self.faiss_id_to_qdrant_id[faiss_id_counter] = qdrant_id
-                            self.qdrant_id_to_faiss_id[qdrant_id] = faiss_id_counter
-                            faiss_id_counter += 1
-                        
-                        total_processed += len(vectors_to_add)
-                        print(f"Processed batch: {len(vectors_to_add)} vectors (total: {total_processed})")
+                    # Merge exact scores of this batch into the running top-k
+                    scores = recall_queries @ vectors_matrix.T
+                    ids = np.arange(total_processed, total_processed + len(vectors_matrix), dtype=np.int64)
+                    scores[ids == query_positions[:, None]] = -np.inf
+                    merged_scores = np.hstack([exact_scores, scores])
+                    merged_ids = np.hstack([exact_ids, np.broadcast_to(ids, scores.shape)])
+                    top = np.argsort(-merged_scores, axis=1)[:, :k]
+                    exact_scores[:] = np.take_along_axis(merged_scores, top, axis=1)
+                    exact_ids[:] = np.take_along_axis(merged_ids, top, axis=1)
                     
-                    # Move to next batch
-                    if next_offset is None:
-                        break
-                    offset = next_offset
+                    # Qdrant IDs and content hashes in FAISS position order
+                    position_ids.append(batch_ids[:filled].copy())
+                    position_hashes.append(point_hashes(position_ids[-1], vectors_matrix))
                     
-                except Exception as batch_error:
-                    print(f"Error processing batch: {batch_error}")
-                    if "timeout" in str(batch_error).lower():
-                        print("Timeout encountered, trying smaller batch size...")
-                        batch_size = max(100, batch_size // 2)
-                        continue
-                    else:
-                        raise batch_error
-            
-            print(f"Built FAISS index with {total_processed} vectors")
-            
-            if total_processed > 0:
-                # Save the index and mappings
+                    total_processed += filled
+                    self._set_build_progress("adding", processed=total_processed)
+                    print(f"Added batch: {filled} vectors (total: {total_processed}/{total_vectors})")
+                    filled = 0
+                    payloads.clear()
+                
+                # Snapshot payloads are already a column store in position order and are copied in bulk
+                if snapshot is not None:
+                    payload_writer.append_store(snapshot.payload_store)
+                    high_water_mark = snapshot.high_water_mark
+                
+                pages = self._source_pages(snapshot, with_payload=True)
+                for page_ids, page_vectors, page_payloads in pages:
+                    if page_payloads is not None:
+                        high_water_mark = self._max_updated_at(page_payloads, high_water_mark)
+                    start = 0
+                    while start < len(page_ids):
+                        take = min(len(page_ids) - start, self.add_batch_size - filled)
+                        batch_vectors[filled:filled + take] = page_vectors[start:start + take]
+                        batch_ids[filled:filled + take] = page_ids[start:start + take]
+                        if page_payloads is not None:
+                            payloads.extend(page_payloads[start:start + take])
+                        filled += take
+                        start += take
+                        if filled == self.add_batch_size:
+                            flush()
+                if filled:
+                    flush()
+                add_time = time.time() - add_start
+                vectors_per_second = total_processed / add_time if add_time > 0 else 0.0
+                print(f"Streamed {total_processed} vectors in {add_time:.2f}s ({vectors_per_second:.0f} vectors/s, "
+                      f"{pages.wait_seconds:.2f}s waiting for {source})")
+                
+                # With re-ranking, search parameters are tuned for the recall of the whole pipeline
+                self._set_build_progress("tuning")
+                index_search = excluding_positions(faiss_index.search, query_positions)
+                search_fn = None
+                if vector_writer is not None:
+                    tuning_vectors = vector_writer.close()
+                    rerank_factor = self.rerank_factor
+                    search_fn = excluding_positions(
+                        lambda queries, top_k: self._rerank(tuning_vectors, queries, faiss_index.search(queries, top_k * rerank_factor)[1], top_k),
+                        query_positions)
+                
+                # Search parameters and recall@k of the approximate index against the exact baseline
+                if self.search_params:
+                    apply_search_params(faiss_index, self.search_params)
+                    tuning = {"search_params": dict(self.search_params),
+                              **measure(faiss_index, recall_queries, exact_ids, search_fn=search_fn or index_search)}
+                else:
+                    tuning = autotune(faiss_index, recall_queries, exact_ids, target_recall=self.target_recall,
+                                      search_fn=search_fn or index_search)
+                    print(f"Auto-tuned search parameters: {tuning['search_params']} "
+                          f"(target recall@{k} {self.target_recall}, {len(tuning['sweep'])} settings tried)")
+                
+                # Recall of the index alone, and after exact re-ranking of rerank_factor times more candidates
+                reranked_recall = tuning["recall"] if search_fn is not None else None
+                recall = recall_at_k(index_search(recall_queries, k)[1], exact_ids)
+                
+                build_stats = {
+                    "source": "snapshot" if snapshot is not None else "qdrant",
+                    "snapshot_created_at": snapshot.meta.get("created_at") if snapshot is not None else None,
+                    "index_factory": index_factory,
+                    "search_params": tuning["search_params"],
+                    "search_latency_ms": tuning["latency_ms"],
+                    "hnsw_ef_construction": self.hnsw_ef_construction if is_hnsw else None,
+                    "train_vectors": train_count,
+                    "total_vectors": total_processed,
+                    "train_time_seconds": train_time,
+                    "add_time_seconds": add_time,
+                    "vectors_per_second": vectors_per_second,
+                    "scroll_wait_seconds": pages.wait_seconds,
+                    "build_time_seconds": time.time() - build_start,
+                    f"recall_at_{k}": recall,
+                    "rerank_factor": self.rerank_factor,
+                    f"reranked_recall_at_{k}": reranked_recall,
+                    "recall_queries": len(recall_queries),
+                    "built_at": time.time()
+                }
+                print(f"Built FAISS index with {total_processed} vectors in {build_stats['build_time_seconds']:.2f}s "
+                      f"(train {train_time:.2f}s, add {add_time:.2f}s), recall@{k} vs exact: {recall:.3f}")
+                if reranked_recall is not None:
+                    print(f"Recall@{k} with exact re-ranking of {k * self.rerank_factor} candidates: {reranked_recall:.3f}")
+                
+                # Replace the files, then swap the new state in with a single assignment
+                self._set_build_progress("saving")
+                id_map = IdMap(self.ids_path)
+                id_map.save(np.concatenate(position_ids))
+                save_hashes(self.hashes_path, np.concatenate(position_hashes))
+                payload_store = payload_writer.finalize()
+                payload_writer = None
+                raw_vectors = vector_writer.finalize() if vector_writer is not None else VectorFile(self.vectors_path, self.embedding_dimension)
+                vector_writer = None
+                
+                state = IndexState(faiss_index, id_map, payload_store, raw_vectors, load_hashes(self.hashes_path))
+                state.refresh_deletion_filter()
+                self._state = state
+                self.build_stats = build_stats
+                self.sync_state = {"high_water_mark": high_water_mark, "appended_since_build": 0, "last_sync": time.time()}
+                if os.path.exists(self.metadata_path):
+                    os.remove(self.metadata_path)
                 self._save_faiss_index()
-                print("FAISS index saved successfully")
-            else:
-                print("No vectors found in Qdrant to build FAISS index")
+                self.payload_cache.clear()
+                self.index_version += 1
+                self._set_build_progress("completed", finished_at=time.time())
+                print(f"FAISS index and {len(self.payload_store)} payloads saved successfully")
+                return True
+                    
+            except Exception as e:
+                print(f"Error building FAISS index from {source}: {e}")
+                if payload_writer is not None:
+                    payload_writer.abort()
+                if vector_writer is not None:
+                    vector_writer.abort()
+                self._set_build_progress("failed", error=str(e), finished_at=time.time())
+                # Keep serving the current index; create an empty one only if there is none
+                if self.faiss_index is None:
+                    self._state = self._empty_state()
+                return False
+    
+    def _empty_state(self) -> IndexState:
+        """State with an empty flat index, used when there is nothing to load or build"""
+        return IndexState(faiss.IndexFlatIP(self.embedding_dimension), IdMap(self.ids_path),
+                          PayloadStore(self.payload_store_path), VectorFile(self.vectors_path, self.embedding_dimension))
+    
+    def _set_build_progress(self, stage: str, **fields):
+        """Record the stage of the running build (replacing the dict, so readers see a consistent copy)"""
+        status = stage if stage in ("completed", "failed") else "running"
+        self.build_progress = {**self.build_progress, "status": status, "stage": stage, **fields}
+    
+    def start_background_rebuild(self) -> bool:
+        """
+        Rebuild the index from Qdrant in a background thread
+        
+        Searches keep using the current index until the rebuilt one is swapped
+        in. Progress is reported by get_build_progress.
+        
+        Returns:
+            bool: False if a rebuild is already running
+        """
+        import time
+        
+        with self._rebuild_start_lock:
+            if self._rebuild_thread is not None and self._rebuild_thread.is_alive():
+                return False
+            self.build_progress = {"status": "queued", "stage": None, "queued_at": time.time()}
+            self._rebuild_thread = threading.Thread(target=self._build_faiss_from_qdrant,
+                                                    name=f"faiss-rebuild-{self.collection_name}", daemon=True)
+            self._rebuild_thread.start()
+            return True
+    
+    def get_build_progress(self) -> Dict[str, Any]:
+        """Get the status, stage and processed/total vectors of the current or last build"""
+        import time
+        
+        progress = dict(self.build_progress)
+        if progress.get("started_at") is not None:
+            progress["elapsed_seconds"] = progress.get("finished_at", time.time()) - progress["started_at"]
+        return progress
+    
+    def add_points(self, points: List[Any]) -> int:
+        """
+        Append Qdrant points to the live index without retraining or rebuilding
+        
+        Works for every index type: HNSW and flat indexes simply grow, IVF/PQ
+        indexes assign new vectors to their existing centroids. The points are
+        added to a copy of the index with extended payload and vector files,
+        which then replaces the current state, so running searches are not
+        affected. The index is saved.
+        
+        Args:
+            points: Qdrant points (or records) with id, vector and payload
+            
+        Returns:
+            int: Number of vectors added
+        """
+        with self._index_files_lock():
+            current = self._state
+            points = [point for point in points if point.vector]
+            if points:
+                known = current.id_map.contains(np.array([point.id for point in points], dtype=np.int64))
+                points = [point for point, is_known in zip(points, known) if not is_known]
+            if not points:
+                return 0
+            
+            vectors = np.array([point.vector for point in points], dtype=np.float32)
+            new_ids = np.array([point.id for point in points], dtype=np.int64)
+            
+            payload_writer = PayloadStoreWriter(self.payload_store_path)
+            vector_writer = VectorFileWriter(self.vectors_path, self.embedding_dimension) if self.rerank_factor else None
+            try:
+                payload_writer.append_store(current.payload_store)
+                payload_writer.append([point.payload for point in points])
+                if vector_writer is not None:
+                    vector_writer.append_file(current.raw_vectors)
+                    vector_writer.append(vectors)
                 
-        except Exception as e:
-            print(f"Error building FAISS index from Qdrant: {e}")
-            # Create empty index as fallback
-            self.faiss_index = faiss.IndexFlatIP(self.embedding_dimension)
+                faiss_index = self._writable_index_copy(current)
+                faiss_index.add(vectors)
+                id_map = IdMap(self.ids_path)
+                id_map.save(np.concatenate([np.asarray(current.id_map.ids), new_ids]))
+                save_hashes(self.hashes_path, np.concatenate([current.point_hashes, point_hashes(new_ids, vectors)]))
+                
+                state = IndexState(faiss_index, id_map, payload_writer.finalize(),
+                                   vector_writer.finalize() if vector_writer is not None else current.raw_vectors,
+                                   load_hashes(self.hashes_path))
+            except Exception:
+                payload_writer.abort()
+                if vector_writer is not None:
+                    vector_writer.abort()
+                raise
+            
+            state.refresh_deletion_filter()
+            self._state = state
+            self.sync_state["appended_since_build"] += len(points)
+            self.sync_state["high_water_mark"] = self._max_updated_at([point.payload for point in points], self.sync_state["high_water_mark"])
+            self._save_faiss_index()
+            self.index_version += 1
+            print(f"Added {len(points)} vectors to FAISS index (total: {faiss_index.ntotal})")
+            return len(points)
+    
+    def sync_with_qdrant(self) -> Dict[str, Any]:
+        """
+        Apply points added, updated or deleted in Qdrant since the last build or sync
+        
+        New and deleted points are found by comparing the Qdrant point IDs with
+        the id map (an ids-only scroll). Updated points are those whose payload
+        "updated_at" timestamp is above the stored high-water mark. Deleted and
+        updated points are tombstoned (their FAISS positions are excluded from
+        searches, since positions of a non-IDMap index cannot be removed without
+        renumbering), then updated and new points are appended with add_points.
+        Nothing is applied when the accumulated changes exceed max_drift of the
+        index, because tombstones and vectors added after training degrade it;
+        the caller should rebuild instead.
+        
+        Returns:
+            Dict with status ("up_to_date", "synced", "rebuild_required" or "offline") and change counts
+        """
+        import time
+        
+        if self.qdrant_client is None:
+            return {"status": "offline"}
+        
+        with self._index_files_lock():
+            start = time.time()
+            current = self._state
+            known_ids = np.asarray(current.id_map.ids)
+            known_ids = known_ids[known_ids >= 0]
+            qdrant_ids = np.array([point.id for points in self._scroll_qdrant(with_payload=False, with_vectors=False)
+                                   for point in points], dtype=np.int64)
+            
+            new_ids = np.setdiff1d(qdrant_ids, known_ids)
+            deleted_ids = np.setdiff1d(known_ids, qdrant_ids)
+            
+            high_water_mark = self.sync_state.get("high_water_mark")
+            updated_filter = Filter(must=[FieldCondition(key="updated_at", range=Range(gt=high_water_mark if high_water_mark is not None else 0.0))])
+            updated_points = [point for points in self._scroll_qdrant(with_payload=True, scroll_filter=updated_filter)
+                              for point in points]
+            # Points that are new to the index are fetched below with the other new points
+            updated_points = [point for point, is_known in
+                              zip(updated_points, current.id_map.contains(np.array([point.id for point in updated_points], dtype=np.int64)))
+                              if is_known]
+            
+            changes = len(new_ids) + len(deleted_ids) + len(updated_points)
+            live_count = len(known_ids) - len(deleted_ids) + len(new_ids)
+            drift = (len(current.id_map.tombstones) + self.sync_state.get("appended_since_build", 0) + changes) / max(1, live_count)
+            result = {
+                "new": len(new_ids),
+                "updated": len(updated_points),
+                "deleted": len(deleted_ids),
+                "drift": drift,
+                "scan_time_seconds": time.time() - start
+            }
+            print(f"Qdrant sync: {result['new']} new, {result['updated']} updated, {result['deleted']} deleted points "
+                  f"(drift {drift:.1%}, max {self.max_drift:.1%})")
+            
+            if changes == 0:
+                self.sync_state["last_sync"] = time.time()
+                return {"status": "up_to_date", **result}
+            if drift > self.max_drift:
+                return {"status": "rebuild_required", **result}
+            
+            # Retire the old positions of deleted and updated points, then append the current versions
+            stale_ids = np.concatenate([deleted_ids, np.array([point.id for point in updated_points], dtype=np.int64)])
+            state = IndexState(current.faiss_index, current.id_map.tombstone(current.id_map.to_positions(stale_ids)),
+                               current.payload_store, current.raw_vectors, current.point_hashes, current.index_mmapped)
+            state.refresh_deletion_filter()
+            self._state = state
+            
+            self.sync_state["last_sync"] = time.time()
+            added = self.add_points(updated_points + self._retrieve_points(new_ids))
+            if not added:
+                # Deletions only: add_points did not save the sync state
+                self._save_faiss_index()
+            self.payload_cache.clear()
+            self.index_version += 1
+            
+            result["sync_time_seconds"] = time.time() - start
+            print(f"Synced FAISS index with Qdrant in {result['sync_time_seconds']:.2f}s "
+                  f"({added} vectors added, {len(self.id_map.tombstones)} tombstones)")
+            return {"status": "synced", **result}
+    
+    def _retrieve_points(self, qdrant_ids: np.ndarray, batch_size: int = 1000) -> List[Any]:
+        """Fetch points with vectors and payloads by ID in batches"""
+        points = []
+        for start in range(0, len(qdrant_ids), batch_size):
+            points.extend(self.qdrant_client.retrieve(
+                collection_name=self.collection_name,
+                ids=[int(qdrant_id) for qdrant_id in qdrant_ids[start:start + batch_size]],
+                with_payload=True,
+                with_vectors=True
+            ))
+        return points
+    
+    @staticmethod
+    def _max_updated_at(payloads: List[Optional[Dict[str, Any]]], current: Optional[float]) -> Optional[float]:
+        """Highest "updated_at" timestamp among payloads and the current high-water mark"""
+        timestamps = [payload.get("updated_at") for payload in payloads if payload]
+        timestamps = [timestamp for timestamp in timestamps if isinstance(timestamp, (int, float))]
+        if current is not None:
+            timestamps.append(current)
+        return max(timestamps) if timestamps else None
+    
+    def _save_manifest(self):
+        """Write the manifest describing the current index contents"""
+        import time
+        
+        state = self._state
+        live_ids = np.asarray(state.id_map.ids)
+        self.manifest = {
+            "collection": self.collection_name,
+            "dimension": self.embedding_dimension,
+            "point_count": state.id_map.live_count(),
+            "content_hash": content_hash(state.point_hashes[live_ids >= 0]) if len(state.point_hashes) == len(live_ids) else None,
+            "index_factory": self.index_factory,
+            "effective_index_factory": self.build_stats.get("index_factory"),
+            "hnsw_ef_construction": self.build_stats.get("hnsw_ef_construction"),
+            "rerank_factor": self.rerank_factor,
+            "search_params": self.build_stats.get("search_params", {}),
+            "built_at": self.build_stats.get("built_at"),
+            "build_time_seconds": self.build_stats.get("build_time_seconds"),
+            "updated_at": time.time()
+        }
+        save_manifest(self.manifest_path, self.manifest)
     
     def _normalize_vector(self, vector: List[float]) -> np.ndarray:
         """Normalize vector for cosine similarity in FAISS"""
@@ -212,7 +1159,7 @@ class FaissFromQdrantDatabase:
     
     def search(self, query_embedding: List[float], top_k: int = 5) -> List[Tuple[FishSpecies, float]]:
         """
-        Search for similar fish embeddings using FAISS, retrieve metadata from Qdrant
+        Search for similar fish embeddings using FAISS, resolve metadata from the local payload store
         
         Args:
             query_embedding: Vector to search for
@@ -222,59 +1169,32 @@ class FaissFromQdrantDatabase:
             List[Tuple[FishSpecies, float]]: List of (fish_species, similarity_score) tuples
         """
         try:
-            if self.faiss_index.ntotal == 0:
+            # One consistent index state for the whole search, even if a rebuild swaps it meanwhile
+            state = self._state
+            if state.faiss_index.ntotal == 0:
                 print("FAISS index is empty")
                 return []
             
             # Normalize query vector
             normalized_query = self._normalize_vector(query_embedding)
             
-            # Search in FAISS
-            similarities, faiss_indices = self.faiss_index.search(normalized_query, top_k)
+            # Search in FAISS (with exact re-ranking for compressed indexes)
+            similarities, faiss_indices = self._search_index(state, normalized_query, top_k)
             
             # Get Qdrant IDs from FAISS results
-            qdrant_ids = []
-            valid_similarities = []
-            
-            for i, faiss_id in enumerate(faiss_indices[0]):
-                if faiss_id != -1:  # Valid result
-                    qdrant_id = self.faiss_id_to_qdrant_id.get(faiss_id)
-                    if qdrant_id is not None:
-                        qdrant_ids.append(qdrant_id)
-                        valid_similarities.append(similarities[0][i])
+            faiss_ids, qdrant_ids, valid_similarities = self._map_hits(state, faiss_indices[0], similarities[0])
             
             if not qdrant_ids:
                 return []
             
-            # Retrieve metadata from Qdrant
-            results = []
-            points = self.qdrant_client.retrieve(
-                collection_name=self.collection_name,
-                ids=qdrant_ids,
-                with_payload=True
-            )
-            
-            # Create results maintaining the order from FAISS
-            qdrant_points_dict = {point.id: point for point in points}
+            # Resolve metadata, maintaining the order from FAISS
+            species_list = self._fetch_species(state, faiss_ids, qdrant_ids)
             
-            for i, qdrant_id in enumerate(qdrant_ids):
-                if qdrant_id in qdrant_points_dict:
-                    point = qdrant_points_dict[qdrant_id]
-                    payload = point.payload
-                    
-                    fish_species = FishSpecies(
-                        fish_id=payload.get("id", 0),
-                        name=payload.get("name", ""),
-                        genus=payload.get("genus", ""),
-                        species=payload.get("species", ""),
-                        full_description=payload.get("full_description", ""),
-                        fbname=payload.get("fbname", "")
-                    )
-                    
-                    similarity_score = valid_similarities[i]
-                    results.append((fish_species, similarity_score))
-            
-            return results
+            return [
+                (fish_species, valid_similarities[i])
+                for i, fish_species in enumerate(species_list)
+                if fish_species is not None
+            ]
             
         except Exception as e:
             print(f"Error searching embeddings: {e}")
@@ -298,7 +1218,9 @@ class FaissFromQdrantDatabase:
         total_start = time.time()
         
         try:
-            if self.faiss_index.ntotal == 0:
+            # One consistent index state for the whole search, even if a rebuild swaps it meanwhile
+            state = self._state
+            if state.faiss_index.ntotal == 0:
                 print("FAISS index is empty")
                 return [], {"total_time": 0.0, "error": "empty_index"}
             
@@ -309,54 +1231,38 @@ class FaissFromQdrantDatabase:
             
             # 2. FAISS index search timing
             faiss_search_start = time.time()
-            similarities, faiss_indices = self.faiss_index.search(normalized_query, top_k)
-            timing_info['faiss_index_search'] = time.time() - faiss_search_start
+            if self._rerank_enabled(state):
+                _, candidates = state.index_search(normalized_query, top_k * self.rerank_factor)
+                timing_info['faiss_index_search'] = time.time() - faiss_search_start
+                
+                # 2b. Exact re-ranking of the candidates with full vectors
+                rerank_start = time.time()
+                similarities, faiss_indices = self._rerank(state.raw_vectors, normalized_query, candidates, top_k)
+                timing_info['exact_rerank'] = time.time() - rerank_start
+            else:
+                similarities, faiss_indices = state.index_search(normalized_query, top_k)
+                timing_info['faiss_index_search'] = time.time() - faiss_search_start
             
             # 3. ID mapping and preparation timing
             mapping_start = time.time()
-            qdrant_ids = []
-            valid_similarities = []
-            
-            for i, faiss_id in enumerate(faiss_indices[0]):
-                if faiss_id != -1:  # Valid result
-                    qdrant_id = self.faiss_id_to_qdrant_id.get(faiss_id)
-                    if qdrant_id is not None:
-                        qdrant_ids.append(qdrant_id)
-                        valid_similarities.append(similarities[0][i])
+            faiss_ids, qdrant_ids, valid_similarities = self._map_hits(state, faiss_indices[0], similarities[0])
             timing_info['id_mapping_preparation'] = time.time() - mapping_start
             
             if not qdrant_ids:
                 timing_info['total_time'] = time.time() - total_start
                 return [], timing_info
             
-            # 4. Qdrant metadata retrieval timing
-            qdrant_retrieval_start = time.time()
-            points = self.qdrant_client.retrieve(
-                collection_name=self.collection_name,
-                ids=qdrant_ids,
-                with_payload=True
-            )
-            timing_info['qdrant_metadata_retrieval'] = time.time() - qdrant_retrieval_start
+            # 4. Metadata retrieval timing (local payload store, Qdrant only as fallback)
+            metadata_retrieval_start = time.time()
+            species_list = self._fetch_species(state, faiss_ids, qdrant_ids)
+            timing_info['metadata_retrieval'] = time.time() - metadata_retrieval_start
             
             # 5. Result processing and object creation timing
             result_processing_start = time.time()
             results = []
-            qdrant_points_dict = {point.id: point for point in points}
             
-            for i, qdrant_id in enumerate(qdrant_ids):
-                if qdrant_id in qdrant_points_dict:
-                    point = qdrant_points_dict[qdrant_id]
-                    payload = point.payload
-                    
-                    fish_species = FishSpecies(
-                        fish_id=payload.get("id", 0),
-                        name=payload.get("name", ""),
-                        genus=payload.get("genus", ""),
-                        species=payload.get("species", ""),
-                        full_description=payload.get("full_description", ""),
-                        fbname=payload.get("fbname", "")
-                    )
-                    
+            for i, fish_species in enumerate(species_list):
+                if fish_species is not None:
                     similarity_score = float(valid_similarities[i])
                     results.append((fish_species, similarity_score))
             
@@ -366,7 +1272,7 @@ class FaissFromQdrantDatabase:
             # Additional statistics
             timing_info['results_count'] = len(results)
             timing_info['qdrant_ids_found'] = len(qdrant_ids)
-            timing_info['faiss_vectors_searched'] = self.faiss_index.ntotal
+            timing_info['faiss_vectors_searched'] = state.faiss_index.ntotal
             
             return results, timing_info
             
@@ -378,6 +1284,176 @@ class FaissFromQdrantDatabase:
             import traceback
             print(f"Full traceback: {traceback.format_exc()}")
             return [], timing_info
+
+    def search_batch(self, queries: np.ndarray, top_k: int = 5) -> Tuple[List[List[Tuple[FishSpecies, float]]], Dict[str, float]]:
+        """
+        Search many query vectors with a single FAISS call
+
+        All hits are mapped to Qdrant IDs in one vectorized lookup, and the
+        payloads of the distinct hits are resolved once for the whole batch.
+
+        Args:
+            queries: (n, d) matrix of query vectors
+            top_k: Number of top results to return per query
+
+        Returns:
+            Tuple[List[List[Tuple[FishSpecies, float]]], Dict[str, float]]:
+                (per-query lists of (fish_species, similarity_score), timing_info)
+        """
+        import time
+
+        timing_info = {}
+        total_start = time.time()
+
+        queries = np.ascontiguousarray(queries, dtype=np.float32)
+        if queries.ndim != 2 or queries.shape[1] != self.embedding_dimension:
+            raise ValueError(f"Expected queries of shape (n, {self.embedding_dimension}), got {queries.shape}")
+
+        # One consistent index state for the whole batch, even if a rebuild swaps it meanwhile
+        state = self._state
+        if state.faiss_index.ntotal == 0 or len(queries) == 0:
+            return [[] for _ in range(len(queries))], {"total_time": time.time() - total_start}
+
+        # 1. One FAISS search for all queries (with exact re-ranking for compressed indexes)
+        faiss_search_start = time.time()
+        similarities, faiss_indices = self._search_index(state, queries, top_k)
+        timing_info['faiss_index_search'] = time.time() - faiss_search_start
+
+        # 2. Map all hits at once and deduplicate them across queries
+        mapping_start = time.time()
+        qdrant_ids = state.id_map.to_qdrant(faiss_indices)
+        valid = qdrant_ids >= 0
+        unique_ids, first = np.unique(qdrant_ids[valid], return_index=True)
+        unique_positions = faiss_indices[valid][first]
+        timing_info['id_mapping_preparation'] = time.time() - mapping_start
+
+        # 3. One payload lookup for the distinct hits
+        metadata_retrieval_start = time.time()
+        species_list = self._fetch_species(state, unique_positions.tolist(), unique_ids.tolist())
+        species_by_id = dict(zip(unique_ids.tolist(), species_list))
+        timing_info['metadata_retrieval'] = time.time() - metadata_retrieval_start
+
+        # 4. Per-query results in FAISS order
+        result_processing_start = time.time()
+        results = []
+        for row_ids, row_similarities, row_valid in zip(qdrant_ids.tolist(), similarities.tolist(), valid):
+            row = []
+            for qdrant_id, similarity, is_valid in zip(row_ids, row_similarities, row_valid):
+                fish_species = species_by_id.get(qdrant_id) if is_valid else None
+                if fish_species is not None:
+                    row.append((fish_species, float(similarity)))
+            results.append(row)
+        timing_info['result_processing'] = time.time() - result_processing_start
+
+        timing_info['total_time'] = time.time() - total_start
+        timing_info['queries'] = len(queries)
+        timing_info['unique_hits'] = len(unique_ids)
+        timing_info['per_query_ms'] = timing_info['total_time'] * 1000 / len(queries)
+        return results, timing_info
+
+    def _map_hits(self, state: IndexState, faiss_indices: np.ndarray, similarities: np.ndarray) -> Tuple[List[int], List[int], List[float]]:
+        """
+        Map one query's FAISS hits to Qdrant IDs, dropping padding and unknown positions
+        
+        Args:
+            state: Index state that was searched
+            faiss_indices: FAISS positions returned for the query (-1 for no hit)
+            similarities: Scores of the same hits
+            
+        Returns:
+            Tuple of (FAISS positions, Qdrant IDs, similarities) of the valid hits
+        """
+        qdrant_ids = state.id_map.to_qdrant(faiss_indices)
+        valid = qdrant_ids >= 0
+        return faiss_indices[valid].tolist(), qdrant_ids[valid].tolist(), similarities[valid].tolist()
+    
+    def _rerank_enabled(self, state: IndexState) -> bool:
+        """Check whether searches of a state re-rank candidates with full vectors"""
+        return bool(self.rerank_factor) and state.raw_vectors.is_loaded() and len(state.raw_vectors) == state.faiss_index.ntotal
+    
+    def _search_index(self, state: IndexState, queries: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Search the FAISS index of a state, re-ranking rerank_factor * top_k candidates exactly when enabled"""
+        if not self._rerank_enabled(state):
+            return state.index_search(queries, top_k)
+        _, candidates = state.index_search(queries, top_k * self.rerank_factor)
+        return self._rerank(state.raw_vectors, queries, candidates, top_k)
+    
+    @staticmethod
+    def _rerank(raw_vectors: VectorFile, queries: np.ndarray, candidates: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Re-score candidate positions with exact inner products of the full vectors
+        
+        Args:
+            raw_vectors: Full vectors in FAISS position order
+            queries: (n, d) query matrix
+            candidates: (n, c) FAISS positions from the compressed index (-1 for padding)
+            top_k: Number of results to keep per query
+            
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (similarities, positions) of shape (n, top_k), like faiss search
+        """
+        valid = candidates >= 0
+        vectors = raw_vectors.take(np.where(valid, candidates, 0))
+        scores = np.einsum('nd,ncd->nc', queries, vectors)
+        scores[~valid] = -np.inf
+        
+        order = np.argsort(-scores, axis=1)[:, :top_k]
+        similarities = np.take_along_axis(scores, order, axis=1)
+        positions = np.take_along_axis(candidates, order, axis=1)
+        positions[np.isinf(similarities)] = -1
+        return similarities, positions
+    
+    def _fetch_species(self, state: IndexState, faiss_ids: List[int], qdrant_ids: List[int]) -> List[Optional[FishSpecies]]:
+        """
+        Resolve FishSpecies for search hits
+        
+        Cached payloads are returned directly. Cache misses are read from the
+        local payload store, or, when the store is not available, fetched from
+        Qdrant in a single batched retrieve.
+        
+        Args:
+            state: Index state that was searched
+            faiss_ids: FAISS positions of the hits
+            qdrant_ids: Qdrant point IDs of the same hits
+            
+        Returns:
+            List[Optional[FishSpecies]]: Species in hit order, None where no payload was found
+        """
+        resolved, missing = self.payload_cache.get_many(qdrant_ids)
+        
+        if missing:
+            fetched = {}
+            if state.payload_store.is_loaded():
+                missing_set = set(missing)
+                for faiss_id, qdrant_id in zip(faiss_ids, qdrant_ids):
+                    if qdrant_id in missing_set:
+                        fish_species = state.payload_store.get(faiss_id)
+                        if fish_species is not None:
+                            fetched[qdrant_id] = fish_species
+            elif self.qdrant_client is not None:
+                points = self.qdrant_client.retrieve(
+                    collection_name=self.collection_name,
+                    ids=list(dict.fromkeys(missing)),
+                    with_payload=True
+                )
+                fetched = {point.id: self._species_from_payload(point.payload) for point in points}
+            
+            self.payload_cache.put_many(fetched)
+            resolved.update(fetched)
+        
+        return [resolved.get(qdrant_id) for qdrant_id in qdrant_ids]
+    
+    @staticmethod
+    def _species_from_payload(payload: Dict[str, Any]) -> FishSpecies:
+        """Create a FishSpecies from a Qdrant payload"""
+        return FishSpecies(
+            fish_id=payload.get("id", 0),
+            name=payload.get("name", ""),
+            genus=payload.get("genus", ""),
+            species=payload.get("species", ""),
+            full_description=payload.get("full_description", ""),
+            fbname=payload.get("fbname", "")
+        )
     
     def search_qdrant_only(self, query_embedding: List[float], top_k: int = 5) -> List[FishSpecies]:
         """
@@ -400,16 +1476,7 @@ class FaissFromQdrantDatabase:
             
             results = []
             for hit in search_result:
-                payload = hit.payload
-                fish_species = FishSpecies(
-                    fish_id=payload.get("id", 0),
-                    name=payload.get("name", ""),
-                    genus=payload.get("genus", ""),
-                    species=payload.get("species", ""),
-                    full_description=payload.get("full_description", ""),
-                    fbname=payload.get("fbname", "")
-                )
-                results.append(fish_species)
+                results.append(self._species_from_payload(hit.payload))
             
             return results
             
@@ -448,16 +1515,7 @@ class FaissFromQdrantDatabase:
             result_processing_start = time.time()
             results = []
             for hit in search_result:
-                payload = hit.payload
-                fish_species = FishSpecies(
-                    fish_id=payload.get("id", 0),
-                    name=payload.get("name", ""),
-                    genus=payload.get("genus", ""),
-                    species=payload.get("species", ""),
-                    full_description=payload.get("full_description", ""),
-                    fbname=payload.get("fbname", "")
-                )
-                results.append(fish_species)
+                results.append(self._species_from_payload(hit.payload))
             timing_info['result_processing'] = time.time() - result_processing_start
             
             timing_info['total_time'] = time.time() - total_start
@@ -472,25 +1530,133 @@ class FaissFromQdrantDatabase:
             print(f"Error searching Qdrant: {e}")
             return [], timing_info
     
-    def rebuild_faiss_index(self):
-        """Manually rebuild FAISS index from current Qdrant data"""
+    def rebuild_faiss_index(self) -> bool:
+        """Manually rebuild FAISS index from current Qdrant data (blocks until done, see start_background_rebuild)"""
         print("Manually rebuilding FAISS index from Qdrant...")
-        self._build_faiss_from_qdrant()
+        return self._build_faiss_from_qdrant()
+    
+    def _read_index(self, mmap: bool) -> Tuple[faiss.Index, bool]:
+        """
+        Read the saved FAISS index, memory-mapped or fully into the heap
+        
+        The mmap path maps vector codes / inverted lists read-only from the file
+        (IO_FLAG_MMAP_IFC where available, IO_FLAG_MMAP otherwise) and falls back
+        to a full load if the index type does not support it.
+        
+        Args:
+            mmap: Whether to try memory-mapping the index
+            
+        Returns:
+            Tuple[faiss.Index, bool]: (loaded index, whether it is memory-mapped)
+        """
+        import time
+        
+        start = time.time()
+        rss_before = _resident_memory_bytes()
+        index = None
+        
+        if mmap:
+            mmap_flags = (faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY) if hasattr(faiss, "IO_FLAG_MMAP_IFC") else faiss.IO_FLAG_MMAP
+            try:
+                index = faiss.read_index(self.faiss_index_path, mmap_flags)
+            except Exception as e:
+                print(f"Memory-mapped load not supported for this index ({e}), loading fully")
+        
+        mmapped = index is not None
+        if index is None:
+            index = faiss.read_index(self.faiss_index_path)
+        
+        rss_after = _resident_memory_bytes()
+        self.load_stats = {
+            "mode": "mmap" if mmapped else "full",
+            "load_time_seconds": time.time() - start,
+            "rss_increase_bytes": rss_after - rss_before if rss_before is not None and rss_after is not None else None,
+            "index_file_bytes": os.path.getsize(self.faiss_index_path)
+        }
+        print(f"Loaded FAISS index ({self.load_stats['mode']}) in {self.load_stats['load_time_seconds'] * 1000:.1f} ms")
+        return index, mmapped
+    
+    def _writable_index_copy(self, state: IndexState) -> faiss.Index:
+        """
+        Copy the index of a state so it can be modified while the original keeps serving searches
+        
+        A memory-mapped (read-only) index is re-read fully from its file, any
+        other index is cloned in memory.
+        """
+        if not state.index_mmapped:
+            return faiss.clone_index(state.faiss_index)
+        print("Loading FAISS index fully before modifying it...")
+        faiss_index, _ = self._read_index(mmap=False)
+        params = load_params(self.params_path) or {}
+        apply_search_params(faiss_index, self.search_params or params.get("search_params", {}))
+        return faiss_index
+    
+    def compare_load_modes(self, repeats: int = 3) -> Dict[str, Any]:
+        """
+        Compare startup cost of memory-mapped versus full loading of the saved index
+        
+        Args:
+            repeats: Loads per mode; the fastest time is reported
+            
+        Returns:
+            Dict with load time and resident-memory increase per mode
+        """
+        import time
+        
+        report = {"index_file_bytes": os.path.getsize(self.faiss_index_path)}
+        modes = {"full": 0}
+        if self.mmap_index:
+            modes["mmap"] = (faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY) if hasattr(faiss, "IO_FLAG_MMAP_IFC") else faiss.IO_FLAG_MMAP
+        
+        for mode, flags in modes.items():
+            times = []
+            rss_increase = None
+            for _ in range(repeats):
+                rss_before = _resident_memory_bytes()
+                start = time.time()
+                try:
+                    index = faiss.read_index(self.faiss_index_path, flags)
+                except Exception as e:
+                    report[mode] = {"error": str(e)}
+                    break
+                times.append(time.time() - start)
+                rss_after = _resident_memory_bytes()
+                # Only the first load is meaningful: later ones reuse heap pages freed by the previous one
+                if rss_increase is None and rss_before is not None and rss_after is not None:
+                    rss_increase = rss_after - rss_before
+                del index
+            else:
+                report[mode] = {"load_time_seconds": min(times), "rss_increase_bytes": rss_increase}
+        
+        print("FAISS index load report:")
+        for mode in modes:
+            entry = report[mode]
+            if "error" in entry:
+                print(f"   {mode}: not supported ({entry['error']})")
+            else:
+                rss = entry["rss_increase_bytes"]
+                rss_text = f"{rss / (1024 * 1024):.1f} MB resident" if rss is not None else "resident size unknown"
+                print(f"   {mode}: {entry['load_time_seconds'] * 1000:.1f} ms, {rss_text}")
+        return report
     
     def _save_faiss_index(self):
-        """Save FAISS index and mappings to disk"""
+        """Save FAISS index and search parameters to disk (the id mapping is saved by IdMap.save)"""
         try:
-            # Save FAISS index
-            faiss.write_index(self.faiss_index, self.faiss_index_path)
-            
-            # Save mappings
-            mappings = {
-                'faiss_id_to_qdrant_id': self.faiss_id_to_qdrant_id,
-                'qdrant_id_to_faiss_id': self.qdrant_id_to_faiss_id
-            }
+            # Save FAISS index to a temp file and rename it over the old one, so processes that
+            # memory-mapped the previous file keep reading a consistent (unlinked) copy
+            tmp_path = unique_tmp_path(self.faiss_index_path)
+            faiss.write_index(self.faiss_index, tmp_path)
+            os.replace(tmp_path, self.faiss_index_path)
+            self._files_signature = self._saved_files_signature()
             
-            with open(self.metadata_path, 'wb') as f:
-                pickle.dump(mappings, f)
+            # Save the configured factory string and chosen search parameters
+            save_params(self.params_path, {
+                "index_factory": self.index_factory,
+                "search_params": self.build_stats.get("search_params", {}),
+                "build_stats": self.build_stats,
+                "sync_state": self.sync_state
+            })
+            self._save_manifest()
             
             print(f"Saved FAISS index with {self.faiss_index.ntotal} vectors to: {self.faiss_index_path}")
             
@@ -505,6 +1671,23 @@ class FaissFromQdrantDatabase:
         except:
             return 0
     
+    def get_index_info(self) -> Dict[str, Any]:
+        """Get local index information without contacting Qdrant"""
+        return {
+            "faiss_vectors": self.faiss_index.ntotal if self.faiss_index else 0,
+            "index_factory": self.index_factory,
+            "index_version": self.index_version,
+            "mmapped": self.index_mmapped,
+            "tombstones": len(self.id_map.tombstones),
+            "sync": self.sync_state,
+            "manifest": self.manifest,
+            "offline": self.qdrant_client is None,
+            "snapshot": self.snapshot.meta if self.snapshot is not None else None,
+            "rebuild": self.get_build_progress(),
+            "load": self.load_stats,
+            "build": self.build_stats
+        }
+    
     def get_stats(self) -> Dict[str, Any]:
         """Get database statistics"""
         try:
@@ -518,7 +1701,17 @@ class FaissFromQdrantDatabase:
             "faiss_vectors": self.faiss_index.ntotal if self.faiss_index else 0,
             "qdrant_collection": self.collection_name,
             "faiss_index_path": self.faiss_index_path,
-            "index_synchronized": qdrant_count == (self.faiss_index.ntotal if self.faiss_index else 0)
+            "payload_store_entries": len(self.payload_store),
+            "index_file_bytes": os.path.getsize(self.faiss_index_path) if os.path.exists(self.faiss_index_path) else 0,
+            "rerank_factor": self.rerank_factor if self._rerank_enabled(self._state) else 0,
+            "index_load": self.load_stats,
+            "payload_cache": self.payload_cache.get_stats(),
+            "index_version": self.index_version,
+            "build_stats": self.build_stats,
+            "tombstones": len(self.id_map.tombstones),
+            "sync_state": self.sync_state,
+            "manifest": self.manifest,
+            "index_synchronized": qdrant_count == (self.id_map.live_count() if self.faiss_index else 0)
         }
     
     def benchmark_search(self, query_embedding: List[float], top_k: int = 5) -> Dict[str, Any]:
@@ -541,5 +1734,5 @@ class FaissFromQdrantDatabase:
             "speedup": qdrant_time / faiss_time if faiss_time > 0 else float('inf'),
             "faiss_results_count": len(faiss_results),
             "qdrant_results_count": len(qdrant_results),
-            "note": "FAISS time includes metadata retrieval from Qdrant"
+            "note": "FAISS time includes metadata retrieval from the local payload store"
         } 
\ No newline at end of file
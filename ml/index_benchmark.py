@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Compare FAISS index types for the fish text embeddings on latency and recall
+
+Every index is built over the same vectors and searched with the same held-out
+queries (sampled vectors that are removed from the database). Recall@k is
+measured against an exact IndexFlatIP search.
+
+Usage:
+    # Vectors scrolled from the Qdrant collection
+    python index_benchmark.py --collection fish_embeddings_20250627_102709
+
+    # Vectors from a local float32 .npy matrix, custom index types
+    python index_benchmark.py --vectors fish_vectors.npy --indexes Flat IVF256,Flat HNSW32 HNSW64
+
+An index spec may pin its search parameters instead of auto-tuning them, e.g.
+"IVF256,Flat:nprobe=3" (the previous production setting) or "HNSW32:efSearch=64".
+"""
+
+import argparse
+import json
+import os
+import statistics
+import time
+from typing import Any, Dict, List, Tuple
+
+import faiss
+import numpy as np
+from dotenv import load_dotenv
+
+from index_tuning import (scale_factory_string, create_index, set_ef_construction, apply_search_params,
+                          recall_at_k, autotune)
+
+# Load environment variables
+load_dotenv()
+
+
+def load_vectors_from_qdrant(collection_name: str, batch_size: int = 1000) -> np.ndarray:
+    """
+    Scroll all vectors of a Qdrant collection into a float32 matrix
+
+    Args:
+        collection_name: Qdrant collection
+        batch_size: Scroll page size
+
+    Returns:
+        np.ndarray: (n, d) float32 matrix
+    """
+    from qdrant_client import QdrantClient
+
+    client = QdrantClient(url=os.getenv("QDRANT_URL"), api_key=os.getenv("QDRANT_API_KEY"))
+    vectors = []
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection_name,
+            limit=batch_size,
+            offset=offset,
+            with_payload=False,
+            with_vectors=True
+        )
+        vectors.extend(point.vector for point in points if point.vector)
+        print(f"📥 Loaded {len(vectors)} vectors...", end="\r")
+        if offset is None or not points:
+            break
+    print()
+    return np.array(vectors, dtype=np.float32)
+
+
+def parse_index_spec(spec: str) -> Tuple[str, Dict[str, int]]:
+    """Split "FACTORY[:param=value,...]" into a factory string and fixed search parameters"""
+    index_factory, _, params = spec.partition(":")
+    search_params = {}
+    for item in filter(None, params.split(",")):
+        name, _, value = item.partition("=")
+        search_params[name.strip()] = int(value)
+    return index_factory, search_params
+
+
+def benchmark_index(spec: str, database: np.ndarray, queries: np.ndarray, exact_ids: np.ndarray,
+                    target_recall: float, ef_construction: int) -> Dict[str, Any]:
+    """
+    Build one index, auto-tune (or pin) its search parameters and time single-query searches
+
+    Args:
+        spec: FAISS factory string, optionally followed by ":param=value,..." to skip auto-tuning
+        database: (n, d) vectors to index
+        queries: (q, d) held-out queries
+        exact_ids: (q, k) exact neighbours of the queries
+        target_recall: Recall@k the auto-tuner aims for
+        ef_construction: HNSW construction depth
+
+    Returns:
+        Dict with build time, index size, tuned parameters, recall and latency percentiles
+    """
+    k = exact_ids.shape[1]
+    index_factory, search_params = parse_index_spec(spec)
+    effective_factory = scale_factory_string(index_factory, len(database))
+    index = create_index(effective_factory, database.shape[1])
+    set_ef_construction(index, ef_construction)
+
+    start = time.perf_counter()
+    if not index.is_trained:
+        index.train(database)
+    index.add(database)
+    build_time = time.perf_counter() - start
+
+    if search_params:
+        apply_search_params(index, search_params)
+        tuning = {"search_params": search_params, "sweep": []}
+    else:
+        tuning = autotune(index, queries, exact_ids, target_recall=target_recall)
+
+    # One query at a time, as the API serves them
+    latencies = []
+    found = []
+    for query in queries:
+        start = time.perf_counter()
+        _, ids = index.search(query.reshape(1, -1), k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        found.append(ids[0])
+    latencies.sort()
+
+    return {
+        "index_factory": effective_factory,
+        "build_time_seconds": build_time,
+        "index_size_mb": faiss.serialize_index(index).nbytes / (1024 * 1024),
+        "search_params": tuning["search_params"],
+        f"recall_at_{k}": recall_at_k(np.array(found), exact_ids),
+        "latency_p50_ms": statistics.median(latencies),
+        "latency_p95_ms": latencies[int(len(latencies) * 0.95) - 1] if len(latencies) >= 20 else latencies[-1],
+        "tuning_sweep": tuning["sweep"]
+    }
+
+
+def run_benchmark(vectors: np.ndarray, index_specs: List[str], num_queries: int = 200, top_k: int = 5,
+                  target_recall: float = 0.95, ef_construction: int = 200) -> Dict[str, Any]:
+    """
+    Benchmark several index types on the same data
+
+    Args:
+        vectors: (n, d) float32 vectors
+        index_specs: Index specs to compare (see parse_index_spec)
+        num_queries: Number of held-out query vectors
+        top_k: Number of neighbours per query
+        target_recall: Recall@k the auto-tuner aims for
+        ef_construction: HNSW construction depth
+
+    Returns:
+        Dict with per-index results
+    """
+    rng = np.random.default_rng(0)
+    query_rows = rng.choice(len(vectors), size=min(num_queries, len(vectors) // 10), replace=False)
+    mask = np.ones(len(vectors), dtype=bool)
+    mask[query_rows] = False
+    queries = np.ascontiguousarray(vectors[query_rows])
+    database = np.ascontiguousarray(vectors[mask])
+
+    exact = faiss.IndexFlatIP(vectors.shape[1])
+    exact.add(database)
+    _, exact_ids = exact.search(queries, top_k)
+
+    print(f"📊 {len(database)} vectors x {database.shape[1]}d, {len(queries)} held-out queries, top_k={top_k}")
+
+    results = {}
+    for spec in index_specs:
+        print(f"🔨 Building {spec}...")
+        result = benchmark_index(spec, database, queries, exact_ids, target_recall, ef_construction)
+        results[spec] = result
+        print(f"   build {result['build_time_seconds']:.2f}s | size {result['index_size_mb']:.1f} MB | "
+              f"params {result['search_params'] or '-'} | recall@{top_k} {result[f'recall_at_{top_k}']:.3f} | "
+              f"p50 {result['latency_p50_ms']:.3f} ms | p95 {result['latency_p95_ms']:.3f} ms")
+
+    return {
+        "vectors": len(database),
+        "dimension": int(database.shape[1]),
+        "queries": len(queries),
+        "top_k": top_k,
+        "target_recall": target_recall,
+        "results": results
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare FAISS index types on latency and recall')
+    parser.add_argument('--collection', type=str, default="fish_embeddings_20250627_102709",
+                        help='Qdrant collection to read vectors from')
+    parser.add_argument('--vectors', type=str, default=None,
+                        help='Read vectors from a float32 .npy file instead of Qdrant')
+    parser.add_argument('--indexes', nargs='+', default=["Flat", "IVF256,Flat:nprobe=3", "IVF256,Flat", "HNSW32"],
+                        help='Index specs to compare (default: Flat IVF256,Flat:nprobe=3 IVF256,Flat HNSW32)')
+    parser.add_argument('--queries', type=int, default=200, help='Number of held-out queries (default: 200)')
+    parser.add_argument('--top-k', type=int, default=5, help='Neighbours per query (default: 5)')
+    parser.add_argument('--target-recall', type=float, default=0.95,
+                        help='Recall@k used to auto-tune nprobe/efSearch (default: 0.95)')
+    parser.add_argument('--ef-construction', type=int, default=200, help='HNSW efConstruction (default: 200)')
+    parser.add_argument('--output', type=str, default=None, help='Save results as JSON')
+
+    args = parser.parse_args()
+
+    if args.vectors:
+        vectors = np.load(args.vectors).astype(np.float32, copy=False)
+    else:
+        vectors = load_vectors_from_qdrant(args.collection)
+
+    if len(vectors) < 20:
+        parser.error(f"Need at least 20 vectors, got {len(vectors)}")
+
+    results = run_benchmark(vectors, args.indexes, num_queries=args.queries, top_k=args.top_k,
+                            target_recall=args.target_recall, ef_construction=args.ef_construction)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
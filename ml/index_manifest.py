@@ -0,0 +1,93 @@
+"""
+Content manifest of a FAISS index built from a Qdrant collection
+
+The manifest records which collection an index was built from, its
+dimension, point count and build parameters, plus a content hash of every
+(point ID, vector) pair. Each point is hashed separately (64-bit BLAKE2b)
+and the content hash is the sum of the per-point hashes modulo 2^64, so it
+does not depend on scroll order and can be updated as points are added or
+removed without rehashing the collection. The per-point hashes are kept in
+FAISS position order in a ``.npy`` file next to the index, which also allows
+spot-checking a random sample of points against Qdrant at startup.
+"""
+
+import hashlib
+import os
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from index_tuning import save_params, load_params
+from payload_store import unique_tmp_path
+
+
+def point_hashes(ids: np.ndarray, vectors: np.ndarray) -> np.ndarray:
+    """
+    Hash each (Qdrant ID, float32 vector) pair
+
+    Args:
+        ids: (n,) int64 Qdrant point IDs
+        vectors: (n, d) vectors of the same points
+
+    Returns:
+        np.ndarray: (n,) uint64 hashes
+    """
+    ids = np.ascontiguousarray(ids, dtype=np.int64)
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    hashes = np.empty(len(ids), dtype=np.uint64)
+    for i in range(len(ids)):
+        digest = hashlib.blake2b(ids[i].tobytes(), digest_size=8)
+        digest.update(vectors[i].tobytes())
+        hashes[i] = int.from_bytes(digest.digest(), "little")
+    return hashes
+
+
+def content_hash(hashes: np.ndarray) -> str:
+    """Order-independent hash of a set of points: the sum of their hashes modulo 2^64, as hex"""
+    return f"{int(np.sum(hashes, dtype=np.uint64)):016x}"
+
+
+def save_hashes(path: str, hashes: np.ndarray) -> None:
+    """Atomically write per-point hashes in FAISS position order"""
+    tmp_path = unique_tmp_path(path)
+    with open(tmp_path, 'wb') as f:
+        np.save(f, np.ascontiguousarray(hashes, dtype=np.uint64))
+    os.replace(tmp_path, path)
+
+
+def load_hashes(path: str) -> np.ndarray:
+    """Memory-map per-point hashes written by save_hashes (empty if missing or unreadable)"""
+    try:
+        return np.load(path, mmap_mode='r')
+    except (OSError, ValueError):
+        return np.empty(0, dtype=np.uint64)
+
+
+def save_manifest(path: str, manifest: Dict[str, Any]) -> None:
+    """Write the manifest as JSON next to the index"""
+    save_params(path, manifest)
+
+
+def load_manifest(path: str) -> Optional[Dict[str, Any]]:
+    """Read a manifest written by save_manifest, or None if missing or unreadable"""
+    return load_params(path)
+
+
+def manifest_differences(manifest: Optional[Dict[str, Any]], expected: Dict[str, Any]) -> List[str]:
+    """
+    Compare a saved manifest with the values it should have
+
+    Args:
+        manifest: Saved manifest (None if there is none)
+        expected: Field -> expected value; None values are not compared
+
+    Returns:
+        List[str]: One description per differing field (empty if the manifest matches)
+    """
+    if manifest is None:
+        return ["no manifest"]
+    return [
+        f"{field}: {manifest.get(field)!r} != {value!r}"
+        for field, value in expected.items()
+        if value is not None and manifest.get(field) != value
+    ]
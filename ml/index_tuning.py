@@ -0,0 +1,296 @@
+"""
+FAISS index construction and search-parameter auto-tuning
+
+Indexes are described by FAISS factory strings (e.g. "IVF256,Flat",
+"IVF1024,PQ64", "HNSW32", "Flat"). The auto-tuner sweeps the query-time knob
+of the index (nprobe for IVF, efSearch for HNSW) on a set of sample queries
+and keeps the cheapest setting that reaches a target recall@k against exact
+search.
+"""
+
+import json
+import os
+import re
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import faiss
+import numpy as np
+
+from payload_store import unique_tmp_path
+
+# k-means needs ~39 training points per centroid to give stable clusters
+MIN_POINTS_PER_CENTROID = 39
+
+
+def scale_factory_string(index_factory: str, n_train: int) -> str:
+    """
+    Clamp the number of IVF lists in a factory string to what the training sample supports
+
+    Args:
+        index_factory: FAISS factory string
+        n_train: Number of available training vectors
+
+    Returns:
+        str: Factory string with IVF<n> reduced if needed
+    """
+    def clamp(match):
+        nlist = int(match.group(1))
+        return f"IVF{max(1, min(nlist, n_train // MIN_POINTS_PER_CENTROID))}"
+
+    return re.sub(r"IVF(\d+)", clamp, index_factory)
+
+
+def create_index(index_factory: str, dimension: int) -> faiss.Index:
+    """Create an inner-product index from a factory string"""
+    return faiss.index_factory(dimension, index_factory, faiss.METRIC_INNER_PRODUCT)
+
+
+def set_ef_construction(index: faiss.Index, ef_construction: int) -> bool:
+    """
+    Set the HNSW graph construction depth of an index before vectors are added
+
+    Args:
+        index: FAISS index
+        ef_construction: Candidate list size used while inserting vectors
+
+    Returns:
+        bool: True if the index is HNSW and the value was set
+    """
+    hnsw_index = faiss.downcast_index(index)
+    if not isinstance(hnsw_index, faiss.IndexHNSW):
+        return False
+    hnsw_index.hnsw.efConstruction = ef_construction
+    return True
+
+
+def candidate_search_params(index: faiss.Index) -> Dict[str, List[int]]:
+    """
+    Get the query-time parameters of an index and the values worth trying, cheapest first
+
+    Args:
+        index: FAISS index
+
+    Returns:
+        Dict mapping parameter name to candidate values (empty for exact indexes)
+    """
+    candidates = {}
+
+    try:
+        ivf = faiss.extract_index_ivf(index)
+    except RuntimeError:
+        ivf = None
+    if ivf is not None:
+        values = [1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024]
+        candidates["nprobe"] = [v for v in values if v < ivf.nlist] + [ivf.nlist]
+
+    if isinstance(faiss.downcast_index(index), faiss.IndexHNSW):
+        candidates["efSearch"] = [16, 32, 64, 128, 256, 512]
+
+    return candidates
+
+
+def apply_search_params(index: faiss.Index, params: Dict[str, int]) -> None:
+    """Set query-time parameters (nprobe, efSearch, ...) on an index"""
+    parameter_space = faiss.ParameterSpace()
+    for name, value in params.items():
+        parameter_space.set_index_parameter(index, name, value)
+
+
+def search_parameters_excluding(index: faiss.Index, selector: faiss.IDSelector) -> faiss.SearchParameters:
+    """
+    Build per-search parameters that skip the ids rejected by a selector
+
+    Explicit SearchParameters override the values set on the index, so the
+    current nprobe / efSearch are copied into them.
+
+    Args:
+        index: FAISS index that will be searched
+        selector: Ids to keep (e.g. IDSelectorNot of deleted positions)
+
+    Returns:
+        faiss.SearchParameters for index.search(..., params=...)
+    """
+    try:
+        ivf = faiss.extract_index_ivf(index)
+    except RuntimeError:
+        ivf = None
+    if ivf is not None:
+        return faiss.SearchParametersIVF(sel=selector, nprobe=ivf.nprobe)
+
+    hnsw_index = faiss.downcast_index(index)
+    if isinstance(hnsw_index, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=hnsw_index.hnsw.efSearch)
+
+    return faiss.SearchParameters(sel=selector)
+
+
+def recall_at_k(approx_ids: np.ndarray, exact_ids: np.ndarray) -> float:
+    """
+    Mean fraction of the exact top-k neighbours found by an approximate search
+
+    Args:
+        approx_ids: (n, k) ids returned by the approximate index
+        exact_ids: (n, k) ids returned by exact search (-1 for padding)
+
+    Returns:
+        float: recall@k in [0, 1]
+    """
+    recalls = []
+    for approx, exact in zip(approx_ids, exact_ids):
+        exact = exact[exact >= 0]
+        if len(exact):
+            recalls.append(len(np.intersect1d(approx, exact)) / len(exact))
+    return float(np.mean(recalls)) if recalls else 1.0
+
+
+def excluding_positions(search_fn: Callable[[np.ndarray, int], Tuple[np.ndarray, np.ndarray]],
+                        positions: np.ndarray) -> Callable[[np.ndarray, int], Tuple[np.ndarray, np.ndarray]]:
+    """
+    Wrap a search so that each query never returns its own index position
+
+    Used when the recall queries are vectors that are themselves in the index.
+
+    Args:
+        search_fn: Search returning (scores, ids), e.g. index.search
+        positions: (n,) index position of each query
+
+    Returns:
+        Search function with the same signature that returns the top_k results other than the query itself
+    """
+    def search(queries: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        scores, ids = search_fn(queries, top_k + 1)
+        # Stable sort moves the query's own position (if found) to the end and keeps the ranking otherwise
+        order = np.argsort(ids == positions[:, None], axis=1, kind='stable')[:, :top_k]
+        return np.take_along_axis(scores, order, axis=1), np.take_along_axis(ids, order, axis=1)
+    return search
+
+
+def measure(index: faiss.Index, queries: np.ndarray, exact_ids: np.ndarray, repeats: int = 3,
+            search_fn: Optional[Callable[[np.ndarray, int], Tuple[np.ndarray, np.ndarray]]] = None) -> Dict[str, float]:
+    """
+    Measure recall@k and per-query latency of an index with its current parameters
+
+    Args:
+        index: FAISS index
+        queries: (n, d) float32 query matrix
+        exact_ids: (n, k) exact neighbour ids of the queries
+        repeats: Number of timed runs; the fastest is reported
+        search_fn: Search to time instead of index.search (e.g. search plus re-ranking)
+
+    Returns:
+        Dict with recall and latency_ms
+    """
+    k = exact_ids.shape[1]
+    search_fn = search_fn or index.search
+    best = float("inf")
+    approx_ids = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        _, approx_ids = search_fn(queries, k)
+        best = min(best, time.perf_counter() - start)
+
+    return {
+        "recall": recall_at_k(approx_ids, exact_ids),
+        "latency_ms": best * 1000 / max(1, len(queries))
+    }
+
+
+def autotune(index: faiss.Index, queries: np.ndarray, exact_ids: np.ndarray,
+             target_recall: float = 0.95, repeats: int = 3,
+             search_fn: Optional[Callable[[np.ndarray, int], Tuple[np.ndarray, np.ndarray]]] = None) -> Dict[str, Any]:
+    """
+    Pick the query-time parameters with the lowest latency that reach a target recall@k
+
+    If no setting reaches the target, the one with the highest recall is chosen.
+    The chosen parameters are applied to the index.
+
+    Args:
+        index: Trained and populated FAISS index
+        queries: (n, d) float32 query matrix
+        exact_ids: (n, k) exact neighbour ids of the queries
+        target_recall: Required recall@k
+        repeats: Timed runs per setting
+        search_fn: Search to evaluate instead of index.search (e.g. search plus re-ranking)
+
+    Returns:
+        Dict with the chosen search_params, their recall and latency_ms, and the full sweep
+    """
+    candidates = candidate_search_params(index)
+    if not candidates:
+        result = measure(index, queries, exact_ids, repeats, search_fn)
+        return {"search_params": {}, **result, "sweep": []}
+
+    sweep = []
+    # Each index type exposes a single knob; sweep them one at a time
+    for name, values in candidates.items():
+        for value in values:
+            apply_search_params(index, {name: value})
+            result = measure(index, queries, exact_ids, repeats, search_fn)
+            sweep.append({"search_params": {name: value}, **result})
+            # Latency grows with the knob, so larger values cannot be cheaper once the target is met
+            if result["recall"] >= target_recall:
+                break
+
+    reaching = [entry for entry in sweep if entry["recall"] >= target_recall]
+    if reaching:
+        chosen = min(reaching, key=lambda entry: entry["latency_ms"])
+    else:
+        chosen = max(sweep, key=lambda entry: (entry["recall"], -entry["latency_ms"]))
+
+    apply_search_params(index, chosen["search_params"])
+    return {**chosen, "sweep": sweep}
+
+
+def save_params(path: str, params: Dict[str, Any]) -> None:
+    """Write index parameters as JSON next to the index"""
+    tmp_path = unique_tmp_path(path)
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(params, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_params(path: str) -> Optional[Dict[str, Any]]:
+    """Read index parameters written by save_params, or None if missing or unreadable"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def index_config_from_env(env_prefix: str, default_factory: str = "IVF256,Flat") -> Dict[str, Any]:
+    """
+    Read index settings for one collection from environment variables
+
+    Reads <PREFIX>_FACTORY, <PREFIX>_TARGET_RECALL, <PREFIX>_EF_CONSTRUCTION,
+    <PREFIX>_RERANK_FACTOR, <PREFIX>_MMAP ("0" loads the index fully),
+    <PREFIX>_SYNC_MODE ("incremental" or "full"), <PREFIX>_MAX_DRIFT,
+    <PREFIX>_SNAPSHOT (local snapshot directory to build from) and the
+    optional fixed search parameters <PREFIX>_NPROBE / <PREFIX>_EF_SEARCH (which
+    disable auto-tuning).
+
+    Args:
+        env_prefix: Variable prefix, e.g. "TEXT_INDEX"
+        default_factory: Factory string used when <PREFIX>_FACTORY is not set
+
+    Returns:
+        Keyword arguments for FaissFromQdrantDatabase
+    """
+    search_params = {}
+    if os.getenv(f"{env_prefix}_NPROBE"):
+        search_params["nprobe"] = int(os.getenv(f"{env_prefix}_NPROBE"))
+    if os.getenv(f"{env_prefix}_EF_SEARCH"):
+        search_params["efSearch"] = int(os.getenv(f"{env_prefix}_EF_SEARCH"))
+
+    return {
+        "index_factory": os.getenv(f"{env_prefix}_FACTORY", default_factory),
+        "target_recall": float(os.getenv(f"{env_prefix}_TARGET_RECALL", 0.95)),
+        "hnsw_ef_construction": int(os.getenv(f"{env_prefix}_EF_CONSTRUCTION", 200)),
+        "search_params": search_params or None,
+        "rerank_factor": int(os.getenv(f"{env_prefix}_RERANK_FACTOR")) if os.getenv(f"{env_prefix}_RERANK_FACTOR") else None,
+        "mmap_index": os.getenv(f"{env_prefix}_MMAP", "1") != "0",
+        "sync_mode": os.getenv(f"{env_prefix}_SYNC_MODE", "incremental"),
+        "max_drift": float(os.getenv(f"{env_prefix}_MAX_DRIFT", 0.2)),
+        "snapshot_path": os.getenv(f"{env_prefix}_SNAPSHOT") or None
+    }
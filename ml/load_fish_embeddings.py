@@ -1,9 +1,13 @@
-# python load_fish_embeddings.py /path/to/your/csv/file.csv
+# python load_fish_embeddings.py /path/to/your/dataset (or /path/to/your/csv/file.csv)
 import csv
+import hashlib
+import json
 import os
 import sys
-from typing import List, Dict, Any
+import time
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 import numpy as np
+import pandas as pd
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -14,6 +18,7 @@ load_dotenv()
 
 from vector_database import VectorDatabase
 from fish_species import FishSpecies
+from embedding_dataset import EmbeddingDataset, is_embedding_dataset
 
 
 def parse_fish_name(fish_name: str) -> Dict[str, str]:
@@ -74,38 +79,154 @@ def create_fish_species_from_csv_row(row_data: Dict[str, str], fish_id: int) ->
     return fish_species
 
 
-def extract_embedding_from_row(row: List[str]) -> List[float]:
+def species_point_id(fish_name: str) -> int:
     """
-    Extract the 1024-dimensional embedding vector from a CSV row.
+    Derive a stable Qdrant point ID from a species name.
+    
+    The ID is the first 63 bits of the BLAKE2b hash of the name, so it is
+    positive in a signed int64 (as used by the FAISS id mapping), the same in
+    every run, and loading a row twice overwrites the point instead of
+    creating a duplicate.
+    """
+    digest = hashlib.blake2b(fish_name.encode('utf-8'), digest_size=8).digest()
+    return (int.from_bytes(digest, 'big') >> 1) or 1
+
+
+def load_checkpoint(checkpoint_path: str, source_path: str) -> Dict[str, Any]:
+    """
+    Read the checkpoint of an interrupted load of the same file.
     
     Args:
-        row: CSV row as list of strings
+        checkpoint_path: Checkpoint JSON file
+        source_path: CSV file (or dataset vectors file) being loaded
         
     Returns:
-        List of 1024 float values representing the embedding
+        The checkpoint, or an empty dict if there is none
+        
+    Raises:
+        ValueError: If the checkpoint belongs to a different or modified file
     """
-    # Extract embedding dimensions 0-1023 (first 1024 columns)
-    embedding_str_values = row[0:1024]  # Should be 1024 values
+    if not os.path.exists(checkpoint_path):
+        return {}
+    with open(checkpoint_path, 'r', encoding='utf-8') as f:
+        checkpoint = json.load(f)
     
-    try:
-        embedding = [float(val) for val in embedding_str_values]
-        if len(embedding) != 1024:
-            raise ValueError(f"Expected 1024 embedding dimensions, got {len(embedding)}")
-        return embedding
-    except ValueError as e:
-        print(f"Error parsing embedding: {e}")
-        print(f"Row length: {len(row)}, Embedding section length: {len(embedding_str_values)}")
-        raise
+    stat = os.stat(source_path)
+    if checkpoint.get("csv_size") != stat.st_size or checkpoint.get("csv_mtime_ns") != stat.st_mtime_ns:
+        raise ValueError(f"Checkpoint {checkpoint_path} was written for a different version of {source_path}; "
+                         f"delete it or load without --resume")
+    return checkpoint
+
+
+def save_checkpoint(checkpoint_path: str, source_path: str, **progress) -> None:
+    """
+    Atomically record the progress of a load after a committed batch.
+    
+    Args:
+        checkpoint_path: Checkpoint JSON file
+        source_path: CSV file (or dataset vectors file) being loaded
+        **progress: rows_read, batch, processed, stored, completed, ...
+    """
+    stat = os.stat(source_path)
+    checkpoint = {
+        "csv_file": os.path.abspath(source_path),
+        "csv_size": stat.st_size,
+        "csv_mtime_ns": stat.st_mtime_ns,
+        **progress,
+        "updated_at": time.time()
+    }
+    tmp_path = checkpoint_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp_path, checkpoint_path)
+
+
+def read_embedding_csv(csv_file_path: str, chunk_size: int = 1000,
+                       skip_rows: int = 0) -> Iterator[Tuple[np.ndarray, List[str], List[str], int]]:
+    """
+    Stream the 1026-column embedding CSV in chunks of parsed float32 vectors.
+    
+    The file is read with the pandas C parser, so the 1024 numeric columns are
+    parsed natively instead of converting strings to floats in Python, and at
+    most chunk_size rows are held in memory at a time. A column holding a
+    non-numeric cell is coerced to NaN in that chunk only. Rows with missing
+    or non-numeric embedding values (e.g. truncated rows) or with an empty
+    Species / FullDescription_en are skipped with a warning.
+    
+    Args:
+        csv_file_path: Path to the CSV file (0, 1, ..., 1023, FullDescription_en, Species)
+        chunk_size: Rows per chunk
+        skip_rows: Number of data rows to skip (counted as CSV records, so quoted
+            multi-line descriptions count once)
+        
+    Yields:
+        Tuple of (vectors (n, 1024) float32, fish names, full descriptions, rows read so far)
+        per chunk; rows read include skipped and invalid rows
+    """
+    with open(csv_file_path, 'r', encoding='utf-8') as csvfile:
+        header = next(csv.reader(csvfile))
+    print(f"CSV header columns: {len(header)}")
+    print(f"Expected format: 0, 1, 2, ..., 1023, FullDescription_en, Species")
+    
+    # Verify header format
+    if len(header) != 1026:
+        raise ValueError(f"Expected 1026 columns (1024 embedding dims + FullDescription_en + Species), got {len(header)}")
+    
+    # Columns are addressed by position: 0-1023 embedding, 1024 FullDescription_en, 1025 Species.
+    # The embedding dtype is inferred rather than fixed, so a bad cell does not abort the whole load.
+    chunks = pd.read_csv(csv_file_path, header=None, skiprows=1, names=range(1026), dtype={1024: str, 1025: str},
+                         chunksize=chunk_size, on_bad_lines='warn', encoding='utf-8')
+    
+    rows_read = 0
+    for chunk in chunks:
+        rows_read += len(chunk)
+        if rows_read <= skip_rows:
+            continue
+        if rows_read - len(chunk) < skip_rows:
+            chunk = chunk.iloc[skip_rows - (rows_read - len(chunk)):]
+        
+        embedding = chunk.iloc[:, :1024]
+        non_numeric = [column for column in embedding.columns if not pd.api.types.is_numeric_dtype(embedding[column])]
+        if non_numeric:
+            embedding = embedding.apply(lambda values: pd.to_numeric(values, errors='coerce') if values.name in non_numeric else values)
+        vectors = embedding.to_numpy(dtype=np.float32)
+        fish_names = chunk[1025].fillna('').str.strip()
+        descriptions = chunk[1024].fillna('').str.strip()
+        
+        valid = ~np.isnan(vectors).any(axis=1) & (fish_names != '').to_numpy() & (descriptions != '').to_numpy()
+        if not valid.all():
+            print(f"Warning: Skipping {int((~valid).sum())} rows with missing or non-numeric embedding values, fish_name or full_description")
+        
+        yield np.ascontiguousarray(vectors[valid]), fish_names[valid].tolist(), descriptions[valid].tolist(), rows_read
 
 
-def load_fish_embeddings_to_qdrant(csv_file_path: str, batch_size: int = 100) -> None:
+def load_fish_embeddings_to_qdrant(csv_file_path: str, batch_size: int = 1000, upsert_chunk_size: int = 256,
+                                   parallel_upserts: int = 4, wait: bool = True, per_row: bool = False,
+                                   resume: bool = False, checkpoint_path: Optional[str] = None) -> None:
     """
-    Load fish embeddings from CSV file into Qdrant database.
+    Load fish embeddings from a binary dataset (see embedding_dataset.py) or CSV file into Qdrant database.
+    
+    Point IDs are derived from the species names (species_point_id), so
+    loading a row again overwrites its point. Collections loaded before with
+    sequential IDs (1..N) are not overwritten: delete their points (or load
+    into a new collection) first, or every species ends up stored twice.
+    After every fully stored batch
+    the number of CSV rows read is written to a checkpoint file; with resume,
+    an interrupted load continues after the last committed batch.
     
     Args:
-        csv_file_path: Path to the CSV file containing fish embeddings
+        csv_file_path: Path to the dataset directory or CSV file containing fish embeddings
         batch_size: Number of records to process in each batch
+        upsert_chunk_size: Points per Qdrant upsert request
+        parallel_upserts: Number of upsert requests in flight
+        wait: Wait until Qdrant has applied each upsert (without it, each batch still waits for
+            its last upsert, so checkpoints only cover applied batches)
+        per_row: Store each record with its own upsert (slow, for debugging)
+        resume: Continue from the checkpoint of an interrupted load of the same file
+        checkpoint_path: Checkpoint file (default: <csv_file_path>.checkpoint.json)
     """
+    store_options = {"chunk_size": upsert_chunk_size, "parallel": parallel_upserts, "wait": wait, "per_row": per_row}
+    
     # Check environment variables
     if not os.getenv("QDRANT_URL") or not os.getenv("QDRANT_API_KEY"):
         raise ValueError("Please set QDRANT_URL and QDRANT_API_KEY environment variables")
@@ -116,81 +237,66 @@ def load_fish_embeddings_to_qdrant(csv_file_path: str, batch_size: int = 100) ->
     
     # Check if file exists
     if not os.path.exists(csv_file_path):
-        raise FileNotFoundError(f"CSV file not found: {csv_file_path}")
+        raise FileNotFoundError(f"Embedding dataset or CSV file not found: {csv_file_path}")
     
     print(f"Loading fish embeddings from: {csv_file_path}")
     
-    total_processed = 0
-    total_stored = 0
-    batch_count = 0
+    # Binary datasets are memory-mapped and need no parsing; CSV files are parsed in chunks
+    dataset = EmbeddingDataset(csv_file_path) if is_embedding_dataset(csv_file_path) else None
+    source_path = dataset.vectors_path if dataset is not None else csv_file_path
+    if dataset is not None:
+        print(f"Binary dataset: {len(dataset)} rows, {dataset.dimension} dimensions")
+    
+    checkpoint_path = checkpoint_path or csv_file_path.rstrip(os.sep) + ".checkpoint.json"
+    checkpoint = load_checkpoint(checkpoint_path, source_path) if resume else {}
+    if checkpoint.get("completed"):
+        print(f"Checkpoint {checkpoint_path} shows this file was loaded completely, nothing to resume")
+        return
+    if checkpoint:
+        print(f"Resuming after row {checkpoint['rows_read']} (batch {checkpoint['batch']}, "
+              f"{checkpoint['stored']} records stored)")
+    elif resume:
+        print(f"No checkpoint found at {checkpoint_path}, starting from the beginning")
+    
+    rows_read = checkpoint.get("rows_read", 0)
+    total_processed = checkpoint.get("processed", 0)
+    total_stored = checkpoint.get("stored", 0)
+    batch_count = checkpoint.get("batch", 0)
+    resumed_stored = total_stored
+    load_start = time.time()
+    
+    if dataset is not None:
+        chunks = dataset.chunks(chunk_size=batch_size, skip_rows=rows_read)
+    else:
+        chunks = read_embedding_csv(csv_file_path, chunk_size=batch_size, skip_rows=rows_read)
     
     try:
-        with open(csv_file_path, 'r', encoding='utf-8') as csvfile:
-            # Use csv.reader to handle potential commas in quoted fields
-            csv_reader = csv.reader(csvfile)
-            
-            # Read header row
-            header = next(csv_reader)
-            print(f"CSV header columns: {len(header)}")
-            print(f"Expected format: 0, 1, 2, ..., 1023, FullDescription_en, Species")
-            
-            # Verify header format
-            if len(header) != 1026:
-                raise ValueError(f"Expected 1026 columns (1024 embedding dims + FullDescription_en + Species), got {len(header)}")
-            
-            # Process rows in batches
+        for vectors, fish_names, descriptions, rows_read in chunks:
+            # Create FishSpecies objects for the parsed chunk
             current_batch = []
+            for embedding, fish_name, full_description in zip(vectors.tolist(), fish_names, descriptions):
+                fish_id = species_point_id(fish_name)
+                row_data = {
+                    'fish_name': fish_name,
+                    'full_description': full_description
+                }
+                current_batch.append((embedding, create_fish_species_from_csv_row(row_data, fish_id)))
+                total_processed += 1
             
-            for row in csv_reader:
-                try:
-                    if len(row) != 1026:
-                        print(f"Warning: Skipping row with {len(row)} columns (expected 1026)")
-                        continue
-                    
-                    # Extract data - now Species is at index 1025 and FullDescription_en is at index 1024
-                    fish_name = row[1025].strip()  # Species column
-                    full_description = row[1024].strip()  # FullDescription_en column
-                    
-                    if not fish_name or not full_description:
-                        print(f"Warning: Skipping row with empty fish_name or full_description")
-                        continue
-                    
-                    # Extract embedding
-                    embedding = extract_embedding_from_row(row)
-                    
-                    # Create FishSpecies object
-                    fish_id = total_processed + 1
-                    row_data = {
-                        'fish_name': fish_name,
-                        'full_description': full_description
-                    }
-                    fish_species = create_fish_species_from_csv_row(row_data, fish_id)
-                    
-                    # Add to batch
-                    current_batch.append((embedding, fish_species))
-                    total_processed += 1
-                    
-                    # Process batch when it reaches batch_size
-                    if len(current_batch) >= batch_size:
-                        stored_count = process_batch(vector_db, current_batch, batch_count + 1)
-                        total_stored += stored_count
-                        batch_count += 1
-                        current_batch = []
-                        
-                        print(f"Processed batch {batch_count}: {stored_count}/{batch_size} records stored successfully")
-                        print(f"Total progress: {total_processed} processed, {total_stored} stored")
-                
-                except Exception as e:
-                    print(f"Error processing row {total_processed + 1}: {e}")
-                    print(f"Row data: fish_name='{row[1025] if len(row) > 1025 else 'N/A'}', description length={len(row[1024]) if len(row) > 1024 else 0}")
-                    continue
+            stored_count = process_batch(vector_db, current_batch, batch_count + 1, **store_options) if current_batch else 0
+            if stored_count < len(current_batch):
+                raise RuntimeError(f"Batch {batch_count + 1} was only partly stored ({stored_count}/{len(current_batch)}); "
+                                   f"rerun with --resume to retry it")
+            total_stored += stored_count
+            batch_count += 1
+            save_checkpoint(checkpoint_path, source_path, rows_read=rows_read, batch=batch_count,
+                            processed=total_processed, stored=total_stored, completed=False)
             
-            # Process remaining records in the last batch
-            if current_batch:
-                stored_count = process_batch(vector_db, current_batch, batch_count + 1)
-                total_stored += stored_count
-                batch_count += 1
-                print(f"Processed final batch {batch_count}: {stored_count}/{len(current_batch)} records stored successfully")
+            print(f"Processed batch {batch_count}: {stored_count}/{len(current_batch)} records stored successfully")
+            print(f"Total progress: {total_processed} processed, {total_stored} stored")
+        
+        save_checkpoint(checkpoint_path, source_path, rows_read=rows_read, batch=batch_count,
+                        processed=total_processed, stored=total_stored, completed=True)
     
     except Exception as e:
         print(f"Error reading CSV file: {e}")
@@ -201,29 +307,44 @@ def load_fish_embeddings_to_qdrant(csv_file_path: str, batch_size: int = 100) ->
     print(f"Total records stored in Qdrant: {total_stored}")
     print(f"Total batches processed: {batch_count}")
     print(f"Success rate: {(total_stored/total_processed)*100:.2f}%" if total_processed > 0 else "0%")
+    load_time = time.time() - load_start
+    print(f"Load time: {load_time:.1f}s ({(total_stored - resumed_stored) / load_time if load_time > 0 else 0:.0f} rows/s)")
     
     # Verify storage
     fish_count = vector_db.get_fish_count()
     print(f"Fish count in database: {fish_count}")
 
 
-def process_batch(vector_db: VectorDatabase, batch: List[tuple], batch_num: int) -> int:
+def process_batch(vector_db: VectorDatabase, batch: List[tuple], batch_num: int, chunk_size: int = 256,
+                  parallel: int = 4, wait: bool = True, per_row: bool = False) -> int:
     """
     Process a batch of embeddings and store them in the vector database.
     
+    The batch is sent with VectorDatabase.store_many (one upsert per chunk,
+    several in flight) unless per_row is set.
+    
     Args:
         vector_db: VectorDatabase instance
         batch: List of (embedding, fish_species) tuples
         batch_num: Batch number for logging
+        chunk_size: Points per upsert request
+        parallel: Number of upsert requests in flight
+        wait: Wait until Qdrant has applied each upsert
+        per_row: Store each record with its own upsert
         
     Returns:
         Number of successfully stored records
     """
+    if not per_row:
+        result = vector_db.store_many(batch, chunk_size=chunk_size, parallel=parallel, wait=wait,
+                                      ids=[fish_species.id for _, fish_species in batch])
+        return result["stored"]
+    
     stored_count = 0
     
     for embedding, fish_species in batch:
         try:
-            result_id = vector_db.store(embedding, fish_species)
+            result_id = vector_db.store(embedding, fish_species, fish_id=fish_species.id)
             if result_id > 0:
                 stored_count += 1
             else:
@@ -238,11 +359,24 @@ def main():
     """Main function to run the CSV loading script."""
     import argparse
     
-    parser = argparse.ArgumentParser(description='Load fish embeddings from CSV into Qdrant database')
+    parser = argparse.ArgumentParser(description='Load fish embeddings from a binary dataset or CSV into Qdrant database')
     parser.add_argument('csv_file', nargs='?', default='/Users/stepan/Documents/Capstone/fish_embeddings_20250627_102709_first_10.csv',
-                        help='Path to the CSV file containing fish embeddings (default: fish_embeddings_20250627_102709.csv)')
-    parser.add_argument('--batch-size', type=int, default=100,
-                        help='Number of records to process in each batch (default: 100)')
+                        help='Path to the binary dataset directory or CSV file containing fish embeddings '
+                             '(default: fish_embeddings_20250627_102709.csv)')
+    parser.add_argument('--batch-size', type=int, default=1000,
+                        help='Number of records to process in each batch (default: 1000)')
+    parser.add_argument('--upsert-chunk-size', type=int, default=256,
+                        help='Points per Qdrant upsert request (default: 256)')
+    parser.add_argument('--parallel-upserts', type=int, default=4,
+                        help='Number of upsert requests in flight (default: 4)')
+    parser.add_argument('--no-wait', action='store_true',
+                        help="Don't wait for Qdrant to apply each upsert, only for the last one of each batch")
+    parser.add_argument('--per-row', action='store_true',
+                        help='Store each record with its own upsert (slow, for debugging)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue an interrupted load from its checkpoint file')
+    parser.add_argument('--checkpoint', type=str, default=None,
+                        help='Checkpoint file (default: <csv_file>.checkpoint.json)')
     parser.add_argument('--test-run', action='store_true',
                         help='Process only first 10 records for testing')
     
@@ -279,7 +413,9 @@ def main():
         print(f"Qdrant API Key: {'*' * (len(qdrant_api_key) - 4) + qdrant_api_key[-4:]}")
         
         # Load embeddings
-        load_fish_embeddings_to_qdrant(args.csv_file, args.batch_size)
+        load_fish_embeddings_to_qdrant(args.csv_file, args.batch_size, upsert_chunk_size=args.upsert_chunk_size,
+                                       parallel_upserts=args.parallel_upserts, wait=not args.no_wait,
+                                       per_row=args.per_row, resume=args.resume, checkpoint_path=args.checkpoint)
         
         print("\n✅ Fish embeddings loaded successfully to Qdrant!")
         print("💡 To use FAISS for fast search with this data:")
@@ -52,8 +52,8 @@ def test_faiss_from_qdrant():
         query_vector = np.random.rand(1024).tolist()
         print(f"Query vector generated (dimension: {len(query_vector)})")
         
-        # Test FAISS search (reads metadata from Qdrant)
-        print("\n--- Testing FAISS Search (with Qdrant metadata retrieval) ---")
+        # Test FAISS search (reads metadata from the local payload store)
+        print("\n--- Testing FAISS Search (with local payload store) ---")
         faiss_results, faiss_timing = vector_db.search_with_timing(query_vector, top_k=5)
         print(f"FAISS found {len(faiss_results)} results:")
         for i, (fish, score) in enumerate(faiss_results):
@@ -97,7 +97,7 @@ def test_faiss_from_qdrant():
         print(f"   FAISS index search:           {faiss_timing.get('faiss_index_search', 0):.6f}s")
         print(f"   vs Qdrant built-in search:    {qdrant_timing.get('qdrant_search_with_metadata', 0):.6f}s")
         print()
-        print(f"   FAISS metadata retrieval:     {faiss_timing.get('qdrant_metadata_retrieval', 0):.6f}s")
+        print(f"   FAISS metadata retrieval:     {faiss_timing.get('metadata_retrieval', 0):.6f}s")
         print(f"   (included in Qdrant search above)")
         print()
         
@@ -120,7 +120,7 @@ def test_faiss_from_qdrant():
             _, f_timing = vector_db.search_with_timing(test_query, top_k=5)
             faiss_total_times.append(f_timing.get('total_time', 0))
             faiss_search_times.append(f_timing.get('faiss_index_search', 0))
-            faiss_metadata_times.append(f_timing.get('qdrant_metadata_retrieval', 0))
+            faiss_metadata_times.append(f_timing.get('metadata_retrieval', 0))
             
             # Qdrant timing
             _, q_timing = vector_db.search_qdrant_only_with_timing(test_query, top_k=5)
@@ -172,7 +172,7 @@ def test_faiss_from_qdrant():
         print("\n📊 Summary:")
         print("  - FAISS provides fast vector similarity search")
         print("  - All data is stored only in Qdrant (no duplication)")
-        print("  - Metadata is retrieved from Qdrant when needed")
+        print("  - Metadata is served from the local payload store built from Qdrant")
         print("  - FAISS index can be rebuilt from Qdrant data anytime")
         
     except Exception as e:
@@ -440,7 +440,7 @@ def display_timing_info(timing_info, method_name):
         print(f"1. Vector normalization:      {timing_info.get('vector_normalization', 0):.6f} seconds")
         print(f"2. FAISS index search:        {timing_info.get('faiss_index_search', 0):.6f} seconds")
         print(f"3. ID mapping & preparation:  {timing_info.get('id_mapping_preparation', 0):.6f} seconds")
-        print(f"4. Qdrant metadata retrieval: {timing_info.get('qdrant_metadata_retrieval', 0):.6f} seconds")
+        print(f"4. Metadata retrieval:        {timing_info.get('metadata_retrieval', 0):.6f} seconds")
         print(f"5. Result processing:         {timing_info.get('result_processing', 0):.6f} seconds")
         print("-" * 60)
         print(f"📊 TOTAL TIME:                {timing_info.get('total_time', 0):.6f} seconds")
@@ -450,14 +450,14 @@ def display_timing_info(timing_info, method_name):
         
         # Performance insights
         faiss_time = timing_info.get('faiss_index_search', 0)
-        qdrant_time = timing_info.get('qdrant_metadata_retrieval', 0)
+        qdrant_time = timing_info.get('metadata_retrieval', 0)
         total_time = timing_info.get('total_time', 0)
         
         if total_time > 0:
             faiss_percent = (faiss_time / total_time) * 100
             qdrant_percent = (qdrant_time / total_time) * 100
             print(f"💡 FAISS search: {faiss_percent:.1f}% of total time")
-            print(f"💡 Qdrant retrieval: {qdrant_percent:.1f}% of total time")
+            print(f"💡 Metadata retrieval: {qdrant_percent:.1f}% of total time")
     
     elif method_name == "Qdrant Only":
         # Qdrant-only method timing breakdown
@@ -493,7 +493,7 @@ def display_timing_info_with_embedding(timing_info, method_name, embed_time):
     print(f"1. Vector normalization:      {timing_info.get('vector_normalization', 0):.6f} seconds")
     print(f"2. FAISS index search:        {timing_info.get('faiss_index_search', 0):.6f} seconds")
     print(f"3. ID mapping & preparation:  {timing_info.get('id_mapping_preparation', 0):.6f} seconds")
-    print(f"4. Qdrant metadata retrieval: {timing_info.get('qdrant_metadata_retrieval', 0):.6f} seconds")
+    print(f"4. Metadata retrieval:        {timing_info.get('metadata_retrieval', 0):.6f} seconds")
     print(f"5. Result processing:         {timing_info.get('result_processing', 0):.6f} seconds")
     print("-" * 70)
     print(f"📊 VECTOR SEARCH SUBTOTAL:    {timing_info.get('total_time', 0):.6f} seconds")
@@ -509,12 +509,12 @@ def display_timing_info_with_embedding(timing_info, method_name, embed_time):
             print(f"💡 Text embedding: {embed_percent:.1f}% of total pipeline time")
         
         search_time = timing_info.get('faiss_index_search', 0)
-        retrieval_time = timing_info.get('qdrant_metadata_retrieval', 0)
+        retrieval_time = timing_info.get('metadata_retrieval', 0)
         search_percent = (search_time / total_pipeline_time) * 100
         retrieval_percent = (retrieval_time / total_pipeline_time) * 100
         
         print(f"💡 FAISS search: {search_percent:.1f}% of total pipeline time")
-        print(f"💡 Qdrant retrieval: {retrieval_percent:.1f}% of total pipeline time")
+        print(f"💡 Metadata retrieval: {retrieval_percent:.1f}% of total pipeline time")
         
         if embed_time > timing_info.get('total_time', 0):
             print(f"⚠️  Text embedding is the bottleneck ({embed_time:.6f}s)")
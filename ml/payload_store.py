@@ -0,0 +1,467 @@
+"""
+Local memory-mapped stores of fish payloads, raw vectors and Qdrant IDs keyed by FAISS position
+"""
+
+import json
+import os
+import shutil
+import uuid
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from fish_species import FishSpecies
+
+
+def unique_tmp_path(path: str) -> str:
+    """Temporary sibling of path that no other writer (thread or process) uses"""
+    return f"{path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+
+
+class PayloadStore:
+    """Columnar, read-only store of FishSpecies payloads.
+
+    Row ``i`` holds the payload of the vector at FAISS position ``i``. Every
+    string field is kept as a UTF-8 blob plus an int64 offsets array, all saved
+    as ``.npy`` files that are memory-mapped on load, so lookups touch only the
+    pages they need and never go over the network.
+    """
+
+    STRING_FIELDS = ("name", "genus", "species", "fbname", "full_description", "image_path")
+    META_FILE = "meta.json"
+
+    def __init__(self, path: str):
+        """
+        Initialize the store
+
+        Args:
+            path: Directory holding the store files
+        """
+        self.path = path
+        self.count = 0
+        self._ids: Optional[np.ndarray] = None
+        self._offsets: Dict[str, np.ndarray] = {}
+        self._data: Dict[str, np.ndarray] = {}
+
+    def exists(self) -> bool:
+        """Check whether a complete store is present on disk"""
+        return os.path.exists(os.path.join(self.path, self.META_FILE))
+
+    def is_loaded(self) -> bool:
+        """Check whether the store is loaded and ready for lookups"""
+        return self._ids is not None
+
+    def load(self) -> bool:
+        """
+        Memory-map the store files
+
+        Returns:
+            bool: True if the store was loaded, False if it is missing or unreadable
+        """
+        try:
+            with open(os.path.join(self.path, self.META_FILE), 'r') as f:
+                meta = json.load(f)
+
+            ids = np.load(os.path.join(self.path, "id.npy"), mmap_mode='r')
+            offsets = {}
+            data = {}
+            for field in self.STRING_FIELDS:
+                offsets[field] = np.load(os.path.join(self.path, f"{field}.offsets.npy"), mmap_mode='r')
+                data[field] = np.load(os.path.join(self.path, f"{field}.data.npy"), mmap_mode='r')
+
+            if len(ids) != meta["count"]:
+                raise ValueError(f"Payload store is inconsistent: {len(ids)} ids, {meta['count']} expected")
+
+            self._ids, self._offsets, self._data = ids, offsets, data
+            self.count = meta["count"]
+            return True
+
+        except Exception as e:
+            print(f"Error loading payload store from {self.path}: {e}")
+            self._ids, self._offsets, self._data = None, {}, {}
+            self.count = 0
+            return False
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _get_string(self, field: str, position: int) -> str:
+        offsets = self._offsets[field]
+        start, end = int(offsets[position]), int(offsets[position + 1])
+        if start == end:
+            return ""
+        return bytes(self._data[field][start:end]).decode('utf-8')
+
+    def get(self, position: int) -> Optional[FishSpecies]:
+        """
+        Build the FishSpecies stored at a FAISS position
+
+        Args:
+            position: FAISS position of the vector
+
+        Returns:
+            FishSpecies or None if the position is out of range
+        """
+        if self._ids is None or position < 0 or position >= self.count:
+            return None
+
+        fields = {field: self._get_string(field, position) for field in self.STRING_FIELDS}
+        return FishSpecies(fish_id=int(self._ids[position]), **fields)
+
+    def get_many(self, positions: List[int]) -> List[Optional[FishSpecies]]:
+        """Build FishSpecies objects for several FAISS positions, preserving order"""
+        return [self.get(int(position)) for position in positions]
+
+
+class PayloadStoreWriter:
+    """Streams payloads into a new PayloadStore directory.
+
+    Files are written to a temporary directory which replaces the existing
+    store only when ``finalize`` is called, so readers never see a partial store.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the writer
+
+        Args:
+            path: Final directory of the store
+        """
+        self.path = path
+        self.tmp_path = unique_tmp_path(path)
+        os.makedirs(self.tmp_path)
+
+        self.count = 0
+        self._ids: List[int] = []
+        self._offsets: Dict[str, List[int]] = {field: [0] for field in PayloadStore.STRING_FIELDS}
+        self._blobs = {
+            field: open(os.path.join(self.tmp_path, f"{field}.blob"), 'wb')
+            for field in PayloadStore.STRING_FIELDS
+        }
+
+    def append(self, payloads: List[Optional[Dict[str, Any]]]) -> None:
+        """
+        Append payloads in FAISS position order
+
+        Args:
+            payloads: Qdrant payload dictionaries (None is stored as an empty payload)
+        """
+        for payload in payloads:
+            payload = payload or {}
+            self._ids.append(int(payload.get("id", 0) or 0))
+            for field in PayloadStore.STRING_FIELDS:
+                value = payload.get(field)
+                encoded = str(value).encode('utf-8') if value else b""
+                self._blobs[field].write(encoded)
+                self._offsets[field].append(self._offsets[field][-1] + len(encoded))
+            self.count += 1
+
+    def append_store(self, store: PayloadStore) -> None:
+        """
+        Append all rows of an existing store, copying its columns in bulk
+
+        Args:
+            store: Loaded PayloadStore
+        """
+        if not store.is_loaded() or len(store) == 0:
+            return
+
+        self._ids.extend(int(fish_id) for fish_id in store._ids)
+        for field in PayloadStore.STRING_FIELDS:
+            offsets = store._offsets[field]
+            self._blobs[field].write(bytes(store._data[field][:int(offsets[-1])]))
+            base = self._offsets[field][-1]
+            self._offsets[field].extend((np.asarray(offsets[1:], dtype=np.int64) + base).tolist())
+        self.count += len(store)
+
+    def finalize(self) -> PayloadStore:
+        """
+        Write the column files and atomically replace the previous store
+
+        Returns:
+            The loaded PayloadStore
+        """
+        np.save(os.path.join(self.tmp_path, "id.npy"), np.asarray(self._ids, dtype=np.int64))
+
+        for field, blob in self._blobs.items():
+            blob.close()
+            blob_path = os.path.join(self.tmp_path, f"{field}.blob")
+            with open(blob_path, 'rb') as f:
+                data = np.frombuffer(f.read(), dtype=np.uint8)
+            np.save(os.path.join(self.tmp_path, f"{field}.data.npy"), data)
+            np.save(os.path.join(self.tmp_path, f"{field}.offsets.npy"), np.asarray(self._offsets[field], dtype=np.int64))
+            os.remove(blob_path)
+
+        with open(os.path.join(self.tmp_path, PayloadStore.META_FILE), 'w') as f:
+            json.dump({"count": self.count, "fields": list(PayloadStore.STRING_FIELDS)}, f)
+
+        old_path = unique_tmp_path(self.path + ".old")
+        if os.path.exists(self.path):
+            os.rename(self.path, old_path)
+        os.rename(self.tmp_path, self.path)
+        if os.path.exists(old_path):
+            shutil.rmtree(old_path)
+
+        store = PayloadStore(self.path)
+        store.load()
+        return store
+
+    def abort(self) -> None:
+        """Discard the partially written store"""
+        for blob in self._blobs.values():
+            blob.close()
+        shutil.rmtree(self.tmp_path, ignore_errors=True)
+
+
+class VectorFile:
+    """Raw float32 vectors in FAISS position order, memory-mapped for exact re-ranking.
+
+    The file has no header: row ``i`` is the ``dimension`` floats at byte
+    offset ``i * dimension * 4``. Only the rows that are read get paged in.
+    """
+
+    def __init__(self, path: str, dimension: int):
+        """
+        Initialize the vector file
+
+        Args:
+            path: File holding the vectors
+            dimension: Vector dimension
+        """
+        self.path = path
+        self.dimension = dimension
+        self._vectors: Optional[np.ndarray] = None
+
+    def is_loaded(self) -> bool:
+        """Check whether the vectors are memory-mapped"""
+        return self._vectors is not None
+
+    def load(self) -> bool:
+        """
+        Memory-map the vector file
+
+        Returns:
+            bool: True if the file was loaded, False if it is missing or has a partial row
+        """
+        try:
+            size = os.path.getsize(self.path)
+            row_bytes = self.dimension * 4
+            if size % row_bytes:
+                raise ValueError(f"Vector file size {size} is not a multiple of {row_bytes}")
+            if size == 0:
+                self._vectors = np.empty((0, self.dimension), dtype=np.float32)
+            else:
+                self._vectors = np.memmap(self.path, dtype=np.float32, mode='r', shape=(size // row_bytes, self.dimension))
+            return True
+        except Exception as e:
+            print(f"Error loading vector file {self.path}: {e}")
+            self._vectors = None
+            return False
+
+    def __len__(self) -> int:
+        return len(self._vectors) if self._vectors is not None else 0
+
+    def take(self, positions: np.ndarray) -> np.ndarray:
+        """
+        Read vectors by FAISS position
+
+        Args:
+            positions: Array of positions (any shape, all valid)
+
+        Returns:
+            np.ndarray: float32 array of shape positions.shape + (dimension,)
+        """
+        return self._vectors[positions]
+
+
+class VectorFileWriter:
+    """Streams vectors into a new VectorFile, replacing the old one on finalize"""
+
+    def __init__(self, path: str, dimension: int):
+        """
+        Initialize the writer
+
+        Args:
+            path: Final vector file
+            dimension: Vector dimension
+        """
+        self.path = path
+        self.dimension = dimension
+        self.tmp_path = unique_tmp_path(path)
+        self._file = open(self.tmp_path, 'wb')
+
+    def append(self, vectors: np.ndarray) -> None:
+        """Append a (n, dimension) matrix of vectors"""
+        self._file.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+
+    def append_file(self, vector_file: VectorFile) -> None:
+        """Append all vectors of an existing file"""
+        if vector_file.is_loaded() and len(vector_file):
+            self._file.write(np.asarray(vector_file._vectors).tobytes())
+
+    def close(self) -> VectorFile:
+        """
+        Finish writing without replacing the previous file yet
+
+        Returns:
+            VectorFile reading the written (temporary) file
+        """
+        self._file.close()
+        vector_file = VectorFile(self.tmp_path, self.dimension)
+        vector_file.load()
+        return vector_file
+
+    def finalize(self) -> VectorFile:
+        """
+        Atomically replace the previous file
+
+        Returns:
+            The loaded VectorFile
+        """
+        self._file.close()
+        os.replace(self.tmp_path, self.path)
+        vector_file = VectorFile(self.path, self.dimension)
+        vector_file.load()
+        return vector_file
+
+    def abort(self) -> None:
+        """Discard the partially written file"""
+        self._file.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+class IdMap:
+    """FAISS position -> Qdrant point ID mapping stored as one contiguous int64 array.
+
+    The array is saved as ``.npy`` and memory-mapped on load. Forward lookups
+    are a vectorized ``take``; reverse lookups binary-search a sorted copy of
+    the IDs instead of keeping a Python dict. A position whose point was
+    deleted or replaced holds -1 (a tombstone) until the next full rebuild.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the mapping
+
+        Args:
+            path: .npy file holding the Qdrant IDs in FAISS position order
+        """
+        self.path = path
+        self._ids = np.empty(0, dtype=np.int64)
+        self._sorted_ids = np.empty(0, dtype=np.int64)
+        self._sorted_positions = np.empty(0, dtype=np.int64)
+        self._tombstones = np.empty(0, dtype=np.int64)
+
+    def exists(self) -> bool:
+        """Check whether the mapping file is present on disk"""
+        return os.path.exists(self.path)
+
+    def load(self) -> bool:
+        """
+        Memory-map the mapping file
+
+        Returns:
+            bool: True if the mapping was loaded
+        """
+        try:
+            self._set(np.load(self.path, mmap_mode='r'))
+            return True
+        except Exception as e:
+            print(f"Error loading id mapping from {self.path}: {e}")
+            self._set(np.empty(0, dtype=np.int64))
+            return False
+
+    def save(self, ids: np.ndarray) -> None:
+        """
+        Atomically write a new mapping and use it
+
+        Args:
+            ids: Qdrant IDs in FAISS position order
+        """
+        ids = np.ascontiguousarray(ids, dtype=np.int64)
+        tmp_path = unique_tmp_path(self.path)
+        with open(tmp_path, 'wb') as f:
+            np.save(f, ids)
+        os.replace(tmp_path, self.path)
+        self.load()
+
+    def _set(self, ids: np.ndarray) -> None:
+        self._ids = ids
+        self._sorted_positions = np.argsort(ids, kind='stable')
+        self._sorted_ids = np.asarray(ids)[self._sorted_positions]
+        self._tombstones = np.flatnonzero(np.asarray(ids) < 0)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @property
+    def ids(self) -> np.ndarray:
+        """Qdrant IDs in FAISS position order"""
+        return self._ids
+
+    @property
+    def tombstones(self) -> np.ndarray:
+        """FAISS positions whose points were deleted or replaced"""
+        return self._tombstones
+
+    def live_count(self) -> int:
+        """Number of positions that still map to a Qdrant point"""
+        return len(self._ids) - len(self._tombstones)
+
+    def tombstone(self, positions: np.ndarray) -> "IdMap":
+        """
+        Save a copy of the mapping with positions marked as deleted
+
+        This mapping keeps its current (memory-mapped) view, so searches that
+        are using it are not affected.
+
+        Args:
+            positions: FAISS positions to retire (-1 entries are ignored)
+
+        Returns:
+            IdMap: The saved mapping
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        ids = np.array(self._ids, dtype=np.int64)
+        ids[positions[positions >= 0]] = -1
+        id_map = IdMap(self.path)
+        id_map.save(ids)
+        return id_map
+
+    def to_qdrant(self, positions: np.ndarray) -> np.ndarray:
+        """
+        Map FAISS positions to Qdrant IDs
+
+        Args:
+            positions: Array of FAISS positions (-1 or out of range for no hit)
+
+        Returns:
+            np.ndarray: int64 Qdrant IDs of the same shape, -1 where the position is invalid
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        valid = (positions >= 0) & (positions < len(self._ids))
+        result = np.full(positions.shape, -1, dtype=np.int64)
+        result[valid] = np.take(self._ids, positions[valid])
+        return result
+
+    def to_positions(self, qdrant_ids: np.ndarray) -> np.ndarray:
+        """
+        Map Qdrant IDs to FAISS positions by binary search
+
+        Args:
+            qdrant_ids: Array of Qdrant point IDs
+
+        Returns:
+            np.ndarray: int64 FAISS positions of the same shape, -1 for unknown IDs
+        """
+        qdrant_ids = np.asarray(qdrant_ids, dtype=np.int64)
+        if not len(self._sorted_ids) or not qdrant_ids.size:
+            return np.full(qdrant_ids.shape, -1, dtype=np.int64)
+        slots = np.clip(np.searchsorted(self._sorted_ids, qdrant_ids), 0, len(self._sorted_ids) - 1)
+        found = self._sorted_ids[slots] == qdrant_ids
+        return np.where(found, self._sorted_positions[slots], -1)
+
+    def contains(self, qdrant_ids: np.ndarray) -> np.ndarray:
+        """Boolean mask of which Qdrant IDs are in the mapping"""
+        return self.to_positions(qdrant_ids) >= 0
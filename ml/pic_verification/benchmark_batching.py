@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark of ResNet18 image embedding throughput versus batch size.
+
+Usage:
+    # Synthetic images, default batch sizes
+    python benchmark_batching.py
+
+    # Real images from a directory, custom batch sizes and thread count
+    python benchmark_batching.py --images-dir datasets/fish_images --batch-sizes 1 4 16 --threads 4
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+from typing import List, Dict, Any
+
+import numpy as np
+import torch
+from PIL import Image
+
+# Add the current directory to Python path to import embedder
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from embedder import Embedder
+
+
+def load_images(images_dir: str, num_images: int) -> List[Image.Image]:
+    """Load up to num_images images from a directory, or generate random ones if no directory is given"""
+    if images_dir:
+        paths = sorted(
+            p for p in Path(images_dir).iterdir()
+            if p.suffix.lower() in ('.jpg', '.jpeg', '.png', '.gif', '.bmp')
+        )[:num_images]
+        images = []
+        for path in paths:
+            try:
+                images.append(Image.open(path).convert('RGB'))
+            except Exception as e:
+                print(f"Skipping {path}: {e}")
+        if not images:
+            raise ValueError(f"No readable images found in {images_dir}")
+        return images
+
+    rng = np.random.default_rng(42)
+    return [
+        Image.fromarray(rng.integers(0, 256, size=(320, 480, 3), dtype=np.uint8))
+        for _ in range(num_images)
+    ]
+
+
+def benchmark_batch_size(embedder: Embedder, tensors: List[torch.Tensor], batch_size: int,
+                         warmup_batches: int = 2) -> Dict[str, Any]:
+    """Embed all tensors in batches of batch_size and measure throughput"""
+    batches = [tensors[i:i + batch_size] for i in range(0, len(tensors), batch_size)]
+
+    for batch in batches[:warmup_batches]:
+        embedder.get_embeddings(batch)
+
+    batch_times = []
+    start = time.perf_counter()
+    for batch in batches:
+        batch_start = time.perf_counter()
+        embedder.get_embeddings(batch)
+        batch_times.append(time.perf_counter() - batch_start)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "batch_size": batch_size,
+        "images": len(tensors),
+        "total_time_s": elapsed,
+        "images_per_sec": len(tensors) / elapsed if elapsed > 0 else float('inf'),
+        "mean_batch_latency_ms": float(np.mean(batch_times)) * 1000,
+        "p95_batch_latency_ms": float(np.percentile(batch_times, 95)) * 1000
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ResNet18 embedding throughput vs batch size (CPU)')
+    parser.add_argument('--images-dir', type=str, default=None,
+                        help='Directory with images (default: random synthetic images)')
+    parser.add_argument('--num-images', type=int, default=128,
+                        help='Number of images to embed per batch size (default: 128)')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32],
+                        help='Batch sizes to test (default: 1 2 4 8 16 32)')
+    parser.add_argument('--threads', type=int, default=None,
+                        help='Number of torch intra-op threads (default: torch default)')
+    parser.add_argument('--output', type=str, default=None,
+                        help='Optional JSON file to save results to')
+
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    print("🐟 ResNet18 Batching Benchmark")
+    print("=" * 60)
+    print(f"Torch threads: {torch.get_num_threads()}")
+
+    embedder = Embedder()
+    images = load_images(args.images_dir, args.num_images)
+
+    # Preprocessing is per image in the API too, so it is excluded from the measurement
+    tensors = [embedder.preprocess(image) for image in images]
+    print(f"Prepared {len(tensors)} images")
+    print()
+
+    results = []
+    for batch_size in args.batch_sizes:
+        result = benchmark_batch_size(embedder, tensors, batch_size)
+        results.append(result)
+        print(f"batch={batch_size:3d}  {result['images_per_sec']:8.1f} img/s  "
+              f"batch latency mean {result['mean_batch_latency_ms']:8.2f}ms  "
+              f"p95 {result['p95_batch_latency_ms']:8.2f}ms")
+
+    baseline = results[0]['images_per_sec'] if results else 0
+    if baseline > 0:
+        best = max(results, key=lambda r: r['images_per_sec'])
+        print()
+        print(f"💡 Best throughput at batch size {best['batch_size']}: "
+              f"{best['images_per_sec'] / baseline:.2f}x batch size {results[0]['batch_size']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"torch_threads": torch.get_num_threads(), "results": results}, f, indent=2)
+        print(f"📁 Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
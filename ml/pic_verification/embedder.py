@@ -78,6 +78,37 @@ class Embedder:
             else:
                 raise ValueError("Image must be PIL.Image or torch.Tensor")
 
+    def preprocess(self, image: Image.Image) -> torch.Tensor:
+        """
+        Apply the ResNet18 preprocessing pipeline to a PIL image
+
+        Args:
+            image: PIL Image
+
+        Returns:
+            Preprocessed image tensor of shape (3, 224, 224)
+        """
+        return self.transform(image.convert('RGB'))
+
+    def get_embeddings(self, images: List) -> torch.Tensor:
+        """
+        Get embeddings for several images with a single encoder forward pass
+
+        Args:
+            images: List of PIL Images and/or preprocessed (3, 224, 224) tensors
+
+        Returns:
+            torch tensor of shape (len(images), 512)
+        """
+        if not images:
+            # ResNet18 feature size
+            return torch.empty((0, 512))
+
+        tensors = [self.preprocess(image) if isinstance(image, Image.Image) else image for image in images]
+
+        with torch.no_grad():
+            return self.encoder(torch.stack(tensors))
+
     def load_and_preprocess_image(self, image_path: str) -> Optional[torch.Tensor]:
         """
         Load and preprocess a single image from file path
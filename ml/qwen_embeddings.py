@@ -2,7 +2,7 @@
 Qwen text embedding utilities for fish search
 """
 
-from typing import List, Optional
+from typing import List, Optional, TYPE_CHECKING
 import torch
 import numpy as np
 import platform
@@ -30,21 +30,26 @@ except ImportError:
     except ImportError:
         SENTENCE_TRANSFORMERS_AVAILABLE = False
 
+if TYPE_CHECKING:
+    from embedding_cache import EmbeddingCache
+
 
 class QwenEmbedder:
     """Qwen text embedder for fish descriptions"""
     
-    def __init__(self, device: Optional[str] = None):
+    def __init__(self, device: Optional[str] = None, cache: Optional["EmbeddingCache"] = None):
         """
         Initialize the Qwen text embedder
         
         Args:
             device: Device to run the model on ('cuda', 'cpu', or None for auto-detect)
+            cache: Optional persistent embedding cache consulted before running the model
         """
         self.device = device
         self.model = None
         self.model_name = "Qwen/Qwen3-Embedding-0.6B"
         self.embedding_dimension = None
+        self.cache = cache
         
         # Load Qwen model
         self._load_qwen_model()
@@ -118,6 +123,11 @@ class QwenEmbedder:
         if self.model is None:
             raise RuntimeError("Model not loaded")
         
+        if self.cache is not None:
+            cached = self.cache.get(self.model_name, text)
+            if cached is not None:
+                return cached.tolist()
+        
         embedding = self.model.encode(
             text,
             convert_to_tensor=False,
@@ -127,9 +137,14 @@ class QwenEmbedder:
         
         # Convert to list
         if hasattr(embedding, 'tolist'):
-            return embedding.tolist()
+            embedding = embedding.tolist()
         else:
-            return list(embedding)
+            embedding = list(embedding)
+        
+        if self.cache is not None:
+            self.cache.put(self.model_name, text, embedding)
+        
+        return embedding
     
     def encode_texts(self, texts: List[str], batch_size: int = 16) -> List[List[float]]:
         """
@@ -145,6 +160,26 @@ class QwenEmbedder:
         if self.model is None:
             raise RuntimeError("Model not loaded")
         
+        if self.cache is None:
+            return self._encode_uncached(texts, batch_size)
+        
+        # Only run the model for texts that are not cached yet
+        cached = self.cache.get_many(self.model_name, texts)
+        missing = [text for text in dict.fromkeys(texts) if text not in cached]
+        
+        if missing:
+            computed = dict(zip(missing, self._encode_uncached(missing, batch_size)))
+            self.cache.put_many(self.model_name, computed)
+        else:
+            computed = {}
+        
+        return [
+            computed[text] if text in computed else cached[text].tolist()
+            for text in texts
+        ]
+    
+    def _encode_uncached(self, texts: List[str], batch_size: int) -> List[List[float]]:
+        """Run the model on a list of texts"""
         embeddings = self.model.encode(
             texts,
             batch_size=batch_size,
@@ -182,7 +217,29 @@ class QwenEmbedder:
             embedding = self._adjust_embedding_dimension(embedding, target_dimension)
         
         return embedding
-    
+
+    def encode_fish_queries(self, queries: List[str], target_dimension: int = 1024) -> List[List[float]]:
+        """
+        Encode several fish search queries in one forward pass
+
+        Args:
+            queries: Fish search queries
+            target_dimension: Target dimension for fish embeddings (default 1024)
+
+        Returns:
+            One embedding vector per query, adjusted to target dimension
+        """
+        if not queries:
+            return []
+
+        embeddings = self.encode_texts(queries, batch_size=len(queries))
+
+        return [
+            embedding if len(embedding) == target_dimension
+            else self._adjust_embedding_dimension(embedding, target_dimension)
+            for embedding in embeddings
+        ]
+
     def _adjust_embedding_dimension(self, embedding: List[float], target_dimension: int) -> List[float]:
         """
         Adjust embedding dimension to match target dimension
@@ -225,5 +282,6 @@ class QwenEmbedder:
             "embedding_dimension": self.embedding_dimension or 0,
             "device": self.device or "unknown",
             "is_loaded": self.model is not None,
+            "embedding_cache": self.cache.path if self.cache is not None else None,
             "model_type": "Qwen Embedder"
         }
\ No newline at end of file
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Local snapshots of a Qdrant collection for building FAISS indexes offline
+
+A snapshot is a directory holding everything an index build needs, so a
+replica can boot from local files without a reachable Qdrant:
+
+    snapshot.json   collection, dimension, point count, creation time,
+                    updated_at high-water mark and content hash
+    vectors.npy     (n, d) float32 vectors
+    ids.npy         (n,) int64 Qdrant point IDs in the same order
+    payloads/       PayloadStore column files in the same order
+
+Usage:
+    # Export a collection once (needs QDRANT_URL / QDRANT_API_KEY)
+    python snapshot.py export --collection fish_embeddings_20250627_102709 --output snapshots/text
+
+    # Show what a snapshot contains
+    python snapshot.py info snapshots/text
+
+Point FaissFromQdrantDatabase at it with snapshot_path (TEXT_INDEX_SNAPSHOT /
+IMAGE_INDEX_SNAPSHOT in the API).
+"""
+
+import json
+import os
+import shutil
+import time
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from index_manifest import point_hashes, content_hash
+from payload_store import PayloadStore, PayloadStoreWriter, VectorFileWriter
+
+META_FILE = "snapshot.json"
+FORMAT_VERSION = 1
+
+
+class Snapshot:
+    """Read-only, memory-mapped snapshot of a collection"""
+
+    def __init__(self, path: str):
+        """
+        Initialize the snapshot reader
+
+        Args:
+            path: Snapshot directory
+        """
+        self.path = path
+        self.meta: Dict[str, Any] = {}
+        self.ids: Optional[np.ndarray] = None
+        self.vectors: Optional[np.ndarray] = None
+        self.payload_store = PayloadStore(os.path.join(path, "payloads"))
+
+    def exists(self) -> bool:
+        """Check whether a complete snapshot is present on disk"""
+        return os.path.exists(os.path.join(self.path, META_FILE))
+
+    def load(self) -> bool:
+        """
+        Memory-map the snapshot files
+
+        Returns:
+            bool: True if the snapshot was loaded and its files are consistent
+        """
+        try:
+            with open(os.path.join(self.path, META_FILE), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            ids = np.load(os.path.join(self.path, "ids.npy"), mmap_mode='r')
+            vectors = np.load(os.path.join(self.path, "vectors.npy"), mmap_mode='r')
+
+            if vectors.ndim != 2 or vectors.shape[1] != meta["dimension"] or vectors.dtype != np.float32:
+                raise ValueError(f"vectors.npy has shape {vectors.shape} ({vectors.dtype}), expected (n, {meta['dimension']}) float32")
+            if not (len(ids) == len(vectors) == meta["count"]):
+                raise ValueError(f"{len(ids)} ids and {len(vectors)} vectors, {meta['count']} expected")
+            if not self.payload_store.load() or len(self.payload_store) != meta["count"]:
+                raise ValueError("payload store is missing or does not match the vectors")
+
+            self.meta, self.ids, self.vectors = meta, ids, vectors
+            return True
+
+        except Exception as e:
+            print(f"Error loading snapshot from {self.path}: {e}")
+            self.meta, self.ids, self.vectors = {}, None, None
+            return False
+
+    def __len__(self) -> int:
+        return len(self.ids) if self.ids is not None else 0
+
+    @property
+    def dimension(self) -> Optional[int]:
+        return self.meta.get("dimension")
+
+    @property
+    def high_water_mark(self) -> Optional[float]:
+        """Highest payload "updated_at" timestamp in the snapshot"""
+        return self.meta.get("high_water_mark")
+
+    def pages(self, page_size: int = 10000) -> Iterator[Tuple[np.ndarray, np.ndarray, None]]:
+        """
+        Iterate over the snapshot in position order
+
+        Yields:
+            (ids (n,), vectors (n, d), None) per page, like FaissFromQdrantDatabase._scroll_pages
+            without payloads (those are copied from payload_store in bulk)
+        """
+        for start in range(0, len(self), page_size):
+            yield (np.asarray(self.ids[start:start + page_size]),
+                   np.ascontiguousarray(self.vectors[start:start + page_size]),
+                   None)
+
+
+def export_snapshot(client, collection_name: str, output_path: str, batch_size: int = 1000) -> Dict[str, Any]:
+    """
+    Scroll a Qdrant collection into a snapshot directory
+
+    The snapshot is written to "<output_path>.tmp" and renamed into place when
+    complete, replacing any previous snapshot.
+
+    Args:
+        client: QdrantClient
+        collection_name: Collection to export
+        output_path: Snapshot directory
+        batch_size: Scroll page size
+
+    Returns:
+        Dict with the snapshot metadata
+    """
+    start = time.time()
+    tmp_path = output_path + ".tmp"
+    if os.path.exists(tmp_path):
+        shutil.rmtree(tmp_path)
+    os.makedirs(tmp_path)
+
+    dimension = None
+    ids = []
+    hashes = []
+    high_water_mark = None
+    payload_writer = PayloadStoreWriter(os.path.join(tmp_path, "payloads"))
+    vector_writer = None
+
+    try:
+        offset = None
+        while True:
+            page, offset = client.scroll(
+                collection_name=collection_name,
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=True
+            )
+            points = [point for point in page if point.vector]
+            if points:
+                vectors = np.array([point.vector for point in points], dtype=np.float32)
+                if dimension is None:
+                    dimension = vectors.shape[1]
+                    vector_writer = VectorFileWriter(os.path.join(tmp_path, "vectors.f32"), dimension)
+                page_ids = np.array([point.id for point in points], dtype=np.int64)
+
+                vector_writer.append(vectors)
+                payload_writer.append([point.payload for point in points])
+                ids.append(page_ids)
+                hashes.append(point_hashes(page_ids, vectors))
+                timestamps = [(point.payload or {}).get("updated_at") for point in points]
+                timestamps = [timestamp for timestamp in timestamps if isinstance(timestamp, (int, float))]
+                if timestamps:
+                    high_water_mark = max(timestamps + ([high_water_mark] if high_water_mark is not None else []))
+                print(f"📥 Exported {sum(len(page) for page in ids)} points...", end="\r")
+            if offset is None or not page:
+                break
+        print()
+    except Exception:
+        payload_writer.abort()
+        if vector_writer is not None:
+            vector_writer.abort()
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+    if dimension is None:
+        payload_writer.abort()
+        shutil.rmtree(tmp_path)
+        raise ValueError(f"Collection {collection_name} has no vectors to export")
+
+    payload_writer.finalize()
+    ids = np.concatenate(ids)
+    np.save(os.path.join(tmp_path, "ids.npy"), ids)
+
+    # Raw vectors -> .npy (the row count is only known at the end of the scroll)
+    raw_vectors = vector_writer.finalize()
+    vectors = np.lib.format.open_memmap(os.path.join(tmp_path, "vectors.npy"), mode='w+', dtype=np.float32,
+                                        shape=(len(raw_vectors), dimension))
+    for row in range(0, len(raw_vectors), 100000):
+        vectors[row:row + 100000] = raw_vectors.take(slice(row, row + 100000))
+    vectors.flush()
+    del vectors, raw_vectors
+    os.remove(os.path.join(tmp_path, "vectors.f32"))
+
+    meta = {
+        "format": FORMAT_VERSION,
+        "collection": collection_name,
+        "dimension": int(dimension),
+        "count": int(len(ids)),
+        "created_at": time.time(),
+        "high_water_mark": high_water_mark,
+        "content_hash": content_hash(np.concatenate(hashes))
+    }
+    with open(os.path.join(tmp_path, META_FILE), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+
+    if os.path.exists(output_path):
+        shutil.rmtree(output_path)
+    os.rename(tmp_path, output_path)
+    print(f"✅ Exported {meta['count']} points ({dimension}d) from {collection_name} to {output_path} "
+          f"in {time.time() - start:.1f}s")
+    return meta
+
+
+def main():
+    import argparse
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description='Export and inspect offline collection snapshots')
+    parser.add_argument('command', choices=['export', 'info'], help='Action to perform')
+    parser.add_argument('path', nargs='?', help='Snapshot directory (for info)')
+    parser.add_argument('--collection', type=str, default="fish_embeddings_20250627_102709",
+                        help='Qdrant collection to export')
+    parser.add_argument('--output', type=str, default=None, help='Snapshot directory to write (for export)')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Scroll page size (default: 1000)')
+
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        from qdrant_client import QdrantClient
+
+        if not os.getenv("QDRANT_URL") or not os.getenv("QDRANT_API_KEY"):
+            parser.error("QDRANT_URL and QDRANT_API_KEY environment variables must be set")
+        client = QdrantClient(url=os.getenv("QDRANT_URL"), api_key=os.getenv("QDRANT_API_KEY"))
+        export_snapshot(client, args.collection, args.output or f"snapshots/{args.collection}", batch_size=args.batch_size)
+    else:
+        if not args.path:
+            parser.error("info requires a snapshot directory")
+        snapshot = Snapshot(args.path)
+        if not snapshot.load():
+            raise SystemExit(1)
+        print(json.dumps(snapshot.meta, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Admission control of BoundedExecutor and MicroBatcher
+
+Run with: python -m unittest test_batching (or pytest test_batching.py)
+"""
+
+import asyncio
+import threading
+import unittest
+
+from batching import MicroBatcher
+from executors import BoundedExecutor, ExecutorSaturatedError
+
+
+class AdmittedBatchTest(unittest.TestCase):
+    def test_admitted_batch_completes_when_pool_is_saturated(self):
+        async def scenario():
+            executor = BoundedExecutor("inference", max_workers=1, queue_depth=1)
+            batcher = MicroBatcher("double", lambda items: [item * 2 for item in items], executor,
+                                   max_batch_size=4, max_wait_ms=1)
+            release = threading.Event()
+
+            # Per-request work (e.g. image preprocessing) fills every slot of the pool
+            blockers = [asyncio.ensure_future(executor.run(release.wait, 5)) for _ in range(2)]
+            await asyncio.sleep(0.05)
+            with self.assertRaises(ExecutorSaturatedError):
+                await executor.run(lambda: None)
+
+            # A batch collected from already admitted requests still runs once a worker is free
+            results = asyncio.gather(batcher.submit(1), batcher.submit(2))
+            await asyncio.sleep(0.05)
+            release.set()
+            self.assertEqual(await asyncio.wait_for(results, 5), [2, 4])
+            await asyncio.gather(*blockers)
+
+            stats = executor.get_stats()
+            self.assertEqual(stats["in_flight"], 0)
+            self.assertEqual(stats["rejected"], 1)
+            self.assertEqual(batcher.get_stats()["failed_batches"], 0)
+
+            # Admitted work does not use up queue slots
+            self.assertIsNone(await executor.run(lambda: None))
+            executor.shutdown()
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    unittest.main()
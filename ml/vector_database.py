@@ -1,8 +1,10 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from qdrant_client import QdrantClient
 from qdrant_client.models import VectorParams, Distance, PointStruct, Filter, FieldCondition, MatchValue
 import uuid
 import os
+import time
 from fish_species import FishSpecies
 
 
@@ -51,20 +53,23 @@ class VectorDatabase:
         except Exception as e:
             print(f"Error initializing collection: {e}")
     
-    def store(self, embedding: List[float], metadata: FishSpecies) -> int:
+    def store(self, embedding: List[float], metadata: FishSpecies, fish_id: Optional[int] = None) -> int:
         """
         Store fish embedding with metadata in the vector database
         
         Args:
             embedding: Vector embedding of the fish
             metadata: FishSpecies object containing fish information
+            fish_id: Point ID to use (storing the same ID again overwrites the point);
+                generated if not given
             
         Returns:
             int: Unique ID of the stored embedding
         """
         try:
             # Generate unique ID
-            fish_id = len(self.fish_embeddings) + 1
+            if fish_id is None:
+                fish_id = len(self.fish_embeddings) + 1
             
             # Store in local maps
             self.fish_embeddings[fish_id] = embedding
@@ -74,7 +79,8 @@ class VectorDatabase:
             point = PointStruct(
                 id=fish_id,
                 vector=embedding,
-                payload=metadata.to_dict()
+                # updated_at lets FAISS indexes built from this collection sync changed points incrementally
+                payload={**metadata.to_dict(), "updated_at": time.time()}
             )
             
             # Insert into Qdrant
@@ -90,6 +96,99 @@ class VectorDatabase:
             print(f"Error storing embedding: {e}")
             return -1
     
+    def store_many(self, items: List[Tuple[List[float], FishSpecies]], chunk_size: int = 256, parallel: int = 4,
+                   wait: bool = True, max_retries: int = 3, ids: Optional[List[int]] = None) -> Dict[str, Any]:
+        """
+        Store many fish embeddings with one upsert per chunk instead of one per fish
+        
+        Chunks are sent by up to `parallel` threads at once. A failed chunk is
+        retried with exponential backoff (0.5s, 1s, 2s, ...); its points are
+        only counted as failed once all retries are exhausted. Without explicit
+        ids, IDs are assigned after the highest ID stored so far. With
+        wait=False the last chunk is still sent with wait=True once all others
+        have been received; Qdrant applies updates in order, so the call only
+        returns when the whole batch has been applied.
+        
+        Args:
+            items: List of (embedding, metadata) tuples
+            chunk_size: Points per upsert request
+            parallel: Number of upsert requests in flight
+            wait: Wait until Qdrant has applied each chunk (False only waits for all but the last chunk to be received)
+            max_retries: Retries per chunk after the first attempt
+            ids: Point IDs of the items (storing the same ID again overwrites the point)
+            
+        Returns:
+            Dict with the stored IDs, stored/failed counts, elapsed seconds and rows_per_second
+        """
+        start = time.time()
+        updated_at = time.time()
+        
+        # Assign consecutive IDs after the highest local one (unless given) and fill the local maps
+        # up front (points of failed chunks are removed again)
+        if ids is None:
+            next_id = max(self.fish_embeddings, default=0) + 1
+            ids = range(next_id, next_id + len(items))
+        points = []
+        for fish_id, (embedding, metadata) in zip(ids, items):
+            self.fish_embeddings[fish_id] = embedding
+            self.species_metadata[fish_id] = metadata
+            points.append(PointStruct(
+                id=fish_id,
+                vector=embedding,
+                payload={**metadata.to_dict(), "updated_at": updated_at}
+            ))
+        
+        chunks = [points[i:i + chunk_size] for i in range(0, len(points), chunk_size)]
+        
+        def upsert_chunk(chunk: List[PointStruct], chunk_wait: bool = wait) -> None:
+            for attempt in range(max_retries + 1):
+                try:
+                    self.client.upsert(collection_name=self.collection_name, points=chunk, wait=chunk_wait)
+                    return
+                except Exception as e:
+                    if attempt == max_retries:
+                        raise
+                    delay = 0.5 * 2 ** attempt
+                    print(f"Upsert of {len(chunk)} points failed ({e}), retrying in {delay:.1f}s...")
+                    time.sleep(delay)
+        
+        stored_ids = []
+        failed = 0
+        
+        def collect(chunk: List[PointStruct], future) -> None:
+            nonlocal failed
+            try:
+                future.result()
+                stored_ids.extend(point.id for point in chunk)
+            except Exception as e:
+                print(f"Error storing {len(chunk)} embeddings (IDs {chunk[0].id}-{chunk[-1].id}): {e}")
+                failed += len(chunk)
+                for point in chunk:
+                    self.fish_embeddings.pop(point.id, None)
+                    self.species_metadata.pop(point.id, None)
+        
+        # Without wait, the last chunk waits for the batch to be applied once all earlier chunks are received
+        last_chunk = chunks.pop() if not wait and chunks else None
+        with ThreadPoolExecutor(max_workers=max(1, parallel), thread_name_prefix="qdrant-upsert") as executor:
+            futures = {executor.submit(upsert_chunk, chunk): chunk for chunk in chunks}
+            for future in as_completed(futures):
+                collect(futures[future], future)
+            if last_chunk is not None:
+                collect(last_chunk, executor.submit(upsert_chunk, last_chunk, True))
+                chunks.append(last_chunk)
+        
+        elapsed = time.time() - start
+        rows_per_second = len(stored_ids) / elapsed if elapsed > 0 else 0.0
+        print(f"Stored {len(stored_ids)}/{len(points)} fish embeddings in {len(chunks)} upserts "
+              f"in {elapsed:.2f}s ({rows_per_second:.0f} rows/s)")
+        return {
+            "ids": sorted(stored_ids),
+            "stored": len(stored_ids),
+            "failed": failed,
+            "seconds": elapsed,
+            "rows_per_second": rows_per_second
+        }
+    
     def search(self, query_embedding: List[float], top_k: int = 5) -> List[FishSpecies]:
         """
         Search for similar fish embeddings
@@ -179,7 +278,7 @@ class VectorDatabase:
             point = PointStruct(
                 id=fish_id,
                 vector=embedding,
-                payload=metadata.to_dict()
+                payload={**metadata.to_dict(), "updated_at": time.time()}
             )
             
             self.client.upsert(